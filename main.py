@@ -1,13 +1,16 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import os
+import json
 from typing import List, Dict, Any
 from loguru import logger
 
 from src.models import QueryRequest, QueryResponse, SystemHealth, BatchQueryRequest, BatchQueryResponse
 from src.query_retrieval_system import QueryRetrievalSystem
+from src.http_client import close_async_client
+from src.pdf_processor import shutdown_extraction_pool
 from src.config import settings
 
 # Initialize FastAPI app
@@ -46,6 +49,15 @@ async def startup_event():
     else:
         print("🏭 Production mode: ON")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush pending index writes and release pools on shutdown."""
+    query_system.vector_search.flush()
+    if query_system.llm_parser.response_cache:
+        query_system.llm_parser.response_cache.close()
+    shutdown_extraction_pool()
+    await close_async_client()
+
 @app.get("/")
 async def root():
     """Root endpoint with system information."""
@@ -58,6 +70,7 @@ async def root():
         "ready": "/ready",
         "endpoints": {
             "batch_query": "/hackrx/run",
+            "batch_query_stream": "/hackrx/run/stream",
             "system_health": "/health"
         }
     }
@@ -120,6 +133,30 @@ async def process_batch_queries(request: BatchQueryRequest):
         logger.error(f"Batch query processing failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Batch query processing failed: {str(e)}")
 
+@app.post("/hackrx/run/stream")
+async def stream_batch_queries(request: BatchQueryRequest, stream_tokens: bool = False):
+    """
+    Process a batch like /hackrx/run, streaming answers as NDJSON as each question completes.
+    
+    Each line is one JSON event:
+    {"type": "token", "index": 0, "text": "A grace "}          (only with ?stream_tokens=true)
+    {"type": "answer", "index": 0, "answer": "A grace period of thirty days..."}
+    {"type": "done", "answers": ["A grace period of thirty days...", ...]}
+    
+    Answers arrive in completion order; use "index" to match them to questions.
+    """
+    logger.info(f"Streaming batch query with {len(request.questions)} questions")
+    
+    async def event_lines():
+        async for event in query_system.stream_batch_queries(
+            document_url=request.documents,
+            questions=request.questions,
+            stream_tokens=stream_tokens
+        ):
+            yield json.dumps(event) + "\n"
+    
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson")
+
 # Example endpoint for testing
 @app.post("/test/example-query")
 async def test_example_query():
@@ -1,5 +1,6 @@
 import os
 from typing import Optional
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -15,10 +16,70 @@ class Settings(BaseSettings):
     openai_api_key: str = ""
     embedding_model: str = "sentence-transformers"  # "sentence-transformers" or "text-embedding-ada-002"
     
+    # Embedding Cache (on-disk, keyed by model + text hash)
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = "./data/embedding_cache.sqlite"
+    embedding_cache_max_entries: int = 200000
+    query_embedding_cache_size: int = 1000  # Recent query embeddings kept in memory only
+    
     # LLM Parameters
     max_tokens: int = 2000
     temperature: float = 0.1
     
+    # Batch answering: pack several questions into one LLM call
+    llm_batch_mode: bool = False
+    llm_batch_max_questions: int = 8  # Questions per call
+    llm_batch_max_prompt_tokens: int = 12000  # Prompt budget per call, split above this
+    llm_batch_answer_tokens: int = 250  # Output tokens reserved per question
+    
+    # LLM Response Cache (in-memory LRU, optionally backed by SQLite)
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 2000
+    response_cache_ttl: int = 24 * 3600  # Seconds
+    response_cache_persist: bool = False
+    response_cache_path: str = "./data/response_cache.sqlite"
+    response_cache_disk_max_entries: int = 100000
+    
+    # Semantic Answer Cache (reuse answers of near-duplicate questions per document)
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.92  # Cosine similarity needed to reuse an answer
+    semantic_cache_max_entries: int = 5000  # Cached questions per document
+    semantic_cache_min_confidence: float = 0.5  # LLM confidence an answer needs to be reused
+    
+    # LLM Failover (retries with backoff, then the next provider; optional hedging)
+    llm_failover_providers: str = ""  # Comma-separated providers tried after llm_provider, e.g. "groq,openai"
+    gemini_model: str = "gemini-1.5-flash"  # Models used when a provider serves as failover
+    groq_model: str = "llama-3.1-8b-instant"
+    openai_model: str = "gpt-4o-mini"
+    llm_max_retries: int = 2  # Retries per provider on 429/5xx, timeouts and connection errors
+    llm_retry_base_delay: float = 0.5  # Seconds; doubles per retry, with full jitter
+    llm_retry_max_delay: float = 8.0
+    llm_hedge_enabled: bool = False  # Race a second provider when the first is slower than usual
+    llm_hedge_percentile: float = 95.0  # Hedge after this percentile of the provider's recent latency
+    llm_hedge_min_samples: int = 20  # Latencies needed before hedging starts
+    
+    # Concurrency limits
+    batch_max_concurrency: int = 8  # Questions of one batch processed at once
+    gemini_max_concurrency: int = 8  # In-flight LLM calls per provider
+    groq_max_concurrency: int = 4
+    openai_max_concurrency: int = 8
+    
+    # Provider Rate Limits (client-side token buckets; 0 = unlimited)
+    gemini_rpm: int = 0  # Requests per minute
+    gemini_tpm: int = 0  # Tokens per minute (prompt + max output, estimated with tiktoken)
+    groq_rpm: int = 0
+    groq_tpm: int = 0
+    openai_rpm: int = 0
+    openai_tpm: int = 0
+    
+    # HTTP Client (shared connection pool for LLM providers and downloads)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_timeout: float = 30.0
+    http_connect_timeout: float = 10.0
+    http_http2: bool = True  # Used when the h2 package is installed
+    
     # Pinecone Configuration
     pinecone_api_key: str = ""
     pinecone_environment: str = ""
@@ -27,11 +88,69 @@ class Settings(BaseSettings):
     
     # FAISS Configuration
     faiss_index_path: str = "./data/faiss_index"
+    faiss_async_persistence: bool = True  # Write new segments on a background thread
+    faiss_compact_segments: int = 8  # Merge a document's segments above this count
+    faiss_mmap_vectors: bool = True  # Memory-map segment vectors/chunks on load instead of reading them
+    faiss_index_type: str = "flat"  # "flat", "hnsw", "ivf_flat" or "ivf_pq"
+    faiss_ann_min_vectors: int = 10000  # Partitions below this size use an exact flat index
+    faiss_hnsw_m: int = 32
+    faiss_hnsw_ef_construction: int = 80
+    faiss_hnsw_ef_search: int = 64
+    faiss_ivf_nlist: int = 0  # 0 = 4 * sqrt(vectors)
+    faiss_ivf_nprobe: int = 16
+    faiss_pq_m: int = 16  # Sub-quantizers; must divide the embedding dimension
+    faiss_pq_nbits: int = 8
+    
+    # Hybrid Retrieval (BM25 + dense, reciprocal rank fusion)
+    hybrid_search: bool = False
+    hybrid_dense_weight: float = 1.0
+    hybrid_lexical_weight: float = 1.0
+    hybrid_rrf_k: int = 60
+    hybrid_candidates: int = 50  # Candidates taken from each retriever before fusion
+    
+    # Reranking (local cross-encoder between retrieval and the LLM)
+    reranker_enabled: bool = False
+    reranker_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    reranker_candidates: int = 15  # Retrieved chunks rescored per question
+    reranker_top_k: int = 3  # Clauses kept per question after reranking
+    reranker_budget_ms: int = 1000  # Keep retrieval order if scoring takes longer
+    reranker_cache_size: int = 20000
+    
+    # Context Assembly (clauses sent to the LLM per question)
+    context_max_tokens: int = 800
+    context_max_clauses: int = 5
     
     # Document Processing
     chunk_size: int = 200
     chunk_overlap: int = 40
     max_chunks_per_doc: int = 1000
+    chunk_across_pages: bool = False  # Let chunks flow over page breaks, recording a page span
+    chunking_strategy: str = "sentence"  # "sentence" or "structure" (clause-aligned, from PyMuPDF font data)
+    
+    # PDF Download
+    pdf_max_download_bytes: int = 100 * 1024 * 1024  # Reject larger documents
+    pdf_download_timeout: float = 30.0
+    
+    # PDF Extraction
+    pdf_extraction_workers: int = 1  # Process pool size; 1 = extract in-process, 0 = CPU count
+    pdf_pages_per_shard: int = 16  # Pages extracted per worker task
+    
+    # Lazy Ingestion (huge PDFs: embed question-targeted pages first, backfill the rest)
+    lazy_ingestion_min_pages: int = 0  # Documents with at least this many pages are ingested lazily; 0 = off
+    lazy_candidate_pages: int = 8  # Pages per question picked by the page-level BM25 index
+    lazy_backfill: bool = True
+    lazy_backfill_pages: int = 16  # Pages embedded per background backfill step
+    lazy_backfill_retries: int = 3  # Retries (with backoff) of a failed backfill step before pausing it
+    
+    # Extraction Cache (parsed pages keyed by PDF content hash)
+    extraction_cache_enabled: bool = True
+    extraction_cache_dir: str = "./data/extraction_cache"
+    extraction_cache_max_bytes: int = 1024 * 1024 * 1024  # Least recently used entries evicted above this
+    
+    # Document Cache (reuse ingested documents across batches)
+    document_cache_enabled: bool = True
+    document_cache_path: str = "./data/document_cache.json"
+    document_cache_url_ttl: int = 86400  # Seconds before a URL hit re-downloads to check the bytes; 0 = never
     
     # API Configuration
     api_host: str = "0.0.0.0"
@@ -45,6 +164,14 @@ class Settings(BaseSettings):
     data_dir: str = "./data"
     uploads_dir: str = "./data/uploads"
     
+    @field_validator("faiss_index_type")
+    @classmethod
+    def validate_faiss_index_type(cls, value: str) -> str:
+        value = value.lower()
+        if value not in ("flat", "hnsw", "ivf_flat", "ivf_pq"):
+            raise ValueError(f"FAISS_INDEX_TYPE must be flat, hnsw, ivf_flat or ivf_pq, got '{value}'")
+        return value
+    
     class Config:
         env_file = ".env"
         extra = "ignore"  # Allow extra fields from .env file
@@ -0,0 +1,76 @@
+from typing import List, Optional
+from loguru import logger
+
+from .models import SearchResult
+from .config import settings
+
+# Shortest shared text treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 20
+
+class ContextBuilder:
+    """Assembles the clauses sent to the LLM within a token budget.
+
+    Retrieved chunks are taken in relevance order; chunks contained in an
+    already selected clause are dropped and chunks that overlap one (the
+    chunk_overlap tail shared by neighbouring chunks) are merged into it, so
+    no text is sent twice. Clauses are then packed until the budget is used.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+
+    def build(self, results: List[SearchResult], max_tokens: Optional[int] = None,
+              max_clauses: Optional[int] = None) -> List[str]:
+        """Return clause texts for the prompt, most relevant first."""
+        max_tokens = max_tokens or settings.context_max_tokens
+        max_clauses = max_clauses or settings.context_max_clauses
+
+        clauses = []  # [document_id, text] in relevance order
+        for result in results:
+            chunk = result.chunk
+            for clause in clauses:
+                if clause[0] != chunk.document_id:
+                    continue
+                merged = self._merge(clause[1], chunk.content)
+                if merged is not None:
+                    clause[1] = merged
+                    break
+            else:
+                clauses.append([chunk.document_id, chunk.content])
+
+        packed = []
+        used_tokens = 0
+        for _, text in clauses:
+            if len(packed) >= max_clauses:
+                break
+            tokens = self.encoding.encode(text)
+            if used_tokens + len(tokens) > max_tokens:
+                if not packed:
+                    # Never send an empty context: cut the best clause to the budget
+                    packed.append(self.encoding.decode(tokens[:max_tokens]))
+                    used_tokens = max_tokens
+                continue
+            packed.append(text)
+            used_tokens += len(tokens)
+
+        if len(results) > len(packed):
+            logger.info(f"Context: {len(results)} chunks -> {len(packed)} clauses, {used_tokens} tokens")
+        return packed
+
+    @staticmethod
+    def _merge(first: str, second: str) -> Optional[str]:
+        """Combine two chunk texts if one contains or overlaps the other, else None."""
+        if second in first:
+            return first
+        if first in second:
+            return second
+
+        # second continues first (first's tail is second's head), or the other way round
+        for head, tail in ((first, second), (second, first)):
+            start = head.rfind(tail[:MIN_OVERLAP_CHARS])
+            while start != -1:
+                overlap = len(head) - start
+                if tail.startswith(head[start:]):
+                    return head + tail[overlap:]
+                start = head.rfind(tail[:MIN_OVERLAP_CHARS], 0, start)
+        return None
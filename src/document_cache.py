@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from loguru import logger
+
+from .config import settings
+
+# Azure Blob SAS parameters - they change on every signed link (expiry, signature)
+# but never change which blob is being served, so they are dropped from cache keys.
+SAS_QUERY_PARAMS = {
+    'sv', 'ss', 'srt', 'sp', 'se', 'st', 'spr', 'sig', 'sr', 'si', 'sdd',
+    'skoid', 'sktid', 'skt', 'ske', 'sks', 'skv', 'ses',
+    'rscc', 'rscd', 'rsce', 'rscl', 'rsct'
+}
+
+
+def normalize_document_url(url: str) -> str:
+    """Normalize a document URL so that re-signed links map to the same key."""
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in SAS_QUERY_PARAMS
+    ]
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path,
+        urlencode(sorted(query)),
+        ''
+    ))
+
+
+def hash_document_bytes(data: bytes) -> str:
+    """Return the SHA-256 hex digest of downloaded document bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class DocumentCache:
+    """Content-addressed cache of already-ingested documents.
+
+    Documents are keyed by content hash; normalized URLs point at the hash of
+    the bytes last downloaded from them, so a repeated URL skips the download
+    and a new URL serving known bytes skips parsing and embedding. URL mappings
+    older than url_ttl miss, so the bytes are downloaded and rehashed and a PDF
+    replaced at the same URL is re-ingested.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, url_ttl: Optional[int] = None):
+        self.cache_path = cache_path or settings.document_cache_path
+        self.url_ttl = settings.document_cache_url_ttl if url_ttl is None else url_ttl
+        self.url_index: Dict[str, str] = {}  # normalized URL -> content hash
+        self.url_checked: Dict[str, float] = {}  # normalized URL -> when its bytes were last hashed
+        self.entries: Dict[str, Dict[str, Any]] = {}  # content hash -> document entry
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    def lookup_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """Find a cached document by URL, unless the URL mapping needs revalidating."""
+        url_key = normalize_document_url(url)
+        content_hash = self.url_index.get(url_key)
+        if content_hash and self.url_ttl and time.time() - self.url_checked.get(url_key, 0) > self.url_ttl:
+            content_hash = None
+        entry = self.entries.get(content_hash) if content_hash else None
+        self._record(entry)
+        return entry
+
+    def lookup_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Find a cached document by content hash."""
+        entry = self.entries.get(content_hash)
+        self._record(entry)
+        return entry
+
+    def add(self, url: str, content_hash: str, document_id: str, chunks: int, complete: bool = True):
+        """Record an ingested document and the URL it was fetched from.
+        
+        complete=False marks a document whose pages are still being embedded, so
+        that an ingestion interrupted by a restart is resumed rather than reused.
+        """
+        entry = self.entries.get(content_hash)
+        if entry is None or entry['document_id'] != document_id:
+            entry = {
+                'document_id': document_id,
+                'content_hash': content_hash,
+                'created_at': time.time()
+            }
+            self.entries[content_hash] = entry
+        entry['chunks'] = chunks
+        entry['complete'] = complete
+        url_key = normalize_document_url(url)
+        self.url_index[url_key] = content_hash
+        self.url_checked[url_key] = time.time()
+        self.save()
+
+    def remove_document(self, document_id: str):
+        """Forget a document, e.g. after its vectors were lost or replaced."""
+        stale_hashes = {h for h, entry in self.entries.items() if entry['document_id'] == document_id}
+        if not stale_hashes:
+            return
+        for content_hash in stale_hashes:
+            del self.entries[content_hash]
+        self.url_index = {url: h for url, h in self.url_index.items() if h not in stale_hashes}
+        self.url_checked = {url: t for url, t in self.url_checked.items() if url in self.url_index}
+        self.save()
+
+    def _record(self, entry: Optional[Dict[str, Any]]):
+        if entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def save(self):
+        """Persist the cache to disk."""
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'urls': self.url_index, 'url_checked': self.url_checked, 'entries': self.entries}, f)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logger.error(f"Failed to save document cache: {str(e)}")
+
+    def load(self):
+        """Load the cache from disk if present."""
+        try:
+            if os.path.exists(self.cache_path):
+                with open(self.cache_path, 'r') as f:
+                    data = json.load(f)
+                self.url_index = data.get('urls', {})
+                self.url_checked = data.get('url_checked', {})
+                self.entries = data.get('entries', {})
+                logger.info(f"Loaded document cache with {len(self.entries)} documents")
+        except Exception as e:
+            logger.error(f"Failed to load document cache: {str(e)}")
+            self.url_index = {}
+            self.url_checked = {}
+            self.entries = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {
+            "documents": len(self.entries),
+            "urls": len(self.url_index),
+            "hits": self.hits,
+            "misses": self.misses
+        }
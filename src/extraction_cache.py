@@ -0,0 +1,114 @@
+import gzip
+import json
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from loguru import logger
+
+from .config import settings
+
+# Bump whenever extraction output changes (cleaning rules, line data, extractor upgrades)
+# so stale cached pages are never served.
+EXTRACTOR_VERSION = 1
+
+class ExtractionCache:
+    """On-disk cache of extracted PDF pages.
+
+    Entries are gzipped JSON files keyed by the SHA-256 of the PDF bytes, the
+    extractor version and the extraction variant, so re-chunking or re-embedding
+    a known document skips parsing entirely. File modification times track
+    recency; least recently used entries are evicted above max_bytes.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or settings.extraction_cache_dir
+        self.max_bytes = max_bytes or settings.extraction_cache_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+    def _path(self, content_hash: str, variant: str) -> str:
+        return os.path.join(self.cache_dir, content_hash[:2],
+                            f"{content_hash}.v{EXTRACTOR_VERSION}.{variant}.json.gz")
+
+    def get(self, content_hash: str, variant: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached pages for a document, or None."""
+        path = self._path(content_hash, variant)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                pages = json.load(f)
+            os.utime(path)  # Mark as recently used
+            self.hits += 1
+            return pages
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable extraction cache entry {path}: {str(e)}")
+            self.misses += 1
+            return None
+
+    def put(self, content_hash: str, variant: str, pages: List[Dict[str, Any]]):
+        """Store extracted pages for a document."""
+        path = self._path(content_hash, variant)
+        try:
+            start_time = time.time()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+                json.dump(pages, f, separators=(',', ':'))
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+            logger.info(f"⏱️ Cached {len(pages)} extracted pages ({size / 1024:.1f} KB) "
+                        f"in {time.time() - start_time:.2f} seconds")
+            with self._lock:
+                self.total_bytes += size - replaced
+                if self.total_bytes > self.max_bytes:
+                    self._evict(keep=path)
+        except Exception as e:
+            logger.error(f"Failed to write extraction cache entry: {str(e)}")
+
+    def _entries(self) -> List[Tuple[float, str, int]]:
+        """(last used, path, size) of every cache file."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _evict(self, keep: str):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        self.total_bytes = sum(size for _, _, size in entries)
+        evicted = 0
+        for _, path, size in entries:
+            if self.total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.total_bytes -= size
+            evicted += 1
+        logger.info(f"Evicted {evicted} extraction cache entries "
+                    f"({self.total_bytes / 1_048_576:.1f} MB in use)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
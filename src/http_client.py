@@ -0,0 +1,35 @@
+import importlib.util
+from typing import Optional
+import httpx
+from loguru import logger
+
+from .config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared pooled async HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        # HTTP/2 needs the optional h2 package (httpx[http2])
+        http2 = settings.http_http2 and importlib.util.find_spec("h2") is not None
+        _client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+            follow_redirects=True
+        )
+        logger.info(f"Initialized shared async HTTP client (http2={http2}, "
+                    f"max_connections={settings.http_max_connections})")
+    return _client
+
+async def close_async_client():
+    """Close the shared HTTP client and its pooled connections."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
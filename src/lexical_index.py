@@ -0,0 +1,56 @@
+import math
+import re
+from collections import Counter
+from typing import List, Dict, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens for lexical matching."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring.
+
+    Documents are appended incrementally and addressed by insertion position;
+    IDF is computed at query time so scores stay correct as the index grows.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}  # term -> [(doc position, term frequency)]
+        self.doc_lengths: List[int] = []
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, texts: List[str]):
+        """Index texts; their positions continue from the current size."""
+        for text in texts:
+            position = len(self.doc_lengths)
+            terms = tokenize(text)
+            for term, freq in Counter(terms).items():
+                self.postings.setdefault(term, []).append((position, freq))
+            self.doc_lengths.append(len(terms))
+            self.total_length += len(terms)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Return up to k (position, score) pairs for documents matching query terms, best first."""
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return []
+
+        avg_length = self.total_length / n_docs or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, freq in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / avg_length)
+                scores[position] = scores.get(position, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
@@ -1,10 +1,82 @@
+import asyncio
 import json
 import re
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
 from loguru import logger
 
 from .models import ParsedQuery, QueryIntent
 from .config import settings
+from .http_client import get_async_client
+from .response_cache import ResponseCache
+from .llm_routing import ProviderError, LatencyTracker, backoff_delay
+from .rate_limiter import RateLimiter, PRIORITY_HIGH, PRIORITY_NORMAL
+
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
+
+BATCH_SYSTEM_PROMPT = """You are an expert insurance policy document analyst. You will receive several numbered questions, each followed by its own relevant clauses.
+
+CRITICAL INSTRUCTIONS:
+- Answer each question using ONLY the clauses listed under that question
+- Extract EXACT numbers, time periods, percentages, and amounts from the document
+- For waiting periods: State the EXACT number (e.g., "30 days", "36 months", "2 years")
+- For percentages: Include the EXACT percentage (e.g., "5%", "10%")
+- For definitions: Include ALL technical criteria and requirements mentioned
+- For conditions: List ALL conditions, not just summaries
+
+Return ONLY a valid JSON array with one object per question, each with these exact fields:
+- id: The question number
+- answer: Complete answer as a SINGLE STRING with ALL specific details, numbers, percentages, and time periods
+- conditions: List of condition strings with exact details
+- confidence: Float between 0-1 indicating confidence
+
+IMPORTANT:
+- Return ONLY the JSON array. No additional text, explanations, or comments.
+- Include an object for EVERY question, in question order."""
+
+class JSONStringFieldStreamer:
+    """Incrementally extracts one string field's value from JSON text streamed in pieces."""
+    
+    ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+    
+    def __init__(self, field: str):
+        self.pattern = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self.buffer = ""
+        self.state = "search"  # search -> value -> done
+        self.pos = 0
+    
+    def feed(self, delta: str) -> str:
+        """Add streamed text and return the newly decoded part of the field value."""
+        self.buffer += delta
+        if self.state == "search":
+            match = self.pattern.search(self.buffer)
+            if not match:
+                return ""
+            self.state = "value"
+            self.pos = match.end()
+        
+        decoded = []
+        while self.state == "value" and self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+            if char == '"':
+                self.state = "done"
+            elif char != '\\':
+                decoded.append(char)
+                self.pos += 1
+            elif self.pos + 1 >= len(self.buffer):
+                break  # Wait for the escaped character
+            elif self.buffer[self.pos + 1] == 'u':
+                if self.pos + 6 > len(self.buffer):
+                    break  # Wait for all four hex digits
+                try:
+                    decoded.append(chr(int(self.buffer[self.pos + 2:self.pos + 6], 16)))
+                except ValueError:
+                    pass
+                self.pos += 6
+            else:
+                decoded.append(self.ESCAPES.get(self.buffer[self.pos + 1], self.buffer[self.pos + 1]))
+                self.pos += 2
+        return "".join(decoded)
 
 class LLMParser:
     """Handles query parsing and logic evaluation using Gemini, Groq or OpenAI LLM."""
@@ -14,13 +86,19 @@ class LLMParser:
         self.model = settings.llm_model
         self.temperature = settings.temperature
         self.max_tokens = settings.max_tokens
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}  # Provider -> in-flight call limiter
+        self._rate_limiters: Dict[str, RateLimiter] = {}  # Provider -> RPM/TPM scheduler
+        self._encoding = None  # tiktoken encoder, loaded on first use
+        self.response_cache = ResponseCache() if settings.response_cache_enabled else None
+        self.latency: Dict[str, LatencyTracker] = {}  # Provider -> recent latencies and call counts
+        self.hedged_calls = 0
+        self.hedge_wins = 0
         
         if self.provider == "gemini":
             try:
-                # Use direct REST API approach to avoid library conflicts
-                import requests
+                # Use direct REST API approach (shared async httpx client) to avoid library conflicts
                 self.client = "rest_api"  # Use REST API directly
-                self.gemini_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent"
+                self.gemini_url = f"{GEMINI_API_BASE}/{self.model}:generateContent"
                 logger.info(f"Initialized Gemini REST API client with model: {self.model}")
                 
             except Exception as e:
@@ -40,34 +118,35 @@ class LLMParser:
             self._init_groq()
         else:
             self._init_openai()
+        
+        self.failover_clients = self._init_failover_clients()
     
     def _init_groq(self):
         """Initialize Groq client."""
         try:
             # Try different import methods for Groq
             try:
-                from groq import Groq
-                import httpx
-                
-                # Create custom HTTP client to avoid proxy issues
-                custom_client = httpx.Client()
+                from groq import AsyncGroq
                 
-                # Initialize without proxy settings to avoid conflicts
-                self.client = Groq(
+                # Use the shared pooled async HTTP client (also avoids proxy issues)
+                self.client = AsyncGroq(
                     api_key=settings.groq_api_key,
-                    http_client=custom_client
+                    http_client=get_async_client(),
+                    max_retries=0  # Retries and failover are handled in _call_llm
                 )
                 logger.info(f"Initialized Groq client with model: {self.model}")
             except (ImportError, AttributeError, TypeError) as e:
                 # Handle different groq package versions and proxy issues
                 logger.warning(f"Standard Groq import failed: {e}, trying alternative")
                 import groq
-                if hasattr(groq, 'Client'):
-                    self.client = groq.Client(api_key=settings.groq_api_key)
-                elif hasattr(groq, 'Groq'):
-                    self.client = groq.Groq(api_key=settings.groq_api_key)
+                if hasattr(groq, 'AsyncClient'):
+                    self.client = groq.AsyncClient(api_key=settings.groq_api_key,
+                                                   http_client=get_async_client(), max_retries=0)
+                elif hasattr(groq, 'AsyncGroq'):
+                    self.client = groq.AsyncGroq(api_key=settings.groq_api_key,
+                                                 http_client=get_async_client(), max_retries=0)
                 else:
-                    raise ImportError("Cannot find Groq client class")
+                    raise ImportError("Cannot find async Groq client class")
                 logger.info(f"Initialized Groq client (alternative) with model: {self.model}")
         except Exception as e:
             logger.error(f"Failed to initialize Groq: {e}")
@@ -85,17 +164,59 @@ class LLMParser:
     def _init_openai(self):
         """Initialize OpenAI client."""
         try:
-            from openai import OpenAI
-            # Initialize OpenAI without proxy settings
-            self.client = OpenAI(
+            from openai import AsyncOpenAI
+            # Initialize OpenAI on the shared pooled async HTTP client
+            self.client = AsyncOpenAI(
                 api_key=settings.openai_api_key,
-                # Remove any proxy-related parameters
+                http_client=get_async_client(),
+                max_retries=0  # Retries and failover are handled in _call_llm
             )
             logger.info(f"Initialized OpenAI client with model: {self.model}")
         except Exception as openai_error:
             logger.error(f"OpenAI initialization failed: {openai_error}")
             self._init_fallback()
     
+    def _init_failover_clients(self) -> Dict[str, Tuple[Any, str]]:
+        """Create clients for the configured failover providers: provider -> (client, model)."""
+        clients = {}
+        for provider in [p.strip().lower() for p in settings.llm_failover_providers.split(",") if p.strip()]:
+            if provider == self.provider or provider in clients:
+                continue
+            try:
+                if provider == "gemini" and settings.gemini_api_key:
+                    client = "rest_api"
+                elif provider == "groq" and settings.groq_api_key:
+                    from groq import AsyncGroq
+                    client = AsyncGroq(api_key=settings.groq_api_key, http_client=get_async_client(), max_retries=0)
+                elif provider == "openai" and settings.openai_api_key:
+                    from openai import AsyncOpenAI
+                    client = AsyncOpenAI(api_key=settings.openai_api_key, http_client=get_async_client(), max_retries=0)
+                else:
+                    logger.warning(f"Skipping failover provider {provider}: unknown or missing API key")
+                    continue
+            except Exception as e:
+                logger.error(f"Failed to initialize failover provider {provider}: {e}")
+                continue
+            clients[provider] = (client, getattr(settings, f"{provider}_model"))
+            logger.info(f"Initialized failover provider {provider} with model: {clients[provider][1]}")
+        return clients
+    
+    def _get_semaphore(self, provider: str) -> asyncio.Semaphore:
+        """Get the concurrency limiter for a provider."""
+        if provider not in self._semaphores:
+            limit = getattr(settings, f"{provider}_max_concurrency", settings.batch_max_concurrency)
+            self._semaphores[provider] = asyncio.Semaphore(max(1, limit))
+        return self._semaphores[provider]
+    
+    def _get_rate_limiter(self, provider: str) -> RateLimiter:
+        """Get the RPM/TPM limiter for a provider."""
+        if provider not in self._rate_limiters:
+            self._rate_limiters[provider] = RateLimiter(
+                rpm=getattr(settings, f"{provider}_rpm", 0),
+                tpm=getattr(settings, f"{provider}_tpm", 0)
+            )
+        return self._rate_limiters[provider]
+    
     def _init_fallback(self):
         """Initialize fallback mode."""
         self.provider = "fallback"
@@ -271,7 +392,7 @@ IMPORTANT:
 - The "answer" field must be a STRING, never an object or nested structure
 - Be COMPLETE and ACCURATE. Include ALL relevant details from the document."""
 
-        clauses_text = "\n\n".join([f"Clause {i+1}: {clause}" for i, clause in enumerate(relevant_clauses[:3])])  # Use complete clause text and 3 clauses
+        clauses_text = "\n\n".join([f"Clause {i+1}: {clause}" for i, clause in enumerate(relevant_clauses)])  # Already packed to the context budget
         
         user_prompt = f"""Query: {query}
 
@@ -282,6 +403,8 @@ Analyze the query against these clauses and provide comprehensive analysis as JS
 
         try:
             response = await self._call_llm(system_prompt, user_prompt, timeout=15)  # Increased timeout for thorough analysis
+            if self.is_fallback_response(response):
+                raise RuntimeError("no LLM provider answered")
             
             # Clean and parse JSON response more aggressively
             response = response.strip()
@@ -339,6 +462,7 @@ Analyze the query against these clauses and provide comprehensive analysis as JS
                 "confidence_score": 0.5
             }
             
+            result["failed"] = "answer" not in result
             for key, default_value in defaults.items():
                 if key not in result:
                     result[key] = default_value
@@ -352,11 +476,16 @@ Analyze the query against these clauses and provide comprehensive analysis as JS
                 "target_subject": query[:50],
                 "answer": "Unable to process query",
                 "applicable_conditions": [],
-                "confidence_score": 0.0
+                "confidence_score": 0.0,
+                "failed": True
             }
     
-    async def generate_fast_response(self, query: str, combined_analysis: Dict[str, Any], best_clause: str) -> Dict[str, Any]:
-        """Generate comprehensive final response using combined analysis."""
+    async def generate_fast_response(self, query: str, combined_analysis: Dict[str, Any], best_clause: str,
+                                     on_answer_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Generate comprehensive final response using combined analysis.
+        
+        on_answer_token, if given, receives the answer text piece by piece while the LLM streams it.
+        """
         
         system_prompt = """Generate final comprehensive answer as a valid JSON object.
 
@@ -387,7 +516,20 @@ Best Supporting Clause: {best_clause[:500]}
 Generate comprehensive JSON response with ALL exact details:"""
 
         try:
-            response = await self._call_llm(system_prompt, user_prompt, timeout=12)  # Increased timeout for comprehensive response
+            on_token = None
+            if on_answer_token:
+                streamer = JSONStringFieldStreamer("answer")
+                
+                def on_token(delta: str):
+                    text = streamer.feed(delta)
+                    if text:
+                        on_answer_token(text)
+            
+            # Finishing an already started question goes ahead of new questions' first calls
+            response = await self._call_llm(system_prompt, user_prompt, timeout=12,  # Increased timeout for comprehensive response
+                                            on_token=on_token, priority=PRIORITY_HIGH)
+            # A degraded analysis or provider outage is still returned as text, but flagged
+            failed = bool(combined_analysis.get("failed")) or self.is_fallback_response(response)
             
             # Clean and parse JSON response more aggressively
             response = response.strip()
@@ -437,6 +579,7 @@ Generate comprehensive JSON response with ALL exact details:"""
                     raise json.JSONDecodeError("Could not extract valid JSON", response, 0)
             
             # Ensure required fields are present
+            result["failed"] = failed or "answer" not in result
             required_fields = ["answer", "conditions", "confidence"]
             for field in required_fields:
                 if field not in result:
@@ -456,120 +599,448 @@ Generate comprehensive JSON response with ALL exact details:"""
             return {
                 "answer": combined_analysis.get("answer", "Unable to process query"),
                 "conditions": combined_analysis.get("applicable_conditions", []),
-                "confidence": combined_analysis.get("confidence_score", 0.0)
+                "confidence": combined_analysis.get("confidence_score", 0.0),
+                "failed": True
             }
     
-    async def _call_llm(self, system_prompt: str, user_prompt: str, timeout: int = 10) -> str:
-        """Make API call to Groq or OpenAI with timeout and retry logic."""
-        import asyncio
-        import time
+    async def answer_questions_batch(self, questions: List[str],
+                                     clauses_per_question: List[List[str]]) -> List[Dict[str, Any]]:
+        """Answer several questions with one LLM call per group of questions.
         
-    async def _call_llm(self, system_prompt: str, user_prompt: str, timeout: int = 10) -> str:
-        """Make API call to Gemini, Groq or OpenAI with timeout and retry logic."""
-        import asyncio
-        import time
+        Questions are packed into groups that fit the prompt and output token budgets.
+        Any question whose answer is missing from the returned JSON array falls back
+        to the per-question parse_and_evaluate_combined + generate_fast_response path.
+        """
+        blocks = [
+            self._format_batch_question(i + 1, question, clauses)
+            for i, (question, clauses) in enumerate(zip(questions, clauses_per_question))
+        ]
+        groups = self._group_batch_questions(blocks)
+        logger.info(f"Answering {len(questions)} questions in {len(groups)} batched LLM call(s)")
         
-        async def make_api_call():
-            if self.provider == "gemini" and self.client == "rest_api":
-                try:
-                    import requests
-                    
-                    # Combine system and user prompts for Gemini
-                    full_prompt = f"{system_prompt}\n\nUser Query: {user_prompt}"
-                    
-                    # Prepare request data
-                    data = {
-                        "contents": [{
-                            "parts": [{
-                                "text": full_prompt
-                            }]
-                        }],
-                        "generationConfig": {
-                            "temperature": 0.1,
-                            "maxOutputTokens": min(800, self.max_tokens),
-                        }
-                    }
-                    
-                    # Make REST API call
-                    headers = {
-                        "Content-Type": "application/json",
-                    }
-                    
-                    response = requests.post(
-                        f"{self.gemini_url}?key={settings.gemini_api_key}",
-                        json=data,
-                        headers=headers,
-                        timeout=timeout
-                    )
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        if "candidates" in result and len(result["candidates"]) > 0:
-                            content = result["candidates"][0]["content"]["parts"][0]["text"]
-                            return content.strip()
-                        else:
-                            logger.error(f"No content in Gemini response: {result}")
-                            return self._fallback_response(user_prompt)
-                    else:
-                        logger.error(f"Gemini API error: {response.status_code} - {response.text}")
-                        return self._fallback_response(user_prompt)
-                        
-                except Exception as gemini_error:
-                    logger.error(f"Gemini REST API call failed: {gemini_error}")
-                    return self._fallback_response(user_prompt)
-                    
-            elif self.provider == "groq" and self.client:
-                # Groq API call with faster settings
-                try:
-                    messages = [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ]
-                    response = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=messages,
-                        temperature=0.1,  # Lower temperature for faster response
-                        max_tokens=min(800, self.max_tokens),  # Limit tokens for speed
-                        timeout=timeout
-                    )
-                    return response.choices[0].message.content.strip()
-                except Exception as groq_error:
-                    logger.error(f"Groq API call failed: {groq_error}")
-                    return self._fallback_response(user_prompt)
-            elif self.provider == "openai":
-                # OpenAI API call (new v1.0+ syntax)
-                messages = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=0.1,
-                    max_tokens=min(800, self.max_tokens),
-                    timeout=timeout
-                )
-                return response.choices[0].message.content.strip()
-            else:
-                # Fallback mode - basic response
-                return self._fallback_response(user_prompt)
+        group_results = await asyncio.gather(*(
+            self._answer_question_group(group, blocks) for group in groups
+        ))
+        
+        results: List[Dict[str, Any]] = [None] * len(questions)
+        for group_result in group_results:
+            for idx, result in group_result.items():
+                results[idx] = result
+        
+        # Per-question fallback for anything the batched calls did not answer
+        missing = [idx for idx, result in enumerate(results) if result is None]
+        if missing:
+            logger.warning(f"Batched answering missed {len(missing)} question(s), falling back per question")
+            fallbacks = await asyncio.gather(*(
+                self._answer_single_question(questions[idx], clauses_per_question[idx]) for idx in missing
+            ))
+            for idx, result in zip(missing, fallbacks):
+                results[idx] = result
+        
+        return results
+    
+    def _format_batch_question(self, question_id: int, question: str, clauses: List[str]) -> str:
+        """Format one question and its clauses for the batched prompt."""
+        clauses_text = "\n".join([f"Clause {i+1}: {clause}" for i, clause in enumerate(clauses)])
+        return f"Question {question_id}: {question}\nRelevant Clauses:\n{clauses_text}"
+    
+    def _group_batch_questions(self, blocks: List[str]) -> List[List[int]]:
+        """Split questions into groups that fit the prompt and output token budgets."""
+        prompt_budget = settings.llm_batch_max_prompt_tokens - self._count_tokens(BATCH_SYSTEM_PROMPT)
+        max_per_group = max(1, min(
+            settings.llm_batch_max_questions,
+            self.max_tokens // max(1, settings.llm_batch_answer_tokens)
+        ))
+        
+        groups: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for idx, block in enumerate(blocks):
+            block_tokens = self._count_tokens(block)
+            if current and (current_tokens + block_tokens > prompt_budget or len(current) >= max_per_group):
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(idx)
+            current_tokens += block_tokens
+        if current:
+            groups.append(current)
+        return groups
+    
+    async def _answer_question_group(self, group: List[int], blocks: List[str]) -> Dict[int, Dict[str, Any]]:
+        """Answer one group of questions in a single call; returns answers by question index."""
+        user_prompt = "\n\n".join(blocks[idx] for idx in group)
+        user_prompt += "\n\nAnswer every question above. Return the JSON array only."
         
         try:
-            # Add timeout to the entire operation
-            start_time = time.time()
-            result = await asyncio.wait_for(make_api_call(), timeout=timeout)
-            elapsed = time.time() - start_time
-            if elapsed > 5:  # Log slow calls
-                logger.warning(f"Slow LLM call took {elapsed:.2f}s")
-            return result
-            
-        except asyncio.TimeoutError:
-            logger.error(f"LLM API call timed out after {timeout}s")
+            response = await self._call_llm(
+                BATCH_SYSTEM_PROMPT,
+                user_prompt,
+                timeout=15 + 3 * len(group),
+                max_output_tokens=min(self.max_tokens, settings.llm_batch_answer_tokens * len(group))
+            )
+            if self.is_fallback_response(response):
+                # No provider answered; per-question retries would only fail again
+                fallback = json.loads(response)
+                return {idx: {"answer": fallback["answer"], "conditions": [], "confidence": 0.0, "failed": True}
+                        for idx in group}
+            items = self._parse_json_array(response)
+        except (json.JSONDecodeError, ValueError, TypeError) as e:
+            logger.error(f"Batched answer parsing failed for {len(group)} question(s): {str(e)}")
+            return {}
+        
+        answers = {}
+        for item in items:
+            if not isinstance(item, dict) or "answer" not in item:
+                continue
+            try:
+                question_id = int(item.get("id"))
+            except (TypeError, ValueError):
+                continue
+            idx = question_id - 1
+            if idx in group:
+                answers[idx] = {
+                    "answer": item["answer"],
+                    "conditions": item.get("conditions", []),
+                    "confidence": item.get("confidence", 0.5),
+                    "failed": False
+                }
+        return answers
+    
+    async def _answer_single_question(self, question: str, clauses: List[str]) -> Dict[str, Any]:
+        """Two-call answer path for a single question."""
+        combined_analysis = await self.parse_and_evaluate_combined(question, clauses)
+        best_clause = clauses[0] if clauses else ""
+        return await self.generate_fast_response(question, combined_analysis, best_clause)
+    
+    def _parse_json_array(self, response: str) -> List[Any]:
+        """Extract a JSON array from an LLM response."""
+        response = response.strip()
+        start_idx = response.find('[')
+        end_idx = response.rfind(']')
+        if start_idx == -1 or end_idx <= start_idx:
+            raise ValueError("No JSON array in response")
+        
+        result = json.loads(response[start_idx:end_idx+1])
+        if not isinstance(result, list):
+            raise ValueError("Response is not a JSON array")
+        return result
+    
+    def _count_tokens(self, text: str) -> int:
+        """Count tokens in text (cl100k_base, shared with PDFProcessor)."""
+        if self._encoding is None:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding("cl100k_base")
+        return len(self._encoding.encode(text))
+    
+    async def _call_llm(self, system_prompt: str, user_prompt: str, timeout: int = 10,
+                        max_output_tokens: Optional[int] = None,
+                        on_token: Optional[Callable[[str], None]] = None,
+                        priority: int = PRIORITY_NORMAL) -> str:
+        """Make API call to Gemini, Groq or OpenAI with timeout and retry logic.
+        
+        Transient failures are retried with backoff, then the next failover provider is tried;
+        the canned fallback response is returned only when every provider failed.
+        With on_token, the response is streamed and each text delta is passed to it as it arrives.
+        Calls wait for the provider's rate limits in priority order (lower first).
+        """
+        # Limit tokens for speed unless the caller needs a longer answer
+        output_tokens = max_output_tokens or min(800, self.max_tokens)
+        temperature = 0.1  # Low temperature for consistent (and cacheable) answers
+        
+        chain = self._provider_chain()
+        if not chain:
+            # Fallback mode - basic response
             return self._fallback_response(user_prompt)
+        
+        cache_key = None
+        if self.response_cache is not None:
+            # Keyed by the primary provider: the request's key, whichever provider answers it
+            cache_key = ResponseCache.make_key(self.provider, self.model, temperature, output_tokens,
+                                               system_prompt, user_prompt)
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("📦 LLM response cache hit")
+                if on_token:
+                    on_token(cached)
+                return cached
+        
+        streamed = False
+        
+        def forward_token(delta: str):
+            nonlocal streamed
+            streamed = True
+            on_token(delta)
+        
+        def make_request(provider: str, client: Any, model: str):
+            return lambda: self._request(provider, client, model, system_prompt, user_prompt, temperature,
+                                         output_tokens, timeout, forward_token if on_token else None)
+        
+        calls = [(provider, make_request(provider, client, model)) for provider, client, model in chain]
+        # Providers count the output limit against tokens-per-minute up front; skip the
+        # tokenization when no provider in the chain has a TPM limit
+        estimated_tokens = 0
+        if any(self._get_rate_limiter(provider).needs_tokens for provider, _, _ in chain):
+            estimated_tokens = self._count_tokens(system_prompt) + self._count_tokens(user_prompt) + output_tokens
+        try:
+            # A partially streamed answer cannot be retried without repeating tokens
+            provider, result = await self._route(calls, timeout, can_retry=lambda: not streamed,
+                                                 hedge=on_token is None, tokens=estimated_tokens,
+                                                 priority=priority)
+            if provider != self.provider:
+                logger.info(f"LLM call answered by failover provider {provider}")
+            if cache_key and result:
+                self.response_cache.put(cache_key, result)
+            return result
         except Exception as e:
-            logger.error(f"LLM API call failed: {str(e)}")
+            logger.error(f"LLM API call failed on all providers: {str(e)}")
             return self._fallback_response(user_prompt)
     
+    def _provider_chain(self) -> List[Tuple[str, Any, str]]:
+        """(provider, client, model) in the order calls try them: primary first, then failovers."""
+        chain = [(self.provider, self.client, self.model)] if self.client else []
+        for provider, (client, model) in self.failover_clients.items():
+            if provider != self.provider:
+                chain.append((provider, client, model))
+        return chain
+    
+    async def _route(self, calls: List[Tuple[str, Callable[[], Awaitable[str]]]], timeout: int,
+                     can_retry: Callable[[], bool], hedge: bool = True, tokens: int = 0,
+                     priority: int = PRIORITY_NORMAL) -> Tuple[str, str]:
+        """Try providers in order until one answers; returns (provider, response)."""
+        last_error = None
+        i = 0
+        while i < len(calls):
+            provider, request = calls[i]
+            hedge_delay = self._hedge_delay(provider) if hedge and i + 1 < len(calls) else None
+            try:
+                if hedge_delay is not None:
+                    return await self._hedged_call(calls[i], calls[i + 1], hedge_delay, timeout, can_retry,
+                                                   tokens, priority)
+                return provider, await self._call_provider(provider, request, timeout, can_retry, tokens, priority)
+            except ProviderError as e:
+                last_error = e
+                if not can_retry():
+                    raise
+                logger.warning(f"LLM provider failed, failing over: {e}")
+                i += 2 if hedge_delay is not None else 1
+        raise last_error
+    
+    async def _call_provider(self, provider: str, request: Callable[[], Awaitable[str]], timeout: int,
+                             can_retry: Callable[[], bool], tokens: int = 0,
+                             priority: int = PRIORITY_NORMAL,
+                             dispatched: Optional[asyncio.Event] = None) -> str:
+        """Call one provider, retrying transient failures with exponential backoff and jitter.
+        
+        dispatched is set once a request has passed the local rate limiter and semaphore.
+        """
+        tracker = self._get_latency_tracker(provider)
+        for attempt in range(settings.llm_max_retries + 1):
+            # Every attempt is a request against the provider's RPM/TPM limits
+            await self._get_rate_limiter(provider).acquire(tokens, priority)
+            tracker.calls += 1
+            try:
+                # Wait for a provider slot outside the timeout, then time only the call itself
+                async with self._get_semaphore(provider):
+                    if dispatched is not None:
+                        dispatched.set()
+                    start_time = time.time()
+                    result = await asyncio.wait_for(request(), timeout=timeout)
+                elapsed = time.time() - start_time
+                tracker.record(elapsed)
+                if elapsed > 5:  # Log slow calls
+                    logger.warning(f"Slow LLM call to {provider} took {elapsed:.2f}s")
+                return result
+            except Exception as e:
+                tracker.failures += 1
+                error = ProviderError.from_exception(provider, e)
+                if not error.retryable or attempt == settings.llm_max_retries or not can_retry():
+                    raise error from e
+                delay = backoff_delay(attempt, settings.llm_retry_base_delay, settings.llm_retry_max_delay)
+                tracker.retries += 1
+                logger.warning(f"LLM call failed ({error}), retry {attempt + 1}/{settings.llm_max_retries} "
+                               f"in {delay:.2f}s")
+                await asyncio.sleep(delay)
+    
+    async def _hedged_call(self, primary: Tuple[str, Callable[[], Awaitable[str]]],
+                           backup: Tuple[str, Callable[[], Awaitable[str]]], delay: float, timeout: int,
+                           can_retry: Callable[[], bool], tokens: int = 0,
+                           priority: int = PRIORITY_NORMAL) -> Tuple[str, str]:
+        """Call primary; if it has not answered within delay of being sent, race backup against it."""
+        dispatched = asyncio.Event()
+        tasks = {asyncio.create_task(
+            self._call_provider(primary[0], primary[1], timeout, can_retry, tokens, priority, dispatched)
+        ): primary[0]}
+        try:
+            # Time spent queued locally (rate limiter, semaphore) is not provider latency
+            waiter = asyncio.create_task(dispatched.wait())
+            try:
+                await asyncio.wait({*tasks, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+            
+            done, pending = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                first = done.pop()
+                if first.exception() is None:
+                    return primary[0], first.result()
+                logger.warning(f"LLM provider failed, failing over: {first.exception()}")
+                return backup[0], await self._call_provider(backup[0], backup[1], timeout, can_retry,
+                                                            tokens, priority)
+            
+            self.hedged_calls += 1
+            logger.info(f"⏱️ {primary[0]} slower than {delay:.2f}s, hedging with {backup[0]}")
+            tasks[asyncio.create_task(
+                self._call_provider(backup[0], backup[1], timeout, can_retry, tokens, priority)
+            )] = backup[0]
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if tasks[task] == backup[0]:
+                            self.hedge_wins += 1
+                        return tasks[task], task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Cancel the losing (or abandoned) request
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def _hedge_delay(self, provider: str) -> Optional[float]:
+        """Seconds after which to hedge a call to provider, or None when hedging is off or unwarmed."""
+        if not settings.llm_hedge_enabled:
+            return None
+        return self._get_latency_tracker(provider).percentile(settings.llm_hedge_percentile,
+                                                              settings.llm_hedge_min_samples)
+    
+    def _get_latency_tracker(self, provider: str) -> LatencyTracker:
+        if provider not in self.latency:
+            self.latency[provider] = LatencyTracker()
+        return self.latency[provider]
+    
+    def get_routing_stats(self) -> Dict[str, Any]:
+        """Get provider routing statistics."""
+        return {
+            "providers": [provider for provider, _, _ in self._provider_chain()],
+            "hedged_calls": self.hedged_calls,
+            "hedge_wins": self.hedge_wins,
+            "latency": {provider: tracker.get_stats() for provider, tracker in self.latency.items()},
+            "rate_limits": {provider: limiter.get_stats() for provider, limiter in self._rate_limiters.items()
+                            if limiter.enabled}
+        }
+    
+    async def _request(self, provider: str, client: Any, model: str, system_prompt: str, user_prompt: str,
+                       temperature: float, output_tokens: int, timeout: int,
+                       on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Send one request to a provider; raises on any error."""
+        if provider == "gemini":
+            # Combine system and user prompts for Gemini
+            full_prompt = f"{system_prompt}\n\nUser Query: {user_prompt}"
+            
+            # Prepare request data
+            data = {
+                "contents": [{
+                    "parts": [{
+                        "text": full_prompt
+                    }]
+                }],
+                "generationConfig": {
+                    "temperature": temperature,
+                    "maxOutputTokens": output_tokens,
+                }
+            }
+            headers = {
+                "Content-Type": "application/json",
+            }
+            gemini_url = f"{GEMINI_API_BASE}/{model}:generateContent"
+            
+            if on_token:
+                return await self._stream_gemini(gemini_url, data, headers, timeout, on_token)
+            
+            # Make REST API call
+            response = await get_async_client().post(
+                f"{gemini_url}?key={settings.gemini_api_key}",
+                json=data,
+                headers=headers,
+                timeout=timeout
+            )
+            if response.status_code != 200:
+                raise ProviderError(provider, f"Gemini API error: {response.text}", status_code=response.status_code)
+            
+            result = response.json()
+            if not result.get("candidates"):
+                raise ProviderError(provider, f"No content in Gemini response: {result}")
+            return result["candidates"][0]["content"]["parts"][0]["text"].strip()
+        
+        # Groq and OpenAI share the chat completions API
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        if on_token:
+            return await self._stream_chat_completion(client, model, messages, temperature, output_tokens,
+                                                      timeout, on_token)
+        
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=output_tokens,
+            timeout=timeout
+        )
+        return response.choices[0].message.content.strip()
+    
+    async def _stream_chat_completion(self, client: Any, model: str, messages: List[Dict[str, str]],
+                                      temperature: float, output_tokens: int, timeout: int,
+                                      on_token: Callable[[str], None]) -> str:
+        """Stream a Groq/OpenAI chat completion, passing each text delta to on_token."""
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=output_tokens,
+            timeout=timeout,
+            stream=True
+        )
+        parts = []
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                on_token(delta)
+        return "".join(parts).strip()
+    
+    async def _stream_gemini(self, gemini_url: str, data: Dict[str, Any], headers: Dict[str, str], timeout: int,
+                             on_token: Callable[[str], None]) -> str:
+        """Stream a Gemini response over server-sent events, passing each text delta to on_token."""
+        stream_url = gemini_url.replace(":generateContent", ":streamGenerateContent")
+        parts = []
+        async with get_async_client().stream(
+            "POST", f"{stream_url}?alt=sse&key={settings.gemini_api_key}",
+            json=data, headers=headers, timeout=timeout
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise ProviderError("gemini", f"Gemini API error: {body.decode(errors='replace')}",
+                                    status_code=response.status_code)
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:])
+                for candidate in event.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            parts.append(part["text"])
+                            on_token(part["text"])
+        return "".join(parts).strip()
+    
+    def is_fallback_response(self, response: str) -> bool:
+        """Whether a _call_llm result is the canned response returned when no provider answered."""
+        return response == self._fallback_response("")
+    
     def _fallback_response(self, user_prompt: str) -> str:
         """Generate a basic response when LLM is not available."""
         return json.dumps({
@@ -0,0 +1,72 @@
+import asyncio
+import random
+from collections import deque
+from typing import Optional, Dict, Any
+import httpx
+
+# HTTP statuses worth retrying: request timeout, rate limit and server errors
+RETRYABLE_STATUS_CODES = {408, 429}
+
+class ProviderError(Exception):
+    """A failed LLM provider call, classified as retryable or not."""
+
+    def __init__(self, provider: str, message: str, status_code: Optional[int] = None,
+                 retryable: Optional[bool] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status_code = status_code
+        if retryable is None:
+            retryable = status_code is not None and (status_code in RETRYABLE_STATUS_CODES or status_code >= 500)
+        self.retryable = retryable
+
+    @classmethod
+    def from_exception(cls, provider: str, error: Exception) -> "ProviderError":
+        """Wrap an SDK/HTTP exception, reading its status code where it has one."""
+        if isinstance(error, cls):
+            return error
+        status_code = getattr(error, "status_code", None)
+        if status_code is None:
+            status_code = getattr(getattr(error, "response", None), "status_code", None)
+        if status_code is not None:
+            return cls(provider, str(error), status_code=status_code)
+
+        # Timeouts and connection failures carry no status but are transient
+        transient = isinstance(error, (asyncio.TimeoutError, httpx.TransportError)) or any(
+            klass.__name__ in ("APIConnectionError", "APITimeoutError") for klass in type(error).__mro__
+        )
+        return cls(provider, str(error) or type(error).__name__, retryable=transient)
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Exponential backoff with full jitter for the given 0-based retry attempt."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+class LatencyTracker:
+    """Sliding window of a provider's recent successful call latencies."""
+
+    def __init__(self, window: int = 200):
+        self.samples: deque = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """Latency at the given percentile (0-100), or None with fewer than min_samples samples."""
+        if len(self.samples) < max(1, min_samples):
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def get_stats(self) -> Dict[str, Any]:
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None
+        }
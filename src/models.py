@@ -29,7 +29,15 @@ class DocumentChunk(BaseModel):
     page_number: int
     chunk_index: int
     document_id: str
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    
+    @property
+    def pages(self) -> List[int]:
+        """Pages spanned by the chunk."""
+        start = self.page_start or self.page_number
+        return list(range(start, (self.page_end or start) + 1))
 
 class SearchResult(BaseModel):
     chunk: DocumentChunk
@@ -1,34 +1,181 @@
 import io
-import requests
+import os
+import asyncio
+import bisect
+import functools
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import fitz  # PyMuPDF
 import pdfplumber
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Union
 import uuid
 import re
+from collections import Counter
 import tiktoken
 from loguru import logger
 
 from .models import DocumentChunk
 from .config import settings
+from .http_client import get_async_client
+from .document_cache import hash_document_bytes
+from .extraction_cache import ExtractionCache
+
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+
+# Line openings that start a clause: "4.", "4.2", "4.2.1", "Section 4", "Article IV", "Clause 7"
+CLAUSE_NUMBER_PATTERN = re.compile(
+    r'^((?:\d+\.(?:\d+\.?)*)|(?:(?:Section|Article|Clause|SECTION|ARTICLE|CLAUSE)\s+[\dIVXLC]+(?:\.\d+)*\.?))'
+    r'\s+(?=[A-Z"\'(])'
+)
+
+def get_extraction_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the shared page extraction process pool, or None when disabled."""
+    global _extraction_pool
+    workers = settings.pdf_extraction_workers or os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    if _extraction_pool is None:
+        # spawn: forking a process that already runs model and event loop threads is unsafe
+        _extraction_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        logger.info(f"Started PDF extraction pool with {workers} workers")
+    return _extraction_pool
+
+def shutdown_extraction_pool(pool: Optional[ProcessPoolExecutor] = None):
+    """Stop the extraction process pool (only if it is still the given pool, when one is passed)."""
+    global _extraction_pool
+    if _extraction_pool is not None and (pool is None or pool is _extraction_pool):
+        _extraction_pool.shutdown(wait=False, cancel_futures=True)
+        _extraction_pool = None
+
+def clean_text(text: str) -> str:
+    """Clean extracted text."""
+    # Remove excessive whitespace
+    text = re.sub(r'\s+', ' ', text)
+    # Remove special characters that might interfere
+    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\xff]', '', text)
+    # Fix common PDF extraction issues
+    text = text.replace('\u2019', "'").replace('\u2018', "'")
+    text = text.replace('\u201c', '"').replace('\u201d', '"')
+    text = text.replace('\u2013', '-').replace('\u2014', '-')
+    
+    return text.strip()
+
+# PDFs reach the extractors as bytes, or as a file path when sent to worker processes
+PDFSource = Union[bytes, str]
+
+def open_pymupdf(pdf: PDFSource):
+    return fitz.open(pdf) if isinstance(pdf, str) else fitz.open(stream=pdf, filetype="pdf")
+
+def open_pdfplumber(pdf: PDFSource):
+    return pdfplumber.open(pdf if isinstance(pdf, str) else io.BytesIO(pdf))
+
+def count_pages_pymupdf(pdf: PDFSource) -> int:
+    with open_pymupdf(pdf) as doc:
+        return len(doc)
+
+def count_pages_pdfplumber(pdf: PDFSource) -> int:
+    with open_pdfplumber(pdf) as document:
+        return len(document.pages)
+
+def extract_lines_pymupdf(page) -> List[Dict[str, Any]]:
+    """Text lines of a page in reading order, with font size and weight for structure detection."""
+    lines = []
+    for block in page.get_text("dict", sort=True)["blocks"]:
+        if block.get("type") != 0:  # Skip image blocks
+            continue
+        for line_index, line in enumerate(block["lines"]):
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            text = clean_text("".join(span["text"] for span in line["spans"]))
+            if not spans or not text:
+                continue
+            lines.append({
+                'text': text,
+                'size': round(max(span["size"] for span in spans), 1),
+                'bold': all(span["flags"] & 16 for span in spans),
+                'block_start': line_index == 0
+            })
+    return lines
+
+# Page-range extractors are module-level so they can run in worker processes.
+
+def extract_pages_pymupdf(pdf: PDFSource, start: int, end: Optional[int],
+                          with_lines: bool = False) -> List[Dict[str, Any]]:
+    """Extract and clean pages [start, end) with PyMuPDF."""
+    pages = []
+    with open_pymupdf(pdf) as doc:
+        for page_num in range(start, len(doc) if end is None else end):
+            page = doc[page_num]
+            text = clean_text(page.get_text())
+            
+            if text.strip():  # Only include pages with content
+                page_data = {
+                    'page_number': page_num + 1,
+                    'text': text,
+                    'char_count': len(text)
+                }
+                if with_lines:
+                    page_data['lines'] = extract_lines_pymupdf(page)
+                pages.append(page_data)
+    return pages
+
+def extract_pages_pdfplumber(pdf: PDFSource, start: int, end: Optional[int]) -> List[Dict[str, Any]]:
+    """Extract and clean pages [start, end) with pdfplumber."""
+    pages = []
+    with open_pdfplumber(pdf) as document:
+        for page in document.pages[start:end]:
+            text = clean_text(page.extract_text() or "")
+            
+            if text.strip():
+                pages.append({
+                    'page_number': page.page_number,
+                    'text': text,
+                    'char_count': len(text)
+                })
+    return pages
 
 class PDFProcessor:
     """Handles PDF download, parsing, and text chunking."""
     
     def __init__(self):
         self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.extraction_cache = ExtractionCache() if settings.extraction_cache_enabled else None
     
     async def download_pdf_from_blob(self, blob_url: str) -> bytes:
-        """Download PDF from blob URL."""
+        """Stream a PDF from a blob URL into memory, enforcing the size limit."""
+        max_bytes = settings.pdf_max_download_bytes
         try:
             logger.info(f"Downloading PDF from: {blob_url}")
-            response = requests.get(blob_url, stream=True, timeout=30)
-            response.raise_for_status()
+            start_time = time.time()
             
-            content_type = response.headers.get('content-type', '')
-            if 'pdf' not in content_type.lower():
-                logger.warning(f"Content type may not be PDF: {content_type}")
+            async with get_async_client().stream("GET", blob_url, timeout=settings.pdf_download_timeout) as response:
+                response.raise_for_status()
+                
+                content_type = response.headers.get('content-type', '')
+                if 'pdf' not in content_type.lower():
+                    logger.warning(f"Content type may not be PDF: {content_type}")
+                
+                content_length = int(response.headers.get('content-length') or 0)
+                if content_length > max_bytes:
+                    raise ValueError(f"PDF is {content_length} bytes, over the {max_bytes} byte limit")
+                
+                # Hashing, caching and extraction all need the bytes in memory, so the
+                # limit is enforced while streaming rather than after the full read
+                parts = []
+                size = 0
+                async for data in response.aiter_bytes(chunk_size=64 * 1024):
+                    size += len(data)
+                    if size > max_bytes:
+                        raise ValueError(f"PDF exceeds the {max_bytes} byte limit")
+                    parts.append(data)
+                pdf_bytes = b"".join(parts)
             
-            return response.content
+            elapsed = max(time.time() - start_time, 1e-6)
+            logger.info(f"⏱️ Downloaded {size / 1_048_576:.2f} MB in {elapsed:.2f} seconds "
+                        f"({size / 1_048_576 / elapsed:.2f} MB/s)")
+            return pdf_bytes
         except Exception as e:
             logger.error(f"Failed to download PDF: {str(e)}")
             raise Exception(f"Failed to download PDF: {str(e)}")
@@ -36,24 +183,7 @@ class PDFProcessor:
     def extract_text_pymupdf(self, pdf_bytes: bytes) -> List[Dict[str, Any]]:
         """Extract text using PyMuPDF with page-level granularity."""
         try:
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            pages = []
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text = page.get_text()
-                
-                # Clean up text
-                text = self._clean_text(text)
-                
-                if text.strip():  # Only include pages with content
-                    pages.append({
-                        'page_number': page_num + 1,
-                        'text': text,
-                        'char_count': len(text)
-                    })
-            
-            doc.close()
+            pages = extract_pages_pymupdf(pdf_bytes, 0, None)
             logger.info(f"Extracted text from {len(pages)} pages using PyMuPDF")
             return pages
             
@@ -64,39 +194,89 @@ class PDFProcessor:
     def extract_text_pdfplumber(self, pdf_bytes: bytes) -> List[Dict[str, Any]]:
         """Extract text using pdfplumber as fallback."""
         try:
-            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-                pages = []
-                
-                for page_num, page in enumerate(pdf.pages):
-                    text = page.extract_text() or ""
-                    text = self._clean_text(text)
-                    
-                    if text.strip():
-                        pages.append({
-                            'page_number': page_num + 1,
-                            'text': text,
-                            'char_count': len(text)
-                        })
-                
-                logger.info(f"Extracted text from {len(pages)} pages using pdfplumber")
-                return pages
+            pages = extract_pages_pdfplumber(pdf_bytes, 0, None)
+            logger.info(f"Extracted text from {len(pages)} pages using pdfplumber")
+            return pages
                 
         except Exception as e:
             logger.error(f"pdfplumber extraction failed: {str(e)}")
             raise
     
+    async def extract_pages(self, pdf_bytes: bytes) -> List[Dict[str, Any]]:
+        """Extract pages, reusing the cached result when these PDF bytes were parsed before."""
+        with_lines = settings.chunking_strategy == "structure"
+        if self.extraction_cache is None:
+            return await self._extract_pages_uncached(pdf_bytes, with_lines)
+        
+        variant = "lines" if with_lines else "text"
+        content_hash = await asyncio.to_thread(hash_document_bytes, pdf_bytes)
+        pages = await asyncio.to_thread(self.extraction_cache.get, content_hash, variant)
+        if pages is not None:
+            logger.info(f"📦 Extraction cache hit - reusing {len(pages)} parsed pages")
+            return pages
+        
+        pages = await self._extract_pages_uncached(pdf_bytes, with_lines)
+        await asyncio.to_thread(self.extraction_cache.put, content_hash, variant, pages)
+        return pages
+    
+    async def _extract_pages_uncached(self, pdf_bytes: bytes, with_lines: bool) -> List[Dict[str, Any]]:
+        """Extract pages, sharding page ranges across the extraction process pool."""
+        # Try PyMuPDF first, fallback to pdfplumber
+        extract_range = extract_pages_pymupdf
+        if with_lines:
+            extract_range = functools.partial(extract_pages_pymupdf, with_lines=True)
+        try:
+            return await self._extract_sharded(pdf_bytes, count_pages_pymupdf, extract_range, "PyMuPDF")
+        except Exception as e:
+            logger.warning(f"PyMuPDF failed, trying pdfplumber: {str(e)}")
+            return await self._extract_sharded(pdf_bytes, count_pages_pdfplumber, extract_pages_pdfplumber, "pdfplumber")
+    
+    async def _extract_sharded(self, pdf_bytes: bytes, count_pages, extract_range, extractor: str) -> List[Dict[str, Any]]:
+        """Run extract_range over page shards in worker processes and merge pages in order."""
+        try:
+            page_count = await asyncio.to_thread(count_pages, pdf_bytes)
+            shard_size = max(1, settings.pdf_pages_per_shard)
+            shards = [(start, min(start + shard_size, page_count)) for start in range(0, page_count, shard_size)]
+            pool = get_extraction_pool()
+            
+            if pool is None or len(shards) <= 1:
+                pages = await asyncio.to_thread(extract_range, pdf_bytes, 0, None)
+            else:
+                # Workers read the PDF from one temp file instead of each receiving a pickled copy
+                pdf_path = await asyncio.to_thread(self._write_temp_pdf, pdf_bytes)
+                try:
+                    loop = asyncio.get_running_loop()
+                    results = await asyncio.gather(*(
+                        loop.run_in_executor(pool, extract_range, pdf_path, start, end)
+                        for start, end in shards
+                    ))
+                    pages = [page for shard_pages in results for page in shard_pages]
+                except BrokenProcessPool:
+                    # A worker died (OOM, MuPDF crash): replace the pool on the next call
+                    # and extract this document in-process
+                    logger.warning(f"PDF extraction pool broke, retrying {extractor} in-process")
+                    shutdown_extraction_pool(pool)
+                    pages = await asyncio.to_thread(extract_range, pdf_bytes, 0, None)
+                finally:
+                    os.remove(pdf_path)
+            
+            logger.info(f"Extracted text from {len(pages)} pages using {extractor} ({len(shards)} shard(s))")
+            return pages
+            
+        except Exception as e:
+            logger.error(f"{extractor} extraction failed: {str(e)}")
+            raise
+    
+    def _write_temp_pdf(self, pdf_bytes: bytes) -> str:
+        """Write PDF bytes to a temp file in the uploads directory and return its path."""
+        fd, path = tempfile.mkstemp(suffix=".pdf", dir=settings.uploads_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf_bytes)
+        return path
+    
     def _clean_text(self, text: str) -> str:
         """Clean extracted text."""
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        # Remove special characters that might interfere
-        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\xff]', '', text)
-        # Fix common PDF extraction issues
-        text = text.replace('\u2019', "'").replace('\u2018', "'")
-        text = text.replace('\u201c', '"').replace('\u201d', '"')
-        text = text.replace('\u2013', '-').replace('\u2014', '-')
-        
-        return text.strip()
+        return clean_text(text)
     
     def count_tokens(self, text: str) -> int:
         """Count tokens in text."""
@@ -104,6 +284,11 @@ class PDFProcessor:
     
     def chunk_text(self, pages: List[Dict[str, Any]], document_id: str) -> List[DocumentChunk]:
         """Chunk text into overlapping segments."""
+        if settings.chunking_strategy == "structure":
+            return self._chunk_text_by_structure(pages, document_id)
+        if settings.chunk_across_pages:
+            return self._chunk_text_across_pages(pages, document_id)
+        
         chunks = []
         chunk_counter = 0
         
@@ -111,43 +296,18 @@ class PDFProcessor:
             page_number = page_data['page_number']
             text = page_data['text']
             
-            # Split text into sentences for better chunking
-            sentences = self._split_into_sentences(text)
-            
-            current_chunk = ""
-            current_tokens = 0
-            
-            for sentence in sentences:
-                sentence_tokens = self.count_tokens(sentence)
+            for char_start, char_end, token_count in self._chunk_spans(text):
+                content = text[char_start:char_end].strip()
+                if not content:
+                    continue
                 
-                # If adding this sentence would exceed chunk size, save current chunk
-                if current_tokens + sentence_tokens > settings.chunk_size and current_chunk:
-                    chunk = self._create_chunk(
-                        content=current_chunk.strip(),
-                        chunk_id=f"{document_id}_chunk_{chunk_counter}",
-                        page_number=page_number,
-                        chunk_index=chunk_counter,
-                        document_id=document_id
-                    )
-                    chunks.append(chunk)
-                    chunk_counter += 1
-                    
-                    # Start new chunk with overlap
-                    overlap_text = self._get_overlap_text(current_chunk, settings.chunk_overlap)
-                    current_chunk = overlap_text + " " + sentence
-                    current_tokens = self.count_tokens(current_chunk)
-                else:
-                    current_chunk += " " + sentence if current_chunk else sentence
-                    current_tokens += sentence_tokens
-            
-            # Add remaining text as final chunk for this page
-            if current_chunk.strip():
                 chunk = self._create_chunk(
-                    content=current_chunk.strip(),
+                    content=content,
                     chunk_id=f"{document_id}_chunk_{chunk_counter}",
                     page_number=page_number,
                     chunk_index=chunk_counter,
-                    document_id=document_id
+                    document_id=document_id,
+                    token_count=token_count
                 )
                 chunks.append(chunk)
                 chunk_counter += 1
@@ -155,32 +315,186 @@ class PDFProcessor:
         logger.info(f"Created {len(chunks)} chunks for document {document_id}")
         return chunks
     
+    def _chunk_text_across_pages(self, pages: List[Dict[str, Any]], document_id: str) -> List[DocumentChunk]:
+        """Chunk the whole document as one text so clauses can straddle page breaks."""
+        text_parts = []
+        page_offsets = []  # Character offset where each page starts in the joined text
+        page_numbers = []
+        offset = 0
+        for page_data in pages:
+            page_offsets.append(offset)
+            page_numbers.append(page_data['page_number'])
+            text_parts.append(page_data['text'])
+            offset += len(page_data['text']) + 2
+        text = "\n\n".join(text_parts)
+        
+        def page_at(char_idx: int) -> int:
+            return page_numbers[bisect.bisect_right(page_offsets, char_idx) - 1]
+        
+        chunks = []
+        for char_start, char_end, token_count in self._chunk_spans(text):
+            raw = text[char_start:char_end]
+            content = raw.strip()
+            if not content:
+                continue
+            
+            content_start = char_start + len(raw) - len(raw.lstrip())
+            chunk_index = len(chunks)
+            chunks.append(self._create_chunk(
+                content=content,
+                chunk_id=f"{document_id}_chunk_{chunk_index}",
+                page_number=page_at(content_start),
+                chunk_index=chunk_index,
+                document_id=document_id,
+                token_count=token_count,
+                page_end=page_at(content_start + len(content) - 1)
+            ))
+        
+        logger.info(f"Created {len(chunks)} cross-page chunks for document {document_id}")
+        return chunks
+    
+    def _chunk_text_by_structure(self, pages: List[Dict[str, Any]], document_id: str) -> List[DocumentChunk]:
+        """Chunk along numbered clauses and headings detected from font data.
+        
+        Each clause (with the heading lines that open it) becomes one chunk labelled
+        with its section; clauses longer than chunk_size are split by sentences.
+        Pages extracted without line data (pdfplumber fallback) are treated as body text.
+        """
+        lines = []
+        for page_data in pages:
+            page_lines = page_data.get('lines') or [{'text': page_data['text'], 'size': 0.0,
+                                                      'bold': False, 'block_start': True}]
+            lines.extend(dict(line, page_number=page_data['page_number']) for line in page_lines)
+        
+        # Body font size is the size carrying the most text
+        size_chars = Counter()
+        for line in lines:
+            size_chars[line['size']] += len(line['text'])
+        body_size = size_chars.most_common(1)[0][0] if size_chars else 0.0
+        
+        sections = []
+        current = None
+        heading = None
+        for line in lines:
+            text = line['text']
+            is_heading = line['block_start'] and len(text) <= 120 and (
+                line['size'] >= body_size + 1.0 or (line['bold'] and not text.endswith('.'))
+            )
+            clause_match = CLAUSE_NUMBER_PATTERN.match(text)
+            
+            if is_heading or clause_match:
+                label = text if is_heading else clause_match.group(1).rstrip('.')
+                if is_heading and not clause_match:
+                    heading = text
+                elif heading and not label.startswith(heading):
+                    label = f"{heading} > {label}"
+                
+                # Headings directly followed by a clause stay with that clause
+                if current is None or not current['heading_only']:
+                    current = {'lines': [], 'page_start': line['page_number']}
+                    sections.append(current)
+                current['section'] = label
+                current['heading_only'] = is_heading
+            elif current is None:
+                current = {'section': None, 'lines': [], 'heading_only': False,
+                           'page_start': line['page_number']}
+                sections.append(current)
+            else:
+                current['heading_only'] = False
+            
+            current['lines'].append(text)
+            current['page_end'] = line['page_number']
+        
+        chunks = []
+        for section in sections:
+            text = " ".join(section['lines'])
+            for char_start, char_end, token_count in self._chunk_spans(text):
+                content = text[char_start:char_end].strip()
+                if not content:
+                    continue
+                
+                chunk_index = len(chunks)
+                chunk = self._create_chunk(
+                    content=content,
+                    chunk_id=f"{document_id}_chunk_{chunk_index}",
+                    page_number=section['page_start'],
+                    chunk_index=chunk_index,
+                    document_id=document_id,
+                    token_count=token_count,
+                    page_end=section['page_end']
+                )
+                if section['section']:
+                    chunk.metadata['section'] = section['section']
+                chunks.append(chunk)
+        
+        logger.info(f"Created {len(chunks)} clause-aligned chunks from {len(sections)} sections "
+                    f"for document {document_id}")
+        return chunks
+    
+    def _chunk_spans(self, text: str) -> List[Tuple[int, int, int]]:
+        """Split text into overlapping chunks of whole sentences.
+        
+        The text is tokenized once; sentences are packed into chunks of up to
+        chunk_size tokens by sliding over token offsets, and each new chunk starts
+        chunk_overlap tokens before the end of the previous one. Returns
+        (char_start, char_end, token_count) spans into text.
+        """
+        tokens = self.encoding.encode(text)
+        if not tokens:
+            return []
+        
+        # Character offset where each token starts, to map token spans back to text
+        _, token_offsets = self.encoding.decode_with_offsets(tokens)
+        
+        def char_at(token_idx: int) -> int:
+            return token_offsets[token_idx] if token_idx < len(tokens) else len(text)
+        
+        # Sentence start positions in token space (the token containing each sentence's first char)
+        sentence_starts = [0]
+        for match in re.finditer(r'[.!?]+\s+', text):
+            token_idx = bisect.bisect_right(token_offsets, match.end()) - 1
+            if token_idx > sentence_starts[-1]:
+                sentence_starts.append(token_idx)
+        sentence_ends = sentence_starts[1:] + [len(tokens)]
+        
+        spans = []
+        chunk_start = 0
+        chunk_end = 0
+        for sentence_end in sentence_ends:
+            # If adding this sentence would exceed chunk size, save current chunk
+            if sentence_end - chunk_start > settings.chunk_size and chunk_end > chunk_start:
+                spans.append((char_at(chunk_start), char_at(chunk_end), chunk_end - chunk_start))
+                
+                # Start new chunk with overlap
+                chunk_start = max(chunk_start, chunk_end - settings.chunk_overlap)
+            chunk_end = sentence_end
+        
+        # Add remaining text as final chunk
+        if chunk_end > chunk_start:
+            spans.append((char_at(chunk_start), char_at(chunk_end), chunk_end - chunk_start))
+        
+        return spans
+    
     def _split_into_sentences(self, text: str) -> List[str]:
         """Split text into sentences."""
         # Simple sentence splitting - can be enhanced with NLTK
         sentences = re.split(r'[.!?]+\s+', text)
         return [s.strip() for s in sentences if s.strip()]
     
-    def _get_overlap_text(self, text: str, overlap_tokens: int) -> str:
-        """Get overlap text from the end of current chunk."""
-        tokens = self.encoding.encode(text)
-        if len(tokens) <= overlap_tokens:
-            return text
-        
-        overlap_token_ids = tokens[-overlap_tokens:]
-        return self.encoding.decode(overlap_token_ids)
-    
     def _create_chunk(self, content: str, chunk_id: str, page_number: int, 
-                     chunk_index: int, document_id: str) -> DocumentChunk:
+                     chunk_index: int, document_id: str, token_count: Optional[int] = None,
+                     page_end: Optional[int] = None) -> DocumentChunk:
         """Create a DocumentChunk object."""
         return DocumentChunk(
             chunk_id=chunk_id,
             content=content,
             page_number=page_number,
+            page_start=page_number,
+            page_end=page_end or page_number,
             chunk_index=chunk_index,
             document_id=document_id,
             metadata={
-                'token_count': self.count_tokens(content),
+                'token_count': token_count if token_count is not None else self.count_tokens(content),
                 'char_count': len(content)
             }
         )
@@ -190,27 +504,37 @@ class PDFProcessor:
         if not document_id:
             document_id = str(uuid.uuid4())
         
+        # Download PDF
+        pdf_bytes = await self.download_pdf_from_blob(blob_url)
+        return await self.process_pdf_bytes(pdf_bytes, document_id)
+    
+    async def process_pdf_bytes(self, pdf_bytes: bytes, document_id: str) -> List[DocumentChunk]:
+        """Process already-downloaded PDF bytes to chunks."""
         try:
-            # Download PDF
-            pdf_bytes = await self.download_pdf_from_blob(blob_url)
-            
-            # Try PyMuPDF first, fallback to pdfplumber
-            try:
-                pages = self.extract_text_pymupdf(pdf_bytes)
-            except Exception as e:
-                logger.warning(f"PyMuPDF failed, trying pdfplumber: {str(e)}")
-                pages = self.extract_text_pdfplumber(pdf_bytes)
-            
-            # Chunk the text
-            chunks = self.chunk_text(pages, document_id)
-            
-            # Limit chunks if necessary
-            if len(chunks) > settings.max_chunks_per_doc:
-                logger.warning(f"Document has {len(chunks)} chunks, limiting to {settings.max_chunks_per_doc}")
-                chunks = chunks[:settings.max_chunks_per_doc]
-            
-            return chunks
+            # Extract across worker processes, then chunk in a thread so the event loop keeps serving requests
+            pages = await self.extract_pages(pdf_bytes)
+            return await self.process_pages(pages, document_id)
             
         except Exception as e:
             logger.error(f"Failed to process PDF: {str(e)}")
             raise
+    
+    async def process_pages(self, pages: List[Dict[str, Any]], document_id: str) -> List[DocumentChunk]:
+        """Chunk extracted pages, applying the per-document chunk limit."""
+        chunks = await asyncio.to_thread(self.chunk_text, pages, document_id)
+        
+        # Limit chunks if necessary
+        if len(chunks) > settings.max_chunks_per_doc:
+            logger.warning(f"Document has {len(chunks)} chunks, limiting to {settings.max_chunks_per_doc}")
+            chunks = chunks[:settings.max_chunks_per_doc]
+        
+        return chunks
+    
+    def chunk_pages_separately(self, pages: List[Dict[str, Any]], document_id: str) -> List[DocumentChunk]:
+        """Chunk each page on its own with page-scoped chunk IDs, for incremental ingestion."""
+        chunks = []
+        for page_data in pages:
+            for chunk in self.chunk_text([page_data], document_id):
+                chunk.chunk_id = f"{document_id}_p{page_data['page_number']}_chunk_{chunk.chunk_index}"
+                chunks.append(chunk)
+        return chunks
@@ -1,5 +1,7 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, AsyncIterator, Tuple, Set
 from loguru import logger
+import asyncio
+import contextlib
 import uuid
 import time
 
@@ -10,6 +12,11 @@ from .models import (
 from .pdf_processor import PDFProcessor
 from .llm_parser import LLMParser
 from .vector_search import VectorSearchEngine
+from .document_cache import DocumentCache, normalize_document_url, hash_document_bytes
+from .lexical_index import BM25Index
+from .reranker import Reranker
+from .context_builder import ContextBuilder
+from .semantic_cache import SemanticCache
 from .config import settings
 
 class QueryRetrievalSystem:
@@ -20,8 +27,15 @@ class QueryRetrievalSystem:
         self.llm_parser = LLMParser()
         self.vector_search = VectorSearchEngine()
         self.document_store = {}  # In-memory store for processed documents
+        self.document_cache = DocumentCache()
+        self.reranker = Reranker() if settings.reranker_enabled else None
+        self.context_builder = ContextBuilder(self.pdf_processor.encoding)
+        self.semantic_cache = SemanticCache() if settings.semantic_cache_enabled else None
+        self._ingest_locks: Dict[str, List[Any]] = {}  # Normalized URL -> [ingestion lock, holders + waiters]
+        self.lazy_documents: Dict[str, Dict[str, Any]] = {}  # Document ID -> lazy ingestion state
     
-    async def process_document(self, blob_url: str, document_id: Optional[str] = None) -> str:
+    async def process_document(self, blob_url: str, document_id: Optional[str] = None,
+                               pdf_bytes: Optional[bytes] = None) -> str:
         """Process a PDF document and add it to the vector store."""
         try:
             doc_start_time = time.time()
@@ -33,7 +47,22 @@ class QueryRetrievalSystem:
             
             # Step 1: Process PDF to chunks
             pdf_start_time = time.time()
-            chunks = await self.pdf_processor.process_pdf(blob_url, document_id)
+            if settings.lazy_ingestion_min_pages > 0:
+                if pdf_bytes is None:
+                    pdf_bytes = await self.pdf_processor.download_pdf_from_blob(blob_url)
+                pages = await self.pdf_processor.extract_pages(pdf_bytes)
+                
+                if len(pages) >= settings.lazy_ingestion_min_pages:
+                    self._start_lazy_document(document_id, blob_url, pages)
+                    logger.info(f"⏱️ Lazy ingestion setup (download + extract + page index) took: "
+                                f"{time.time() - doc_start_time:.2f} seconds")
+                    return document_id
+                
+                chunks = await self.pdf_processor.process_pages(pages, document_id)
+            elif pdf_bytes is not None:
+                chunks = await self.pdf_processor.process_pdf_bytes(pdf_bytes, document_id)
+            else:
+                chunks = await self.pdf_processor.process_pdf(blob_url, document_id)
             pdf_end_time = time.time()
             logger.info(f"⏱️ PDF processing (download + extract + chunk) took: {pdf_end_time - pdf_start_time:.2f} seconds")
             
@@ -72,6 +101,7 @@ class QueryRetrievalSystem:
             logger.info(f"Processing query: {request.query}")
             
             # If document URL provided, process it first
+            document_id = request.document_id
             if request.document_url:
                 document_id = await self.process_document(
                     request.document_url, 
@@ -86,9 +116,13 @@ class QueryRetrievalSystem:
             logger.info(f"Parsed query - Intent: {parsed_query.intent}, Subject: {parsed_query.target_subject}")
             
             # Step 2: Perform semantic search
+            if document_id in self.lazy_documents:
+                await self._ensure_candidate_pages(document_id, [request.query])
             search_results = await self.vector_search.search_similar_chunks(
                 query=request.query,
-                k=10  # Get more results for better clause matching
+                k=10,  # Get more results for better clause matching
+                document_id=document_id,
+                keywords=parsed_query.keywords
             )
             
             if not search_results:
@@ -96,6 +130,9 @@ class QueryRetrievalSystem:
             
             logger.info(f"Found {len(search_results)} relevant chunks")
             
+            if self.reranker:
+                search_results = await self.reranker.rerank(request.query, search_results)
+            
             # Step 3: Find the best matching clause
             best_clause_match = await self._find_best_clause(
                 parsed_query, 
@@ -103,7 +140,7 @@ class QueryRetrievalSystem:
             )
             
             # Step 4: Evaluate logic using LLM
-            relevant_clauses = [result.chunk.content for result in search_results[:5]]
+            relevant_clauses = self.context_builder.build(search_results)
             logic_evaluation = await self.llm_parser.evaluate_logic(
                 query=request.query,
                 relevant_clauses=relevant_clauses,
@@ -111,7 +148,7 @@ class QueryRetrievalSystem:
             )
             
             # Step 5: Generate final response
-            page_refs = list(set([result.chunk.page_number for result in search_results[:5]]))
+            page_refs = sorted({page for result in search_results[:5] for page in result.chunk.pages})
             final_response = await self.llm_parser.generate_final_response(
                 query=request.query,
                 best_clause=best_clause_match.clause_text,
@@ -130,7 +167,7 @@ class QueryRetrievalSystem:
                 additional_info={
                     "parsed_query": parsed_query.dict(),
                     "search_results_count": len(search_results),
-                    "document_id": request.document_id,
+                    "document_id": document_id,
                     "logic_evaluation": logic_evaluation
                 }
             )
@@ -154,8 +191,7 @@ class QueryRetrievalSystem:
                 page_reference=0
             )
         
-        # For now, use the top search result as the best clause
-        # This could be enhanced with more sophisticated reranking
+        # Use the top search result as the best clause (already reranked when the reranker is enabled)
         best_result = search_results[0]
         
         return ClauseMatch(
@@ -163,7 +199,7 @@ class QueryRetrievalSystem:
             clause_id=best_result.chunk.chunk_id,
             relevance_score=best_result.score,
             page_reference=best_result.chunk.page_number,
-            section=f"Chunk {best_result.chunk.chunk_index}"
+            section=best_result.chunk.metadata.get('section') or f"Chunk {best_result.chunk.chunk_index}"
         )
     
     async def _find_best_clause_simple(self, search_results: List[SearchResult]) -> ClauseMatch:
@@ -184,7 +220,7 @@ class QueryRetrievalSystem:
             clause_id=best_result.chunk.chunk_id,
             relevance_score=best_result.score,
             page_reference=best_result.chunk.page_number,
-            section=f"Chunk {best_result.chunk.chunk_index}"
+            section=best_result.chunk.metadata.get('section') or f"Chunk {best_result.chunk.chunk_index}"
         )
     
     def _create_no_results_response(self, query: str) -> QueryResponse:
@@ -234,7 +270,15 @@ class QueryRetrievalSystem:
                 "total_documents": len(self.document_store),
                 "total_chunks": vector_stats.get("total_chunks", 0),
                 "vector_store_type": "faiss" if not settings.use_pinecone else "pinecone",
-                "embedding_model": settings.embedding_model
+                "embedding_model": settings.embedding_model,
+                "document_cache": self.document_cache.get_stats(),
+                "extraction_cache": (self.pdf_processor.extraction_cache.get_stats()
+                                     if self.pdf_processor.extraction_cache else None),
+                "reranker": self.reranker.get_stats() if self.reranker else None,
+                "response_cache": (self.llm_parser.response_cache.get_stats()
+                                   if self.llm_parser.response_cache else None),
+                "llm_routing": self.llm_parser.get_routing_stats(),
+                "semantic_cache": self.semantic_cache.get_stats() if self.semantic_cache else None
             }
         except Exception as e:
             return {
@@ -244,15 +288,18 @@ class QueryRetrievalSystem:
                 "llm_status": "unknown"
             }
     
-    async def search_documents(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+    async def search_documents(self, query: str, k: int = 5,
+                               document_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search documents without full query processing."""
         try:
-            search_results = await self.vector_search.search_similar_chunks(query, k)
+            search_results = await self.vector_search.search_similar_chunks(query, k, document_id=document_id)
             
             return [
                 {
                     "content": result.chunk.content,
                     "page_number": result.chunk.page_number,
+                    "pages": result.chunk.pages,
+                    "section": result.chunk.metadata.get('section'),
                     "document_id": result.chunk.document_id,
                     "similarity_score": result.score,
                     "chunk_id": result.chunk.chunk_id
@@ -270,101 +317,308 @@ class QueryRetrievalSystem:
             if not doc_info:
                 return False
             
-            # Remove old document data (implementation depends on vector store)
-            # For now, we'll just reprocess and add
-            await self.process_document(doc_info['url'], document_id)
+            # Remove old document data so the partition is rebuilt rather than duplicated
+            lazy_state = self.lazy_documents.pop(document_id, None)
+            if lazy_state and lazy_state['task']:
+                lazy_state['task'].cancel()
+            self.vector_search.remove_document(document_id)
+            if self.semantic_cache is not None:
+                self.semantic_cache.remove_document(document_id)
+            # The old entry (and its completeness flag) no longer describes the partition
+            self.document_cache.remove_document(document_id)
+            
+            if settings.document_cache_enabled:
+                pdf_bytes = await self.pdf_processor.download_pdf_from_blob(doc_info['url'])
+                await self.process_document(doc_info['url'], document_id, pdf_bytes=pdf_bytes)
+                self._record_ingested_document(doc_info['url'], hash_document_bytes(pdf_bytes), document_id)
+            else:
+                await self.process_document(doc_info['url'], document_id)
             return True
             
         except Exception as e:
             logger.error(f"Failed to reprocess document {document_id}: {str(e)}")
             return False
     
-    async def process_batch_queries(self, document_url: str, questions: List[str]) -> List[str]:
-        """Process multiple questions for a single document and return batch answers."""
-        try:
-            total_start_time = time.time()
+    async def _get_or_process_document(self, document_url: str) -> str:
+        """Return the document ID for a URL, ingesting it only if not already cached."""
+        if not settings.document_cache_enabled:
+            document_id = f"batch_{str(uuid.uuid4())[:8]}"
+            return await self.process_document(document_url, document_id)
+        
+        # Serialize ingestion per URL so concurrent batches for the same PDF ingest it once
+        async with self._ingest_lock(document_url):
+            lazy_document_id = self._find_lazy_document(url=document_url)
+            if lazy_document_id:
+                logger.info(f"📦 Reusing lazily ingested document {lazy_document_id}")
+                self._restart_backfill(lazy_document_id)
+                return lazy_document_id
+            
+            entry = self.document_cache.lookup_url(document_url)
+            if entry and self._reuse_cached_document(document_url, entry):
+                logger.info(f"📦 Document cache hit (url) - reusing {entry['document_id']}")
+                return entry['document_id']
+            
+            pdf_bytes = await self.pdf_processor.download_pdf_from_blob(document_url)
+            content_hash = hash_document_bytes(pdf_bytes)
+            
+            lazy_document_id = self._find_lazy_document(content_hash=content_hash)
+            if lazy_document_id:
+                logger.info(f"📦 Reusing lazily ingested document {lazy_document_id} (content)")
+                self._restart_backfill(lazy_document_id)
+                return lazy_document_id
+            
+            entry = self.document_cache.lookup_hash(content_hash)
+            if entry and not entry.get('complete', True):
+                return await self._resume_lazy_document(document_url, entry, pdf_bytes)
+            if entry and self._reuse_cached_document(document_url, entry):
+                logger.info(f"📦 Document cache hit (content) - reusing {entry['document_id']}")
+                self.document_cache.add(document_url, content_hash, entry['document_id'], entry['chunks'])
+                return entry['document_id']
             
-            # Generate a unique document ID for this batch
             document_id = f"batch_{str(uuid.uuid4())[:8]}"
+            await self.process_document(document_url, document_id, pdf_bytes=pdf_bytes)
+            self._record_ingested_document(document_url, content_hash, document_id)
+            return document_id
+    
+    @contextlib.asynccontextmanager
+    async def _ingest_lock(self, document_url: str):
+        """Hold the URL's ingestion lock, dropping it once no other batch is waiting on it."""
+        key = normalize_document_url(document_url)
+        entry = self._ingest_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._ingest_locks[key]
+    
+    def _record_ingested_document(self, document_url: str, content_hash: str, document_id: str):
+        """Add a just-processed document to the document cache (incomplete while lazily ingested)."""
+        self.document_store[document_id]['content_hash'] = content_hash
+        if document_id in self.lazy_documents:
+            # Recorded as incomplete until the backfill has embedded every page (the
+            # backfill task has not run yet: nothing was awaited since it was scheduled)
+            self.lazy_documents[document_id]['content_hash'] = content_hash
+            self.document_cache.add(document_url, content_hash, document_id, 0, complete=False)
+        else:
+            self.document_cache.add(
+                document_url, content_hash, document_id, self.document_store[document_id]['chunks']
+            )
+    
+    async def _resume_lazy_document(self, document_url: str, entry: Dict[str, Any], pdf_bytes: bytes) -> str:
+        """Resume a lazy ingestion interrupted by a restart, embedding only the missing pages."""
+        document_id = entry['document_id']
+        pages = await self.pdf_processor.extract_pages(pdf_bytes)
+        existing_chunks = self.vector_search.get_document_chunks(document_id)
+        embedded_pages = {chunk.page_number for chunk in existing_chunks}
+        
+        self._start_lazy_document(document_id, document_url, pages, embedded_pages=embedded_pages)
+        state = self.lazy_documents[document_id]
+        state['content_hash'] = entry['content_hash']
+        state['chunks'] = len(existing_chunks)
+        self.document_store[document_id].update({
+            'chunks': len(existing_chunks),
+            'content_hash': entry['content_hash']
+        })
+        self.document_cache.add(document_url, entry['content_hash'], document_id, len(existing_chunks), complete=False)
+        logger.info(f"📦 Resuming interrupted ingestion of {document_id} "
+                    f"({len(state['pending'])} of {len(pages)} pages left)")
+        return document_id
+    
+    def _find_lazy_document(self, url: Optional[str] = None, content_hash: Optional[str] = None) -> Optional[str]:
+        """Find a document still being lazily ingested, by URL or content hash."""
+        url_key = normalize_document_url(url) if url else None
+        for document_id, state in self.lazy_documents.items():
+            if (url_key and normalize_document_url(state['url']) == url_key) or \
+               (content_hash and state.get('content_hash') == content_hash):
+                return document_id
+        return None
+    
+    def _start_lazy_document(self, document_id: str, blob_url: str, pages: List[Dict[str, Any]],
+                             embedded_pages: Optional[Set[int]] = None):
+        """Index a document's pages lexically and defer embedding to questions and the backfill.
+        
+        embedded_pages holds page numbers already in the vector store (when resuming).
+        """
+        page_index = BM25Index()
+        page_index.add([page['text'] for page in pages])
+        embedded_pages = embedded_pages or set()
+        
+        self.lazy_documents[document_id] = {
+            'url': blob_url,
+            'pages': pages,
+            'page_index': page_index,
+            'pending': {  # Positions in pages not yet embedded
+                position for position, page in enumerate(pages) if page['page_number'] not in embedded_pages
+            },
+            'chunks': 0,
+            'lock': asyncio.Lock(),
+            'task': None
+        }
+        self.document_store[document_id] = {
+            'url': blob_url,
+            'chunks': 0,
+            'pages': len(pages),
+            'status': 'indexing'
+        }
+        if settings.lazy_backfill:
+            self.lazy_documents[document_id]['task'] = asyncio.create_task(self._backfill_lazy_document(document_id))
+        logger.info(f"Lazily ingesting document {document_id} with {len(pages)} pages")
+    
+    def _restart_backfill(self, document_id: str):
+        """Reschedule the backfill of a lazy document whose backfill gave up after repeated failures."""
+        state = self.lazy_documents[document_id]
+        if state['task'] is not None and state['task'].done() and state['pending']:
+            logger.info(f"Restarting backfill of document {document_id} ({len(state['pending'])} pages left)")
+            self.document_store[document_id]['status'] = 'indexing'
+            state['task'] = asyncio.create_task(self._backfill_lazy_document(document_id))
+    
+    async def _embed_lazy_pages(self, document_id: str, positions) -> int:
+        """Chunk and embed the given pages of a lazy document unless already done."""
+        state = self.lazy_documents.get(document_id)
+        if state is None:
+            return 0
+        
+        async with state['lock']:
+            positions = sorted(position for position in set(positions) if position in state['pending'])
+            if not positions:
+                return 0
+            
+            pages = [state['pages'][position] for position in positions]
+            chunks = await asyncio.to_thread(self.pdf_processor.chunk_pages_separately, pages, document_id)
+            if chunks:
+                await self.vector_search.add_document_chunks(chunks)
             
-            # Step 1: Process the document ONCE for the entire batch
+            state['pending'].difference_update(positions)
+            state['chunks'] += len(chunks)
+            self.document_store[document_id]['chunks'] = state['chunks']
+            return len(positions)
+    
+    async def _ensure_candidate_pages(self, document_id: str, questions: List[str]):
+        """Embed the pages of a lazy document that the page index ranks highest for the questions."""
+        state = self.lazy_documents.get(document_id)
+        if state is None:
+            return
+        
+        start_time = time.time()
+        candidates = set()
+        for question in questions:
+            candidates.update(
+                position for position, _ in state['page_index'].search(question, k=settings.lazy_candidate_pages)
+            )
+        embedded = await self._embed_lazy_pages(document_id, candidates)
+        logger.info(f"⏱️ Embedded {embedded} candidate pages ({len(candidates)} matched) for "
+                    f"{len(questions)} questions in {time.time() - start_time:.2f} seconds")
+    
+    async def _backfill_lazy_document(self, document_id: str):
+        """Embed the remaining pages of a lazy document in the background."""
+        state = self.lazy_documents[document_id]
+        start_time = time.time()
+        failures = 0
+        while state['pending']:
+            if self.lazy_documents.get(document_id) is not state:
+                return  # Removed or reprocessed meanwhile
+            batch = sorted(state['pending'])[:max(1, settings.lazy_backfill_pages)]
+            try:
+                await self._embed_lazy_pages(document_id, batch)
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                if failures > settings.lazy_backfill_retries:
+                    # Questions keep embedding their candidate pages on demand, and the
+                    # backfill restarts on the document's next request
+                    logger.error(f"Backfill of document {document_id} failed: {str(e)}")
+                    self.document_store[document_id]['status'] = 'partial'
+                    return
+                delay = min(60, 2 ** failures)
+                logger.warning(f"Backfill step of document {document_id} failed, retrying in {delay}s: {str(e)}")
+                await asyncio.sleep(delay)
+        
+        self.document_store[document_id]['status'] = 'processed'
+        if state.get('content_hash'):
+            self.document_cache.add(state['url'], state['content_hash'], document_id, state['chunks'])
+        del self.lazy_documents[document_id]
+        logger.info(f"⏱️ Backfilled document {document_id} ({len(state['pages'])} pages, "
+                    f"{state['chunks']} chunks) in {time.time() - start_time:.2f} seconds")
+    
+    def _reuse_cached_document(self, document_url: str, entry: Dict[str, Any]) -> bool:
+        """Check a cache entry is complete and still backed by vectors, and register it as processed."""
+        document_id = entry['document_id']
+        if not entry.get('complete', True):
+            # Ingestion was interrupted - resumed once the content hash is known
+            return False
+        if not self.vector_search.has_document(document_id):
+            logger.warning(f"Cached document {document_id} is missing from the vector store, re-ingesting")
+            self.document_cache.remove_document(document_id)
+            return False
+        
+        if document_id not in self.document_store:
+            self.document_store[document_id] = {
+                'url': document_url,
+                'chunks': entry['chunks'],
+                'status': 'processed',
+                'content_hash': entry['content_hash']
+            }
+        return True
+    
+    async def process_batch_queries(self, document_url: str, questions: List[str],
+                                    on_answer: Optional[Callable[[int, str], None]] = None,
+                                    on_token: Optional[Callable[[int, str], None]] = None) -> List[str]:
+        """Process multiple questions for a single document and return batch answers.
+        
+        on_answer(index, answer) is called as soon as each question is answered, and
+        on_token(index, text) with answer text as the LLM streams it.
+        """
+        try:
+            total_start_time = time.time()
+            
+            # Step 1: Process the document ONCE for the entire batch (or reuse a cached ingestion)
             doc_start_time = time.time()
             logger.info(f"Processing document for batch queries: {document_url}")
-            await self.process_document(document_url, document_id)
+            document_id = await self._get_or_process_document(document_url)
             doc_end_time = time.time()
             logger.info(f"⏱️ Document processing took: {doc_end_time - doc_start_time:.2f} seconds")
             
-            # Step 2: Process questions sequentially but with optimized combined API calls
-            answers = []
             questions_start_time = time.time()
+            answers: List[Optional[str]] = [None] * len(questions)
             
-            for i, question in enumerate(questions):
-                question_start_time = time.time()
-                logger.info(f"Processing question {i+1}/{len(questions)}: {question}")
+            # Step 2: Reuse answers of near-identical questions already asked about this document
+            question_embeddings = None
+            if self.semantic_cache is not None:
+                question_embeddings = await self.vector_search.embedding_generator.generate_query_embeddings(questions)
+                matches = self.semantic_cache.lookup_many(document_id, question_embeddings)
+                for i, match in enumerate(matches):
+                    if match is not None:
+                        answers[i] = match[0]
+                        logger.info(f"📦 Semantic cache hit for question {i+1} ({match[2]:.3f} similar to: {match[1]})")
+                        if on_answer:
+                            on_answer(i, match[0])
+            
+            pending = [i for i, answer in enumerate(answers) if answer is None]
+            if pending:
+                pending_questions = [questions[i] for i in pending]
+                pending_embeddings = [question_embeddings[i] for i in pending] if question_embeddings else None
+                # Callbacks report positions in the full question list, not the pending subset
+                pending_answers = await self._answer_questions(
+                    document_id, pending_questions, pending_embeddings,
+                    on_answer=(lambda j, answer: on_answer(pending[j], answer)) if on_answer else None,
+                    on_token=(lambda j, text: on_token(pending[j], text)) if on_token else None
+                )
+                for i, (answer, _) in zip(pending, pending_answers):
+                    answers[i] = answer
                 
-                try:
-                    # Step 1: Perform semantic search on already processed document
-                    search_start_time = time.time()
-                    search_results = await self.vector_search.search_similar_chunks(
-                        query=question,
-                        k=15  # Get more results for comprehensive analysis
+                if self.semantic_cache is not None:
+                    answered = [j for j, (_, cacheable) in enumerate(pending_answers) if cacheable]
+                    self.semantic_cache.add_many(
+                        document_id,
+                        [pending_questions[j] for j in answered],
+                        [pending_embeddings[j] for j in answered],
+                        [pending_answers[j][0] for j in answered]
                     )
-                    search_end_time = time.time()
-                    logger.info(f"⏱️ Vector search took: {search_end_time - search_start_time:.2f} seconds")
-                    
-                    if not search_results:
-                        answers.append("No relevant information found in the document for this question.")
-                        continue
-                    
-                    logger.info(f"Found {len(search_results)} relevant chunks")
-                    
-                    # Step 2: Find the best matching clause
-                    clause_start_time = time.time()
-                    best_clause_match = await self._find_best_clause_simple(search_results)
-                    clause_end_time = time.time()
-                    logger.info(f"⏱️ Best clause matching took: {clause_end_time - clause_start_time:.2f} seconds")
-                    
-                    # Step 3: Combined parsing, logic evaluation, and response generation with comprehensive analysis
-                    combined_start_time = time.time()
-                    
-                    # Use top 5 clauses for comprehensive analysis (increased from 2)
-                    top_clauses = [result.chunk.content for result in search_results[:5]]
-                    
-                    # Use the improved combined method for comprehensive processing
-                    combined_analysis = await self.llm_parser.parse_and_evaluate_combined(
-                        question, top_clauses
-                    )
-                    
-                    # Generate comprehensive final response using the combined analysis
-                    final_response = await self.llm_parser.generate_fast_response(
-                        question, combined_analysis, best_clause_match.clause_text
-                    )
-                    
-                    combined_end_time = time.time()
-                    logger.info(f"⏱️ Comprehensive LLM processing took: {combined_end_time - combined_start_time:.2f} seconds")
-                    
-                    # Extract just the answer text and ensure it's a string
-                    raw_answer = final_response.get('answer', 'Unable to process query')
-                    
-                    # Ensure answer is always a string (handle cases where LLM returns objects)
-                    if isinstance(raw_answer, dict):
-                        # If it's a dict, extract the main text or convert to string
-                        answer_text = raw_answer.get('text', '') or raw_answer.get('answer', '') or str(raw_answer)
-                    elif isinstance(raw_answer, list):
-                        # If it's a list, join the items
-                        answer_text = '; '.join(str(item) for item in raw_answer)
-                    else:
-                        # If it's already a string or other type, convert to string
-                        answer_text = str(raw_answer)
-                    
-                    answers.append(answer_text)
-                    
-                    question_end_time = time.time()
-                    logger.info(f"⏱️ Total time for question {i+1}: {question_end_time - question_start_time:.2f} seconds")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to process question {i+1}: {str(e)}")
-                    answers.append(f"Unable to process this question: {str(e)}")
             
             questions_end_time = time.time()
             total_end_time = time.time()
@@ -378,3 +632,187 @@ class QueryRetrievalSystem:
             logger.error(f"Failed to process batch queries: {str(e)}")
             # Return error message for each question
             return [f"Error processing questions: {str(e)}"] * len(questions)
+    
+    async def _answer_questions(self, document_id: str, questions: List[str],
+                                question_embeddings: Optional[List[List[float]]] = None,
+                                on_answer: Optional[Callable[[int, str], None]] = None,
+                                on_token: Optional[Callable[[int, str], None]] = None) -> List[Tuple[str, bool]]:
+        """Retrieve clauses for questions about a document and answer them, in question order.
+        
+        Returns (answer, cacheable) pairs; cacheable is False for failed or low-confidence answers.
+        """
+        # Retrieve clauses for all questions with one batched embedding + search
+        search_start_time = time.time()
+        if document_id in self.lazy_documents:
+            await self._ensure_candidate_pages(document_id, questions)
+        all_results = await self.vector_search.search_many(
+            questions,
+            k=15,  # Get more results for comprehensive analysis
+            document_id=document_id,  # Only this batch's document
+            query_embeddings=question_embeddings
+        )
+        search_end_time = time.time()
+        logger.info(f"⏱️ Vector search for {len(questions)} questions took: {search_end_time - search_start_time:.2f} seconds")
+        
+        if self.reranker:
+            # One batched cross-encoder pass for every question's candidates
+            all_results = await self.reranker.rerank_many(questions, all_results)
+        
+        if settings.llm_batch_mode:
+            # Answer all questions with as few LLM calls as the token budget allows
+            answers = await self._answer_batch_single_call(questions, all_results)
+            if on_answer:
+                for i, (answer, _) in enumerate(answers):
+                    on_answer(i, answer)
+        else:
+            # Fan the questions out concurrently, bounded by the batch concurrency limit.
+            # asyncio.gather keeps answers in question order.
+            semaphore = asyncio.Semaphore(max(1, settings.batch_max_concurrency))
+            
+            async def answer_with_limit(i: int, question: str) -> Tuple[str, bool]:
+                async with semaphore:
+                    answer = await self._answer_batch_question(
+                        i, len(questions), question, all_results[i],
+                        on_token=(lambda text: on_token(i, text)) if on_token else None
+                    )
+                if on_answer:
+                    on_answer(i, answer[0])
+                return answer
+            
+            answers = await asyncio.gather(
+                *(answer_with_limit(i, question) for i, question in enumerate(questions))
+            )
+        return list(answers)
+    
+    def _is_cacheable_response(self, response: Dict[str, Any]) -> bool:
+        """Check an LLM response is a real, confident answer worth reusing for similar questions."""
+        if response.get('failed', True):
+            return False
+        try:
+            return float(response.get('confidence', 0.0)) >= settings.semantic_cache_min_confidence
+        except (TypeError, ValueError):
+            return False
+    
+    async def _answer_batch_question(self, i: int, total: int, question: str,
+                                     search_results: List[SearchResult],
+                                     on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, bool]:
+        """Answer one question of a batch from its search results; failures are returned as the answer text.
+        
+        Returns (answer, cacheable).
+        """
+        question_start_time = time.time()
+        logger.info(f"Processing question {i+1}/{total}: {question}")
+        
+        try:
+            if not search_results:
+                return "No relevant information found in the document for this question.", False
+            
+            logger.info(f"Found {len(search_results)} relevant chunks")
+            
+            # Step 2: Find the best matching clause
+            clause_start_time = time.time()
+            best_clause_match = await self._find_best_clause_simple(search_results)
+            clause_end_time = time.time()
+            logger.info(f"⏱️ Best clause matching took: {clause_end_time - clause_start_time:.2f} seconds")
+            
+            # Step 3: Combined parsing, logic evaluation, and response generation with comprehensive analysis
+            combined_start_time = time.time()
+            
+            # Pack the most relevant clauses (overlaps merged) into the context token budget
+            top_clauses = self.context_builder.build(search_results)
+            
+            # Use the improved combined method for comprehensive processing
+            combined_analysis = await self.llm_parser.parse_and_evaluate_combined(
+                question, top_clauses
+            )
+            
+            # Generate comprehensive final response using the combined analysis
+            final_response = await self.llm_parser.generate_fast_response(
+                question, combined_analysis, best_clause_match.clause_text,
+                on_answer_token=on_token
+            )
+            
+            combined_end_time = time.time()
+            logger.info(f"⏱️ Comprehensive LLM processing took: {combined_end_time - combined_start_time:.2f} seconds")
+            
+            answer_text = self._answer_to_text(final_response.get('answer', 'Unable to process query'))
+            
+            question_end_time = time.time()
+            logger.info(f"⏱️ Total time for question {i+1}: {question_end_time - question_start_time:.2f} seconds")
+            return answer_text, self._is_cacheable_response(final_response)
+            
+        except Exception as e:
+            logger.error(f"Failed to process question {i+1}: {str(e)}")
+            return f"Unable to process this question: {str(e)}", False
+    
+    async def stream_batch_queries(self, document_url: str, questions: List[str],
+                                   stream_tokens: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Process a batch like process_batch_queries, yielding events as answers become available.
+        
+        Yields {"type": "answer", "index", "answer"} per question in completion order
+        ({"type": "token", "index", "text"} deltas before it when stream_tokens is set),
+        then {"type": "done", "answers"} with all answers in question order.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        
+        task = asyncio.create_task(self.process_batch_queries(
+            document_url, questions,
+            on_answer=lambda i, answer: events.put_nowait({"type": "answer", "index": i, "answer": answer}),
+            on_token=(lambda i, text: events.put_nowait({"type": "token", "index": i, "text": text}))
+            if stream_tokens else None
+        ))
+        task.add_done_callback(lambda _: events.put_nowait(None))
+        
+        answered = set()
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                if event["type"] == "answer":
+                    answered.add(event["index"])
+                yield event
+            
+            answers = task.result()
+            # Batch-level failures return answers without per-question callbacks
+            for i, answer in enumerate(answers):
+                if i not in answered:
+                    yield {"type": "answer", "index": i, "answer": answer}
+            yield {"type": "done", "answers": answers}
+        finally:
+            if not task.done():
+                # The client went away; stop spending LLM calls on this batch
+                task.cancel()
+                logger.info("Batch stream closed before completion, cancelled remaining questions")
+    
+    async def _answer_batch_single_call(self, questions: List[str],
+                                        all_results: List[List[SearchResult]]) -> List[Tuple[str, bool]]:
+        """Answer all questions of a batch from their search results in batched LLM calls; returns (answer, cacheable)."""
+        answers = [("No relevant information found in the document for this question.", False)] * len(questions)
+        answerable = [i for i, results in enumerate(all_results) if results]
+        if not answerable:
+            return answers
+        
+        llm_start_time = time.time()
+        responses = await self.llm_parser.answer_questions_batch(
+            [questions[i] for i in answerable],
+            [self.context_builder.build(all_results[i]) for i in answerable]
+        )
+        logger.info(f"⏱️ Batched LLM processing took: {time.time() - llm_start_time:.2f} seconds")
+        
+        for i, response in zip(answerable, responses):
+            answers[i] = (self._answer_to_text(response.get('answer', 'Unable to process query')),
+                          self._is_cacheable_response(response))
+        return answers
+    
+    def _answer_to_text(self, raw_answer: Any) -> str:
+        """Ensure answer is always a string (handle cases where LLM returns objects)."""
+        if isinstance(raw_answer, dict):
+            # If it's a dict, extract the main text or convert to string
+            return raw_answer.get('text', '') or raw_answer.get('answer', '') or str(raw_answer)
+        elif isinstance(raw_answer, list):
+            # If it's a list, join the items
+            return '; '.join(str(item) for item in raw_answer)
+        else:
+            # If it's already a string or other type, convert to string
+            return str(raw_answer)
@@ -0,0 +1,122 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+# Lower values are served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+class TokenBucket:
+    """Continuously refilled bucket holding up to one minute's allowance."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0  # Refill per second
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available (call refill first)."""
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def consume(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+class RateLimiter:
+    """Client-side requests-per-minute and tokens-per-minute limiter for one LLM provider.
+
+    Callers wait in a priority queue (FIFO within a priority) until both buckets
+    can cover the request plus its estimated tokens, so calls are sent at the
+    provider's limit instead of being rejected with 429s. A limit of 0 disables
+    that bucket.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._queue: List[Tuple[int, int, asyncio.Future, int]] = []  # (priority, seq, future, tokens)
+        self._counter = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.granted = 0
+        self.delayed = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests is not None or self.tokens is not None
+
+    @property
+    def needs_tokens(self) -> bool:
+        """Whether acquire uses the token estimate (a tokens-per-minute limit is set)."""
+        return self.tokens is not None
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future, _ in self._queue if not future.done())
+
+    async def acquire(self, tokens: int = 0, priority: int = PRIORITY_NORMAL):
+        """Wait until one request using an estimated number of tokens may be sent."""
+        if not self.enabled:
+            return
+        start_time = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._counter), future, tokens))
+        self._dispatch()
+        if not future.done():
+            self.delayed += 1
+        try:
+            await future
+        finally:
+            self.wait_seconds += time.monotonic() - start_time
+            if future.cancelled():
+                # A cancelled waiter at the head may have been blocking the rest
+                self._dispatch()
+
+    def _dispatch(self):
+        """Grant queued requests in priority order while both buckets allow it."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.refill(now)
+
+        while self._queue:
+            _, _, future, tokens = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+
+            wait = max(self.requests.wait_time(1) if self.requests else 0.0,
+                       self.tokens.wait_time(tokens) if self.tokens else 0.0)
+            if wait > 0:
+                # The head waits so lower-priority requests cannot starve it
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+
+            heapq.heappop(self._queue)
+            if self.requests:
+                self.requests.consume(1)
+            if self.tokens:
+                self.tokens.consume(tokens)
+            self.granted += 1
+            future.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get limiter statistics."""
+        return {
+            "rpm": int(self.requests.capacity) if self.requests else None,
+            "tpm": int(self.tokens.capacity) if self.tokens else None,
+            "queue_depth": self.queue_depth,
+            "granted": self.granted,
+            "delayed": self.delayed,
+            "wait_seconds": round(self.wait_seconds, 3)
+        }
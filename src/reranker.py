@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any
+import numpy as np
+from sentence_transformers import CrossEncoder
+from loguru import logger
+
+from .models import SearchResult
+from .config import settings
+
+class Reranker:
+    """Cross-encoder reranking of retrieved chunks on CPU.
+
+    Rescores the top candidates of every query in one batched forward pass and
+    keeps only the best few. Scores are cached per (query, chunk text); if scoring
+    misses the latency budget the retrieval order is returned unchanged, and the
+    late scores still land in the cache.
+    """
+
+    def __init__(self):
+        self.model_name = settings.reranker_model
+        self.model = CrossEncoder(self.model_name, device="cpu")
+        self.cache: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.budget_exceeded = 0
+        logger.info(f"Loaded reranker model: {self.model_name}")
+
+    @staticmethod
+    def _key(query: str, content: str) -> str:
+        return hashlib.sha1(f"{query}\0{content}".encode('utf-8')).hexdigest()
+
+    async def rerank(self, query: str, results: List[SearchResult]) -> List[SearchResult]:
+        """Rerank one query's search results."""
+        return (await self.rerank_many([query], [results]))[0]
+
+    async def rerank_many(self, queries: List[str],
+                          results_per_query: List[List[SearchResult]]) -> List[List[SearchResult]]:
+        """Rerank the top candidates of each query, keeping the best reranker_top_k per query."""
+        candidates = [results[:settings.reranker_candidates] for results in results_per_query]
+        keys = [[self._key(query, result.chunk.content) for result in results]
+                for query, results in zip(queries, candidates)]
+
+        with self._lock:
+            scores = {key: self.cache[key] for row in keys for key in row if key in self.cache}
+            for key in scores:
+                self.cache.move_to_end(key)
+
+        missing = {}
+        for query, results, row in zip(queries, candidates, keys):
+            for result, key in zip(results, row):
+                if key not in scores:
+                    missing[key] = (query, result.chunk.content)
+        self.hits += sum(len(row) for row in keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            start_time = time.time()
+            try:
+                scores.update(await asyncio.wait_for(
+                    asyncio.to_thread(self._score, missing),
+                    timeout=settings.reranker_budget_ms / 1000
+                ))
+            except asyncio.TimeoutError:
+                self.budget_exceeded += 1
+                logger.warning(f"Reranking {len(missing)} pairs exceeded the {settings.reranker_budget_ms} ms "
+                               f"budget, keeping retrieval order")
+                return results_per_query
+            logger.info(f"⏱️ Reranked {len(missing)} pairs in {time.time() - start_time:.2f} seconds")
+
+        reranked = []
+        for results, row in zip(candidates, keys):
+            rescored = sorted(
+                (result.model_copy(update={'score': scores[key]}) for result, key in zip(results, row)),
+                key=lambda result: result.score,
+                reverse=True
+            )
+            reranked.append(rescored[:settings.reranker_top_k])
+        return reranked
+
+    def _score(self, pairs: Dict[str, tuple]) -> Dict[str, float]:
+        """Score (query, text) pairs with the cross-encoder and cache the results."""
+        # Single-label cross-encoders apply a sigmoid, so scores are 0-1 relevance
+        predictions = np.asarray(self.model.predict(list(pairs.values()), batch_size=64), dtype='float32')
+        scores = {key: float(score) for key, score in zip(pairs, predictions)}
+
+        with self._lock:
+            self.cache.update(scores)
+            while len(self.cache) > settings.reranker_cache_size:
+                self.cache.popitem(last=False)
+        return scores
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get reranker statistics."""
+        return {
+            "model": self.model_name,
+            "cached_scores": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "budget_exceeded": self.budget_exceeded
+        }
@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple
+from loguru import logger
+
+from .config import settings
+
+# Disk writes between sweeps of expired and over-limit entries
+PRUNE_EVERY_PUTS = 500
+
+class ResponseCache:
+    """Two-tier cache of LLM responses: an in-memory LRU in front of optional SQLite.
+
+    Keys fingerprint everything that determines a response (provider, model,
+    temperature, output limit and both prompts), and entries expire after a TTL.
+    Disk reads and writes both run off the event loop: reads in a worker thread
+    on their own WAL connection, so they never wait behind the writer thread's
+    inserts and periodic prunes.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, persist: Optional[bool] = None):
+        self.max_entries = settings.response_cache_max_entries
+        self.disk_max_entries = settings.response_cache_disk_max_entries
+        self.ttl = settings.response_cache_ttl
+        self.memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()  # key -> (expires_at, response)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # Memory tier
+        self._db_lock = threading.Lock()  # Writer connection, shared with the writer thread
+        self._read_lock = threading.Lock()  # Reader connection
+        self._writer = None
+        self._puts_since_prune = 0
+        self.conn = None
+        self.reader = None
+
+        persist = settings.response_cache_persist if persist is None else persist
+        if persist:
+            self.cache_path = cache_path or settings.response_cache_path
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            self.conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_expires_at ON responses(expires_at)")
+            self.conn.commit()
+            # WAL readers see committed rows without blocking on (or blocking) the writer
+            self.reader = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache-writer")
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, max_tokens: int,
+                 system_prompt: str, user_prompt: str) -> str:
+        """Fingerprint an LLM request."""
+        digest = hashlib.sha256(f"{system_prompt}\0{user_prompt}".encode('utf-8')).hexdigest()
+        return f"{provider}:{model}:{temperature}:{max_tokens}:{digest}"
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return a cached, unexpired response or None."""
+        now = time.time()
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self.memory[key]
+
+        if self.reader is not None:
+            row = await asyncio.to_thread(self._read, key)
+            if row is not None and row[1] > now:
+                self._writer.submit(self._touch, key, now)
+                with self._lock:
+                    self._remember(key, row[1], row[0])
+                    self.disk_hits += 1
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, response: str):
+        """Cache a response in memory and, if enabled, queue it for disk."""
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, response)
+        if self.conn is not None:
+            self._writer.submit(self._write, key, response, expires_at, now)
+
+    def _read(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._read_lock:
+            if self.reader is None:
+                return None
+            return self.reader.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _touch(self, key: str, now: float):
+        with self._db_lock:
+            if self.conn is None:
+                return
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+
+    def _write(self, key: str, response: str, expires_at: float, now: float):
+        """Store one response on the writer thread, pruning every PRUNE_EVERY_PUTS writes."""
+        with self._db_lock:
+            if self.conn is None:
+                return
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, expires_at, now)
+            )
+            self._puts_since_prune += 1
+            if self._puts_since_prune >= PRUNE_EVERY_PUTS:
+                self._puts_since_prune = 0
+                self._prune(now)
+            self.conn.commit()
+
+    def _prune(self, now: float):
+        """Drop expired entries, then the least recently used beyond the disk limit."""
+        self.conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        count = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.disk_max_entries:
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                (count - self.disk_max_entries,)
+            )
+            logger.info(f"Evicted {count - self.disk_max_entries} LLM responses from disk cache")
+
+    def flush(self):
+        """Block until queued disk writes are stored."""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+
+    def _remember(self, key: str, expires_at: float, response: str):
+        self.memory[key] = (expires_at, response)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {
+            "memory_entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "persistent": self.conn is not None
+        }
+
+    def close(self):
+        """Write pending responses and close the on-disk tier."""
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+        with self._db_lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+        with self._read_lock:
+            if self.reader is not None:
+                self.reader.close()
+                self.reader = None
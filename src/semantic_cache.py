@@ -0,0 +1,90 @@
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import faiss
+from loguru import logger
+
+from .config import settings
+
+class SemanticCache:
+    """Per-document cache of answered questions, matched by embedding similarity.
+
+    Each document gets a small exact inner-product FAISS index over normalized
+    question embeddings; a new question whose nearest cached question is at
+    least semantic_cache_threshold similar reuses that question's answer.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, max_entries: Optional[int] = None):
+        self.threshold = threshold or settings.semantic_cache_threshold
+        self.max_entries = max_entries or settings.semantic_cache_max_entries
+        self.documents: Dict[str, Dict[str, Any]] = {}  # document ID -> {'index', 'vectors', 'questions', 'answers'}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embeddings: List[List[float]]) -> np.ndarray:
+        vectors = np.array(embeddings, dtype='float32').reshape(len(embeddings), -1)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def lookup_many(self, document_id: str,
+                    embeddings: List[List[float]]) -> List[Optional[Tuple[str, str, float]]]:
+        """Return (answer, cached question, similarity) for each embedding, or None on a miss."""
+        entry = self.documents.get(document_id)
+        if entry is None or not embeddings:
+            self.misses += len(embeddings)
+            return [None] * len(embeddings)
+
+        scores, indices = entry['index'].search(self._normalize(embeddings), 1)
+        matches = []
+        for score, idx in zip(scores[:, 0], indices[:, 0]):
+            if idx >= 0 and score >= self.threshold:
+                matches.append((entry['answers'][idx], entry['questions'][idx], float(score)))
+            else:
+                matches.append(None)
+
+        hit_count = sum(1 for match in matches if match is not None)
+        self.hits += hit_count
+        self.misses += len(matches) - hit_count
+        return matches
+
+    def add_many(self, document_id: str, questions: List[str],
+                 embeddings: List[List[float]], answers: List[str]):
+        """Cache answered questions for a document, keeping the newest max_entries."""
+        if not questions:
+            return
+
+        entry = self.documents.get(document_id)
+        vectors = self._normalize(embeddings)
+        if entry is None:
+            entry = {'index': faiss.IndexFlatIP(vectors.shape[1]), 'vectors': vectors[:0],
+                     'questions': [], 'answers': []}
+            self.documents[document_id] = entry
+
+        entry['vectors'] = np.concatenate([entry['vectors'], vectors])
+        entry['questions'].extend(questions)
+        entry['answers'].extend(answers)
+
+        overflow = len(entry['questions']) - self.max_entries
+        if overflow > 0:
+            # Drop the oldest entries and rebuild the (small) index
+            entry['vectors'] = entry['vectors'][overflow:]
+            entry['questions'] = entry['questions'][overflow:]
+            entry['answers'] = entry['answers'][overflow:]
+            entry['index'].reset()
+            entry['index'].add(entry['vectors'])
+        else:
+            entry['index'].add(vectors)
+
+    def remove_document(self, document_id: str):
+        """Forget a document's cached answers, e.g. after it was reprocessed."""
+        if self.documents.pop(document_id, None) is not None:
+            logger.info(f"Cleared semantic cache for document {document_id}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {
+            "documents": len(self.documents),
+            "questions": sum(len(entry['questions']) for entry in self.documents.values()),
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -1,7 +1,14 @@
 import numpy as np
 import faiss
+import bisect
+import json
+import mmap
 import pickle
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 from sentence_transformers import SentenceTransformer
 import asyncio
@@ -15,8 +22,13 @@ except ImportError:
     logger.warning("OpenAI not available - using SentenceTransformers only")
 
 from .models import DocumentChunk, SearchResult
+from .embedding_cache import EmbeddingCache
+from .lexical_index import BM25Index
 from .config import settings
 
+# FAISS_INDEX_TYPE values that replace the flat index once a partition is large enough
+ANN_INDEX_TYPES = ("hnsw", "ivf_flat", "ivf_pq")
+
 class EmbeddingGenerator:
     """Handles text embedding generation using SentenceTransformers or OpenAI."""
     
@@ -27,6 +39,7 @@ class EmbeddingGenerator:
             # Use local SentenceTransformers (FREE)
             from sentence_transformers import SentenceTransformer
             self.model = SentenceTransformer('all-MiniLM-L6-v2')  # Fast and good quality
+            self.model_name = 'all-MiniLM-L6-v2'
             self.use_openai = False
             self.dimension = 384  # all-MiniLM-L6-v2 dimension
             logger.info("Using SentenceTransformers embeddings (FREE)")
@@ -41,20 +54,61 @@ class EmbeddingGenerator:
             # Fallback to SentenceTransformers if OpenAI not available
             from sentence_transformers import SentenceTransformer
             self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.model_name = 'all-MiniLM-L6-v2'
             self.use_openai = False
             self.dimension = 384
             logger.warning("OpenAI not available, falling back to SentenceTransformers")
+        
+        self.cache = EmbeddingCache() if settings.embedding_cache_enabled else None
+        # One-off query embeddings stay out of the persistent chunk cache
+        self.query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
     
     async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for a list of texts."""
+        """Generate embeddings for a list of chunk texts, reusing cached vectors."""
+        if self.cache is None:
+            return await self._encode(texts)
+        
+        cached = await asyncio.to_thread(self.cache.get_many, self.model_name, texts)
+        hit_count = sum(1 for vector in cached if vector is not None)
+        
+        # Encode each distinct missing text once
+        missing_texts = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        if missing_texts:
+            new_embeddings = await self._encode(missing_texts)
+            await asyncio.to_thread(self.cache.put_many, self.model_name, missing_texts, new_embeddings)
+            encoded = dict(zip(missing_texts, new_embeddings))
+            cached = [vector if vector is not None else encoded[text] for text, vector in zip(texts, cached)]
+        
+        if hit_count:
+            logger.info(f"Embedding cache: {hit_count}/{len(texts)} texts reused")
+        return [np.asarray(vector, dtype='float32').tolist() for vector in cached]
+    
+    async def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Encode texts with the configured embedding backend."""
         if self.use_openai:
             return await self._generate_openai_embeddings(texts)
         else:
-            return self._generate_sentence_transformer_embeddings(texts)
+            # Off the event loop, so background ingestion doesn't stall request handling
+            return await asyncio.to_thread(self._generate_sentence_transformer_embeddings, texts)
+    
+    async def generate_query_embeddings(self, queries: List[str]) -> List[List[float]]:
+        """Embed queries, reusing recent ones from a small in-memory LRU."""
+        missing = list(dict.fromkeys(query for query in queries if query not in self.query_cache))
+        if missing:
+            for query, embedding in zip(missing, await self._encode(missing)):
+                self.query_cache[query] = np.asarray(embedding, dtype='float32').tolist()
+        
+        embeddings = []
+        for query in queries:
+            self.query_cache.move_to_end(query)
+            embeddings.append(self.query_cache[query])
+        while len(self.query_cache) > settings.query_embedding_cache_size:
+            self.query_cache.popitem(last=False)
+        return embeddings
     
     async def generate_single_embedding(self, text: str) -> List[float]:
-        """Generate embedding for a single text."""
-        embeddings = await self.generate_embeddings([text])
+        """Generate embedding for a single query text."""
+        embeddings = await self.generate_query_embeddings([text])
         return embeddings[0]
     
     async def _generate_openai_embeddings(self, texts: List[str]) -> List[List[float]]:
@@ -100,112 +154,559 @@ class EmbeddingGenerator:
             logger.error(f"SentenceTransformer embedding generation failed: {str(e)}")
             raise
 
+class SegmentChunks:
+    """Chunk metadata of one on-disk segment, materialized only when indexed.
+    
+    Chunks are stored as one JSON document per line in a memory-mapped file,
+    with a separate array of byte offsets, so loading a segment costs two
+    small reads regardless of how much chunk text it holds. Only the mapping
+    itself stays open; the offsets array is small and read eagerly.
+    """
+    
+    def __init__(self, chunks_path: str, offsets_path: str):
+        self.offsets = np.load(offsets_path)
+        self._data = b""
+        if self.offsets[-1]:
+            # The mapping stays valid after the file is closed
+            with open(chunks_path, 'rb') as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, idx: int) -> DocumentChunk:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return DocumentChunk.model_validate_json(self._data[int(self.offsets[idx]):int(self.offsets[idx + 1])])
+    
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+    
+    @staticmethod
+    def write(chunks_path: str, offsets_path: str, chunks: List[DocumentChunk]):
+        """Write chunks in the line-per-chunk + offsets layout."""
+        offsets = [0]
+        with open(chunks_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk.model_dump_json().encode('utf-8') + b"\n")
+                offsets.append(f.tell())
+        np.save(offsets_path, np.array(offsets, dtype='int64'))
+
+class ChunkSequence:
+    """Read-only concatenation of in-memory chunk lists and lazy segment chunks."""
+    
+    def __init__(self):
+        self._blocks = []
+        self._ends: List[int] = []  # Cumulative block end positions
+    
+    def extend(self, chunks):
+        """Append a block of chunks (a list or SegmentChunks)."""
+        if len(chunks) == 0:
+            return
+        self._blocks.append(chunks)
+        self._ends.append(len(self) + len(chunks))
+    
+    def __len__(self) -> int:
+        return self._ends[-1] if self._ends else 0
+    
+    def __getitem__(self, idx: int) -> DocumentChunk:
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        block = bisect.bisect_right(self._ends, idx)
+        start = self._ends[block - 1] if block else 0
+        return self._blocks[block][idx - start]
+    
+    def __iter__(self):
+        for block in self._blocks:
+            yield from block
+
+class DocumentPartition:
+    """Vectors and chunk metadata for a single document.
+    
+    Vectors are kept as blocks (memory-mapped for segments loaded from disk).
+    Searches use an exact flat index filled on demand; the configured ANN index
+    is built by build_ann_index() off the request path and swapped in when ready.
+    """
+    
+    def __init__(self, document_id: str, index_factory):
+        self.document_id = document_id
+        self.chunks = ChunkSequence()
+        self._index_factory = index_factory
+        self._index = None
+        self._lock = threading.Lock()  # Serializes index adds, searches and the ANN swap
+        self._vector_blocks: List[np.ndarray] = []
+        self._indexed_blocks = 0
+        self.ntotal = 0
+        self.ann_building = False
+        self.ann_failed = False
+    
+    def _sync_index(self):
+        """Add blocks not yet indexed to the current index (call with the lock held)."""
+        if self._index is None:
+            self._index = self._index_factory()
+        for block in self._vector_blocks[self._indexed_blocks:]:
+            self._index.add(np.ascontiguousarray(block, dtype='float32'))
+        self._indexed_blocks = len(self._vector_blocks)
+    
+    @property
+    def needs_ann_index(self) -> bool:
+        """Check whether the configured ANN index should be built to replace the flat one."""
+        return (
+            settings.faiss_index_type.lower() in ANN_INDEX_TYPES
+            and not self.ann_building
+            and not self.ann_failed
+            and (self._index is None or isinstance(self._index, faiss.IndexFlat))
+            and self.ntotal >= settings.faiss_ann_min_vectors
+        )
+    
+    def build_ann_index(self):
+        """Build (and train) the ANN index over all current vectors, then swap it in. Blocking."""
+        block_count = len(self._vector_blocks)
+        vectors = np.ascontiguousarray(
+            np.concatenate([np.asarray(block) for block in self._vector_blocks[:block_count]]), dtype='float32'
+        )
+        index = self._index_factory(vectors)
+        index.add(vectors)
+        with self._lock:
+            # Blocks added while building are indexed before the swap is visible
+            self._index = index
+            self._indexed_blocks = block_count
+            self._sync_index()
+    
+    def add(self, embeddings_array: np.ndarray, chunks):
+        """Add normalized embeddings and their chunks (a list or SegmentChunks)."""
+        self._vector_blocks.append(embeddings_array)
+        self.chunks.extend(chunks)
+        self.ntotal += len(embeddings_array)
+    
+    def search(self, query_array: np.ndarray, k: int) -> List[List[Tuple[float, DocumentChunk]]]:
+        """Search this partition with one or more query rows, returning (score, chunk) pairs per row."""
+        if self.ntotal == 0:
+            return [[] for _ in range(len(query_array))]
+        
+        with self._lock:
+            self._sync_index()
+            scores, indices = self._index.search(query_array, min(k, self.ntotal))
+        return [
+            [
+                (float(score), self.chunks[idx])
+                for score, idx in zip(row_scores, row_indices)
+                if 0 <= idx < len(self.chunks)
+            ]
+            for row_scores, row_indices in zip(scores, indices)
+        ]
+    
+    def get_vectors(self) -> np.ndarray:
+        """Return the stored (normalized) vectors."""
+        if not self._vector_blocks:
+            return np.zeros((0, 0), dtype='float32')
+        return np.concatenate([np.asarray(block) for block in self._vector_blocks])
+
 class FAISSVectorStore:
-    """FAISS-based vector storage and retrieval."""
+    """FAISS-based vector storage and retrieval, partitioned per document.
+    
+    On disk the store is append-only: every add_embeddings() call becomes one
+    segment file (vectors + chunk metadata) listed in a manifest, written by a
+    single background writer thread. A document's segments are merged once it
+    accumulates more than faiss_compact_segments of them.
+    """
+    
+    MANIFEST_VERSION = 2
+    SEGMENT_FORMAT = 2  # 1: pickled chunk list, 2: offset-indexed JSON lines
     
     def __init__(self, dimension: int = 384):  # Default to SentenceTransformers dimension
         self.dimension = dimension
-        self.index = None
-        self.chunks_metadata = []
+        self.partitions: Dict[str, DocumentPartition] = {}
         self.index_path = settings.faiss_index_path
+        self._manifest = {"version": self.MANIFEST_VERSION, "next_segment": 0, "segments": []}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="faiss-writer")
+        self._index_builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="faiss-index-builder")
+        self._manifest_lock = threading.Lock()
     
-    def create_index(self):
-        """Create a new FAISS index."""
-        # Use IndexFlatIP for cosine similarity
-        self.index = faiss.IndexFlatIP(self.dimension)
-        logger.info(f"Created new FAISS index with dimension {self.dimension}")
+    @property
+    def segments_dir(self) -> str:
+        return f"{self.index_path}.segments"
     
-    def add_embeddings(self, embeddings: List[List[float]], chunks: List[DocumentChunk]):
-        """Add embeddings and metadata to the index."""
-        if self.index is None:
-            self.create_index()
+    def create_index(self, vectors: Optional[np.ndarray] = None):
+        """Create an empty FAISS index of the configured type, trained on vectors if it needs training."""
+        num_vectors = 0 if vectors is None else len(vectors)
+        index_type = settings.faiss_index_type.lower()
         
+        # Small partitions stay exact; ANN only pays off (and IVF/PQ only train) with enough vectors
+        if index_type == "flat" or num_vectors < settings.faiss_ann_min_vectors:
+            # Use IndexFlatIP for cosine similarity
+            return faiss.IndexFlatIP(self.dimension)
+        
+        if index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(self.dimension, settings.faiss_hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = settings.faiss_hnsw_ef_construction
+            index.hnsw.efSearch = settings.faiss_hnsw_ef_search
+            logger.info(f"Created HNSW index (M={settings.faiss_hnsw_m}) for {num_vectors} vectors")
+            return index
+        
+        if index_type in ("ivf_flat", "ivf_pq"):
+            # ~39 training points per centroid keeps k-means well conditioned
+            nlist = settings.faiss_ivf_nlist or int(4 * np.sqrt(num_vectors))
+            nlist = max(1, min(nlist, num_vectors // 39))
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            
+            if index_type == "ivf_pq" and self.dimension % settings.faiss_pq_m != 0:
+                logger.warning(f"FAISS_PQ_M={settings.faiss_pq_m} does not divide dimension {self.dimension}, using IVF-Flat")
+                index_type = "ivf_flat"
+            
+            if index_type == "ivf_pq":
+                index = faiss.IndexIVFPQ(quantizer, self.dimension, nlist, settings.faiss_pq_m,
+                                         settings.faiss_pq_nbits, faiss.METRIC_INNER_PRODUCT)
+            else:
+                index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+            
+            index.train(np.ascontiguousarray(vectors, dtype='float32'))
+            index.nprobe = min(settings.faiss_ivf_nprobe, nlist)
+            logger.info(f"Trained {index_type} index (nlist={nlist}) on {num_vectors} vectors")
+            return index
+        
+        logger.warning(f"Unknown FAISS_INDEX_TYPE '{settings.faiss_index_type}', using flat index")
+        return faiss.IndexFlatIP(self.dimension)
+    
+    def _get_partition(self, document_id: str) -> DocumentPartition:
+        """Get or create the partition for a document."""
+        partition = self.partitions.get(document_id)
+        if partition is None:
+            partition = DocumentPartition(document_id, self.create_index)
+            self.partitions[document_id] = partition
+            logger.info(f"Created new FAISS partition for document {document_id} with dimension {self.dimension}")
+        return partition
+    
+    def add_embeddings(self, embeddings: List[List[float]], chunks: List[DocumentChunk],
+                       persist: bool = True):
+        """Add embeddings and metadata to their documents' partitions and persist them as new segments."""
         # Convert to numpy array and normalize for cosine similarity
         embeddings_array = np.array(embeddings).astype('float32')
         faiss.normalize_L2(embeddings_array)
         
-        # Add to index
-        self.index.add(embeddings_array)
+        # Group rows by document so each partition gets one add() call
+        rows_by_document: Dict[str, List[int]] = {}
+        for row, chunk in enumerate(chunks):
+            rows_by_document.setdefault(chunk.document_id, []).append(row)
         
-        # Store metadata
-        self.chunks_metadata.extend(chunks)
+        for document_id, rows in rows_by_document.items():
+            vectors = embeddings_array[rows]
+            document_chunks = [chunks[row] for row in rows]
+            partition = self._get_partition(document_id)
+            partition.add(vectors, document_chunks)
+            self._schedule_ann_build(partition)
+            if persist:
+                self._submit_write(self._append_segment, document_id, vectors, document_chunks)
         
-        logger.info(f"Added {len(embeddings)} embeddings to FAISS index")
+        logger.info(f"Added {len(embeddings)} embeddings to {len(rows_by_document)} FAISS partition(s)")
     
-    def search(self, query_embedding: List[float], k: int = 5) -> List[SearchResult]:
-        """Search for similar embeddings."""
-        if self.index is None or self.index.ntotal == 0:
-            logger.warning("No embeddings in index")
-            return []
+    def search(self, query_embedding: List[float], k: int = 5,
+               document_id: Optional[str] = None) -> List[SearchResult]:
+        """Search for similar embeddings, optionally scoped to one document."""
+        return self.search_many([query_embedding], k, document_id=document_id)[0]
+    
+    def search_many(self, query_embeddings: List[List[float]], k: int = 5,
+                    document_id: Optional[str] = None) -> List[List[SearchResult]]:
+        """Search several query embeddings at once with one multi-row search per partition."""
+        if document_id is not None:
+            partitions = [self.partitions[document_id]] if document_id in self.partitions else []
+        else:
+            partitions = list(self.partitions.values())
+        
+        if not partitions or len(query_embeddings) == 0:
+            logger.warning(f"No embeddings in index for document {document_id}" if document_id else "No embeddings in index")
+            return [[] for _ in query_embeddings]
         
-        # Normalize query embedding
-        query_array = np.array([query_embedding]).astype('float32')
+        # Normalize query embeddings
+        query_array = np.array(query_embeddings).astype('float32')
         faiss.normalize_L2(query_array)
         
-        # Search
-        scores, indices = self.index.search(query_array, k)
+        # Search each partition in scope and merge the hits per query
+        hits = [[] for _ in range(len(query_array))]
+        for partition in partitions:
+            self._schedule_ann_build(partition)
+            for row, row_hits in enumerate(partition.search(query_array, k)):
+                hits[row].extend(row_hits)
         
         results = []
-        for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-            if idx < len(self.chunks_metadata):
-                chunk = self.chunks_metadata[idx]
-                result = SearchResult(
-                    chunk=chunk,
-                    score=float(score),
-                    embedding_similarity=float(score)
-                )
-                results.append(result)
-        
+        for row_hits in hits:
+            row_hits.sort(key=lambda hit: hit[0], reverse=True)
+            results.append([
+                SearchResult(chunk=chunk, score=score, embedding_similarity=score)
+                for score, chunk in row_hits[:k]
+            ])
         return results
     
+    def remove_document(self, document_id: str) -> bool:
+        """Drop a document's partition and its segments."""
+        removed = self.partitions.pop(document_id, None) is not None
+        if removed:
+            self._submit_write(self._drop_document_segments, document_id)
+        return removed
+    
+    def _submit_write(self, fn, *args):
+        """Run a persistence operation on the writer thread (or inline if async persistence is off)."""
+        if settings.faiss_async_persistence:
+            return self._writer.submit(self._run_write, fn, *args)
+        self._run_write(fn, *args)
+    
+    def _run_write(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error(f"FAISS persistence operation {fn.__name__} failed: {str(e)}")
+    
+    def flush(self):
+        """Block until all queued persistence operations and index builds are done."""
+        self._writer.submit(lambda: None).result()
+        self._index_builder.submit(lambda: None).result()
+    
+    def _schedule_ann_build(self, partition: DocumentPartition):
+        """Build a partition's ANN index on the builder thread once it is large enough."""
+        if partition.needs_ann_index:
+            partition.ann_building = True
+            self._index_builder.submit(self._build_ann_index, partition)
+    
+    def _build_ann_index(self, partition: DocumentPartition):
+        start_time = time.time()
+        try:
+            partition.build_ann_index()
+            logger.info(f"⏱️ Built {settings.faiss_index_type} index for document {partition.document_id} "
+                        f"({partition.ntotal} vectors) in {time.time() - start_time:.2f} seconds")
+        except Exception as e:
+            # Searches keep using the flat index
+            partition.ann_failed = True
+            logger.error(f"Failed to build ANN index for document {partition.document_id}: {str(e)}")
+        finally:
+            partition.ann_building = False
+    
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.segments_dir, f"{segment_id:08d}")
+    
+    def _write_segment_files(self, segment_id: int, vectors: np.ndarray, chunks):
+        base = self._segment_path(segment_id)
+        np.save(f"{base}.npy", np.ascontiguousarray(vectors, dtype='float32'))
+        SegmentChunks.write(f"{base}.chunks", f"{base}.offsets.npy", list(chunks))
+    
+    def _read_segment_files(self, segment: Dict[str, Any], lazy: bool = False) -> Tuple[np.ndarray, Any]:
+        """Read a segment; with lazy=True vectors are memory-mapped and chunks materialized on access."""
+        base = self._segment_path(segment["id"])
+        vectors = np.load(f"{base}.npy", mmap_mode='r' if lazy else None)
+        
+        if segment.get("format", 1) >= 2:
+            chunks = SegmentChunks(f"{base}.chunks", f"{base}.offsets.npy")
+            if not lazy:
+                chunks = list(chunks)
+        else:
+            with open(f"{base}.metadata", 'rb') as f:
+                chunks = pickle.load(f)
+        return vectors, chunks
+    
+    def _delete_segment_files(self, segment_id: int):
+        base = self._segment_path(segment_id)
+        for path in (f"{base}.npy", f"{base}.chunks", f"{base}.offsets.npy", f"{base}.metadata"):
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                # Still memory-mapped on platforms that forbid it; removed as an orphan on next load
+                logger.warning(f"Could not delete segment file {path}: {str(e)}")
+    
+    def _write_manifest(self):
+        """Atomically replace the manifest."""
+        path = os.path.join(self.segments_dir, "manifest.json")
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(self._manifest, f)
+        os.replace(f"{path}.tmp", path)
+    
+    def _allocate_segment(self) -> int:
+        with self._manifest_lock:
+            segment_id = self._manifest["next_segment"]
+            self._manifest["next_segment"] += 1
+            return segment_id
+    
+    def _append_segment(self, document_id: str, vectors: np.ndarray, chunks: List[DocumentChunk]):
+        """Write one new segment; I/O is proportional to the added vectors only."""
+        os.makedirs(self.segments_dir, exist_ok=True)
+        segment_id = self._allocate_segment()
+        self._write_segment_files(segment_id, vectors, chunks)
+        
+        with self._manifest_lock:
+            self._manifest["segments"].append(self._segment_entry(segment_id, document_id, len(chunks)))
+            self._write_manifest()
+        logger.info(f"Persisted segment {segment_id} ({len(chunks)} vectors) for document {document_id}")
+        
+        document_segments = [seg for seg in self._manifest["segments"] if seg["document_id"] == document_id]
+        if len(document_segments) > settings.faiss_compact_segments:
+            self._compact_document(document_id)
+    
+    def _compact_document(self, document_id: str):
+        """Merge all segments of a document into one."""
+        old_segments = [seg for seg in self._manifest["segments"] if seg["document_id"] == document_id]
+        parts = [self._read_segment_files(seg) for seg in old_segments]
+        vectors = np.concatenate([part[0] for part in parts])
+        chunks = [chunk for part in parts for chunk in part[1]]
+        
+        segment_id = self._allocate_segment()
+        self._write_segment_files(segment_id, vectors, chunks)
+        with self._manifest_lock:
+            old_ids = {seg["id"] for seg in old_segments}
+            self._manifest["segments"] = [
+                seg for seg in self._manifest["segments"] if seg["id"] not in old_ids
+            ] + [self._segment_entry(segment_id, document_id, len(chunks))]
+            self._write_manifest()
+        
+        for seg_id in old_ids:
+            self._delete_segment_files(seg_id)
+        logger.info(f"Compacted {len(old_ids)} segments of document {document_id}")
+    
+    def _segment_entry(self, segment_id: int, document_id: str, count: int) -> Dict[str, Any]:
+        return {"id": segment_id, "document_id": document_id, "count": count, "format": self.SEGMENT_FORMAT}
+    
+    def _drop_document_segments(self, document_id: str):
+        """Remove a document's segments from the manifest, then delete their files."""
+        if not os.path.isdir(self.segments_dir):
+            return
+        with self._manifest_lock:
+            dropped = [seg["id"] for seg in self._manifest["segments"] if seg["document_id"] == document_id]
+            self._manifest["segments"] = [
+                seg for seg in self._manifest["segments"] if seg["document_id"] != document_id
+            ]
+            self._write_manifest()
+        for segment_id in dropped:
+            self._delete_segment_files(segment_id)
+    
+    def _rewrite_all_segments(self, snapshot: Dict[str, Tuple[np.ndarray, List[DocumentChunk]]]):
+        """Replace the on-disk store with one segment per document."""
+        os.makedirs(self.segments_dir, exist_ok=True)
+        with self._manifest_lock:
+            old_ids = [seg["id"] for seg in self._manifest["segments"]]
+            self._manifest["segments"] = []
+        
+        new_segments = []
+        for document_id, (vectors, chunks) in snapshot.items():
+            segment_id = self._allocate_segment()
+            self._write_segment_files(segment_id, vectors, chunks)
+            new_segments.append(self._segment_entry(segment_id, document_id, len(chunks)))
+        
+        with self._manifest_lock:
+            self._manifest["segments"] = new_segments
+            self._write_manifest()
+        for segment_id in old_ids:
+            self._delete_segment_files(segment_id)
+    
     def save_index(self):
-        """Save FAISS index and metadata to disk."""
+        """Write a full snapshot of all partitions (one segment per document) and wait for it."""
         try:
-            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
-            
-            # Save FAISS index
-            faiss.write_index(self.index, f"{self.index_path}.index")
-            
-            # Save metadata
-            with open(f"{self.index_path}.metadata", 'wb') as f:
-                pickle.dump(self.chunks_metadata, f)
+            snapshot = {
+                document_id: (partition.get_vectors(), list(partition.chunks))
+                for document_id, partition in self.partitions.items()
+            }
+            if settings.faiss_async_persistence:
+                self._writer.submit(self._rewrite_all_segments, snapshot).result()
+            else:
+                self._rewrite_all_segments(snapshot)
             
-            logger.info(f"Saved FAISS index to {self.index_path}")
+            logger.info(f"Saved {len(self.partitions)} FAISS partitions to {self.segments_dir}")
             
         except Exception as e:
             logger.error(f"Failed to save FAISS index: {str(e)}")
             raise
     
     def load_index(self) -> bool:
-        """Load FAISS index and metadata from disk."""
+        """Load segments from disk, migrating older layouts if found."""
         try:
+            manifest_file = os.path.join(self.segments_dir, "manifest.json")
+            partitions_file = f"{self.index_path}.partitions"
             index_file = f"{self.index_path}.index"
             metadata_file = f"{self.index_path}.metadata"
             
-            if os.path.exists(index_file) and os.path.exists(metadata_file):
-                # Load FAISS index
-                self.index = faiss.read_index(index_file)
+            if os.path.exists(manifest_file):
+                with open(manifest_file, 'r') as f:
+                    self._manifest = json.load(f)
                 
-                # Load metadata
+                failed_documents = set()
+                for seg in self._manifest["segments"]:
+                    if seg["document_id"] in failed_documents:
+                        continue
+                    try:
+                        vectors, chunks = self._read_segment_files(seg, lazy=settings.faiss_mmap_vectors)
+                    except Exception as e:
+                        # Skip only this document (it is re-ingested on next use); its files stay
+                        # in the manifest so a later load can still pick them up
+                        logger.error(f"Failed to load segment {seg['id']} of document {seg['document_id']}, "
+                                     f"skipping the document: {str(e)}")
+                        failed_documents.add(seg["document_id"])
+                        self.partitions.pop(seg["document_id"], None)
+                        continue
+                    self._get_partition(seg["document_id"]).add(vectors, chunks)
+                
+                self._remove_orphan_segments()
+                for partition in self.partitions.values():
+                    self._schedule_ann_build(partition)
+                
+            elif os.path.exists(partitions_file):
+                # Pre-segment layout: all partitions pickled into one file
+                with open(partitions_file, 'rb') as f:
+                    data = pickle.load(f)
+                
+                for document_id, stored in data.items():
+                    self._get_partition(document_id).add(stored['vectors'], stored['chunks'])
+                self.save_index()
+                logger.info(f"Migrated {len(self.partitions)} partitions to segment layout")
+                
+            elif os.path.exists(index_file) and os.path.exists(metadata_file):
+                # Legacy layout: one global index with chunks of all documents
+                legacy_index = faiss.read_index(index_file)
                 with open(metadata_file, 'rb') as f:
-                    self.chunks_metadata = pickle.load(f)
+                    chunks_metadata = pickle.load(f)
+                
+                vectors = legacy_index.reconstruct_n(0, legacy_index.ntotal)
+                count = min(len(chunks_metadata), len(vectors))
+                self.add_embeddings(vectors[:count], chunks_metadata[:count], persist=False)
+                self.save_index()
+                logger.info(f"Migrated legacy FAISS index into {len(self.partitions)} partitions")
                 
-                logger.info(f"Loaded FAISS index with {self.index.ntotal} embeddings")
-                return True
             else:
                 logger.info("No existing FAISS index found")
                 return False
+            
+            logger.info(f"Loaded FAISS index with {len(self.partitions)} partitions")
+            return True
                 
         except Exception as e:
             logger.error(f"Failed to load FAISS index: {str(e)}")
+            self.partitions = {}
             return False
     
+    def _remove_orphan_segments(self):
+        """Delete segment files left behind by an interrupted write or compaction."""
+        live_ids = {seg["id"] for seg in self._manifest["segments"]}
+        for name in os.listdir(self.segments_dir):
+            stem, ext = os.path.splitext(name)
+            stem = stem.split(".")[0]  # "00000001.offsets.npy" -> "00000001"
+            if ext in (".npy", ".chunks", ".metadata") and stem.isdigit() and int(stem) not in live_ids:
+                os.remove(os.path.join(self.segments_dir, name))
+    
+    def has_document(self, document_id: str) -> bool:
+        """Check whether a document has a partition in the index."""
+        return document_id in self.partitions
+    
+    def get_document_chunks(self, document_id: str):
+        """Return a document's chunks in insertion order (empty if unknown)."""
+        partition = self.partitions.get(document_id)
+        return partition.chunks if partition is not None else []
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the index."""
         return {
-            "total_embeddings": self.index.ntotal if self.index else 0,
+            "total_embeddings": sum(p.ntotal for p in self.partitions.values()),
             "dimension": self.dimension,
-            "total_chunks": len(self.chunks_metadata)
+            "total_chunks": sum(len(p.chunks) for p in self.partitions.values()),
+            "total_documents": len(self.partitions)
         }
 
 class PineconeVectorStore:
@@ -254,13 +755,15 @@ class PineconeVectorStore:
             logger.error(f"Failed to add embeddings to Pinecone: {str(e)}")
             raise
     
-    async def search(self, query_embedding: List[float], k: int = 5) -> List[SearchResult]:
-        """Search Pinecone index."""
+    async def search(self, query_embedding: List[float], k: int = 5,
+                     document_id: Optional[str] = None) -> List[SearchResult]:
+        """Search Pinecone index, optionally scoped to one document."""
         try:
             response = self.index.query(
                 vector=query_embedding,
                 top_k=k,
-                include_metadata=True
+                include_metadata=True,
+                filter={"document_id": document_id} if document_id else None
             )
             
             results = []
@@ -282,6 +785,24 @@ class PineconeVectorStore:
         except Exception as e:
             logger.error(f"Pinecone search failed: {str(e)}")
             return []
+    
+    def has_document(self, document_id: str) -> bool:
+        """Check whether a document's chunks were added in this process."""
+        return any(chunk.document_id == document_id for chunk in self.chunks_map.values())
+    
+    def get_document_chunks(self, document_id: str) -> List[DocumentChunk]:
+        """Return a document's chunks added in this process, in insertion order."""
+        return [chunk for chunk in self.chunks_map.values() if chunk.document_id == document_id]
+    
+    def remove_document(self, document_id: str) -> bool:
+        """Delete a document's vectors."""
+        vector_ids = [vid for vid, chunk in self.chunks_map.items() if chunk.document_id == document_id]
+        if not vector_ids:
+            return False
+        self.index.delete(ids=vector_ids)
+        for vector_id in vector_ids:
+            del self.chunks_map[vector_id]
+        return True
 
 class VectorSearchEngine:
     """Main interface for vector search operations."""
@@ -296,6 +817,8 @@ class VectorSearchEngine:
             dimension = self.embedding_generator.dimension
             self.vector_store = FAISSVectorStore(dimension=dimension)
             self.vector_store.load_index()  # Try to load existing index
+        
+        self.lexical_indexes: Dict[str, BM25Index] = {}  # Document ID -> BM25 over its chunks
     
     async def add_document_chunks(self, chunks: List[DocumentChunk]):
         """Add document chunks to the vector store."""
@@ -304,37 +827,137 @@ class VectorSearchEngine:
             texts = [chunk.content for chunk in chunks]
             embeddings = await self.embedding_generator.generate_embeddings(texts)
             
-            # Add to vector store
+            # Add to vector store (FAISS persists the new segment off the request path)
             if isinstance(self.vector_store, FAISSVectorStore):
                 self.vector_store.add_embeddings(embeddings, chunks)
-                self.vector_store.save_index()
             else:
                 await self.vector_store.add_embeddings(embeddings, chunks)
             
+            if settings.hybrid_search:
+                for document_id in dict.fromkeys(chunk.document_id for chunk in chunks):
+                    self._get_lexical_index(document_id)
+            
             logger.info(f"Successfully added {len(chunks)} chunks to vector store")
             
         except Exception as e:
             logger.error(f"Failed to add chunks to vector store: {str(e)}")
             raise
     
-    async def search_similar_chunks(self, query: str, k: int = 5) -> List[SearchResult]:
-        """Search for chunks similar to the query."""
+    async def search_similar_chunks(self, query: str, k: int = 5,
+                                    document_id: Optional[str] = None,
+                                    keywords: Optional[List[str]] = None) -> List[SearchResult]:
+        """Search for chunks similar to the query, optionally within one document.
+        
+        Keywords (e.g. ParsedQuery.keywords) are added to the lexical query of hybrid searches.
+        """
+        lexical_query = " ".join([query] + (keywords or []))
+        results = await self.search_many([query], k, document_id=document_id, lexical_queries=[lexical_query])
+        logger.info(f"Found {len(results[0])} similar chunks for query")
+        return results[0]
+    
+    async def search_many(self, queries: List[str], k: int = 5,
+                          document_id: Optional[str] = None,
+                          lexical_queries: Optional[List[str]] = None,
+                          query_embeddings: Optional[List[List[float]]] = None) -> List[List[SearchResult]]:
+        """Search for chunks similar to each query, embedding all queries in one batch.
+        
+        Pass query_embeddings when the queries were already embedded.
+        """
+        if not queries:
+            return []
+        
+        hybrid = settings.hybrid_search and document_id is not None
+        dense_k = max(k, settings.hybrid_candidates) if hybrid else k
+        
         try:
-            # Generate query embedding
-            query_embedding = await self.embedding_generator.generate_single_embedding(query)
+            # One batched forward pass for all queries
+            if query_embeddings is None:
+                query_embeddings = await self.embedding_generator.generate_query_embeddings(queries)
             
-            # Search vector store
             if isinstance(self.vector_store, FAISSVectorStore):
-                results = self.vector_store.search(query_embedding, k)
+                # Off the event loop: large flat partitions take a while to scan
+                results = await asyncio.to_thread(
+                    self.vector_store.search_many, query_embeddings, dense_k, document_id=document_id
+                )
             else:
-                results = await self.vector_store.search(query_embedding, k)
+                results = await asyncio.gather(*(
+                    self.vector_store.search(embedding, dense_k, document_id=document_id)
+                    for embedding in query_embeddings
+                ))
             
-            logger.info(f"Found {len(results)} similar chunks for query")
-            return results
+            if hybrid:
+                results = self._fuse_lexical(results, lexical_queries or queries, k, document_id)
+            
+            logger.info(f"Searched {len(queries)} queries in one batch{' (hybrid)' if hybrid else ''}")
+            return list(results)
             
         except Exception as e:
-            logger.error(f"Vector search failed: {str(e)}")
-            return []
+            logger.error(f"Batched vector search failed: {str(e)}")
+            return [[] for _ in queries]
+    
+    def _get_lexical_index(self, document_id: str) -> Optional[BM25Index]:
+        """Return the document's BM25 index, indexing any chunks added since it was built."""
+        chunks = self.vector_store.get_document_chunks(document_id)
+        if not len(chunks):
+            return None
+        
+        index = self.lexical_indexes.get(document_id)
+        if index is None or len(index) > len(chunks):
+            index = BM25Index()
+            self.lexical_indexes[document_id] = index
+        if len(index) < len(chunks):
+            index.add([chunks[i].content for i in range(len(index), len(chunks))])
+        return index
+    
+    def _fuse_lexical(self, dense_results: List[List[SearchResult]], lexical_queries: List[str],
+                      k: int, document_id: str) -> List[List[SearchResult]]:
+        """Merge dense hits with BM25 hits by weighted reciprocal rank fusion."""
+        index = self._get_lexical_index(document_id)
+        if index is None:
+            return [results[:k] for results in dense_results]
+        
+        chunks = self.vector_store.get_document_chunks(document_id)
+        rrf_k = settings.hybrid_rrf_k
+        dense_weight = settings.hybrid_dense_weight
+        lexical_weight = settings.hybrid_lexical_weight
+        # Scale so a chunk ranked first by both retrievers scores 1.0
+        max_score = (dense_weight + lexical_weight) / (rrf_k + 1) or 1.0
+        
+        fused_results = []
+        for dense_hits, lexical_query in zip(dense_results, lexical_queries):
+            fused: Dict[str, Dict[str, Any]] = {}
+            for rank, result in enumerate(dense_hits):
+                fused[result.chunk.chunk_id] = {
+                    'chunk': result.chunk,
+                    'similarity': result.embedding_similarity,
+                    'score': dense_weight / (rrf_k + rank + 1)
+                }
+            for rank, (position, _) in enumerate(index.search(lexical_query, settings.hybrid_candidates)):
+                chunk = chunks[position]
+                entry = fused.setdefault(chunk.chunk_id, {'chunk': chunk, 'similarity': 0.0, 'score': 0.0})
+                entry['score'] += lexical_weight / (rrf_k + rank + 1)
+            
+            ranked = sorted(fused.values(), key=lambda entry: entry['score'], reverse=True)[:k]
+            fused_results.append([
+                SearchResult(chunk=entry['chunk'], score=entry['score'] / max_score,
+                             embedding_similarity=entry['similarity'])
+                for entry in ranked
+            ])
+        return fused_results
+    
+    def has_document(self, document_id: str) -> bool:
+        """Check whether a document is already in the vector store."""
+        return self.vector_store.has_document(document_id)
+    
+    def remove_document(self, document_id: str) -> bool:
+        """Remove a document's chunks from the vector store."""
+        self.lexical_indexes.pop(document_id, None)
+        return self.vector_store.remove_document(document_id)
+    
+    def flush(self):
+        """Wait for pending vector store writes."""
+        if isinstance(self.vector_store, FAISSVectorStore):
+            self.vector_store.flush()
     
     def get_stats(self) -> Dict[str, Any]:
         """Get vector store statistics."""
@@ -0,0 +1,50 @@
+import pytest
+from src.context_builder import ContextBuilder
+from src.pdf_processor import PDFProcessor
+from src.models import DocumentChunk, SearchResult
+
+def make_results(texts, document_id="doc"):
+    return [
+        SearchResult(
+            chunk=DocumentChunk(chunk_id=f"{document_id}_{i}", content=text, page_number=1,
+                                chunk_index=i, document_id=document_id),
+            score=1.0,
+            embedding_similarity=1.0
+        )
+        for i, text in enumerate(texts)
+    ]
+
+class TestContextBuilder:
+
+    @pytest.fixture
+    def context_builder(self):
+        return ContextBuilder(PDFProcessor().encoding)
+
+    def test_overlapping_chunks_are_merged(self, context_builder):
+        """Test that neighbouring chunks sharing their overlap become one clause."""
+        first = "The grace period is thirty days. Premiums paid late within the grace period keep cover"
+        second = "within the grace period keep cover active. Lapsed policies may be revived within two years."
+        clauses = context_builder.build(make_results([second, first]), max_tokens=1000)
+        assert clauses == [
+            "The grace period is thirty days. Premiums paid late within the grace period keep cover active. "
+            "Lapsed policies may be revived within two years."
+        ]
+
+    def test_duplicates_dropped_and_documents_kept_apart(self, context_builder):
+        """Test that contained chunks are dropped but equal text from another document is not merged."""
+        text = "Maternity expenses are covered after 24 months of continuous coverage."
+        results = make_results([text, text[:40]]) + make_results([text], document_id="other")
+        assert context_builder.build(results, max_tokens=1000) == [text, text]
+
+    def test_budget_and_clause_limit(self, context_builder):
+        """Test that clauses are packed until the token budget or clause limit is reached."""
+        texts = [f"Clause {i} " + "word " * 50 for i in range(5)]
+        per_clause = context_builder.encoding.encode(texts[0])
+        clauses = context_builder.build(make_results(texts), max_tokens=len(per_clause) * 2 + 5)
+        assert clauses == [texts[0], texts[1]]
+
+        assert len(context_builder.build(make_results(texts), max_tokens=100000, max_clauses=3)) == 3
+
+        truncated = context_builder.build(make_results(texts), max_tokens=10)
+        assert len(truncated) == 1
+        assert len(context_builder.encoding.encode(truncated[0])) <= 10
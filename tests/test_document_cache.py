@@ -0,0 +1,53 @@
+import pytest
+from src.document_cache import DocumentCache, normalize_document_url, hash_document_bytes
+
+class TestDocumentCache:
+
+    @pytest.fixture
+    def document_cache(self, tmp_path):
+        return DocumentCache(cache_path=str(tmp_path / "document_cache.json"))
+
+    def test_normalize_drops_sas_params(self):
+        """Test that re-signed SAS links normalize to the same key."""
+        url_a = "https://acct.blob.core.windows.net/assets/policy.pdf?sv=2023-01-03&st=2025-07-04&se=2025-07-05&sp=r&sig=abc"
+        url_b = "https://ACCT.blob.core.windows.net/assets/policy.pdf?sv=2023-01-03&st=2025-08-01&se=2025-08-02&sp=r&sig=xyz"
+        assert normalize_document_url(url_a) == normalize_document_url(url_b)
+        assert normalize_document_url(url_a) == "https://acct.blob.core.windows.net/assets/policy.pdf"
+
+    def test_normalize_keeps_other_params(self):
+        """Test that non-SAS query parameters still distinguish documents."""
+        assert normalize_document_url("http://example.com/doc?id=1") != normalize_document_url("http://example.com/doc?id=2")
+
+    def test_lookup_by_url_and_hash(self, document_cache):
+        """Test cache lookups by URL and by content hash."""
+        content_hash = hash_document_bytes(b"%PDF-1.4 fake")
+        document_cache.add("http://example.com/a.pdf?sig=1", content_hash, "batch_1234", 12)
+
+        assert document_cache.lookup_url("http://example.com/a.pdf?sig=2")['document_id'] == "batch_1234"
+        assert document_cache.lookup_hash(content_hash)['chunks'] == 12
+        assert document_cache.lookup_url("http://example.com/b.pdf") is None
+        assert document_cache.get_stats()['hits'] == 2
+
+    def test_url_hits_expire_for_revalidation(self, tmp_path):
+        """Test that an old URL mapping misses while the content hash still hits."""
+        cache = DocumentCache(cache_path=str(tmp_path / "document_cache.json"), url_ttl=60)
+        cache.add("http://example.com/a.pdf", "hash_a", "batch_a", 3)
+        assert cache.lookup_url("http://example.com/a.pdf")['document_id'] == "batch_a"
+
+        cache.url_checked[normalize_document_url("http://example.com/a.pdf")] -= 120
+        assert cache.lookup_url("http://example.com/a.pdf") is None
+        assert cache.lookup_hash("hash_a")['document_id'] == "batch_a"
+
+        cache.add("http://example.com/a.pdf", "hash_a", "batch_a", 3)  # Rehashed: bytes unchanged
+        assert cache.lookup_url("http://example.com/a.pdf")['document_id'] == "batch_a"
+
+    def test_persistence_and_removal(self, document_cache):
+        """Test that entries survive reload and can be removed."""
+        document_cache.add("http://example.com/a.pdf", "hash_a", "batch_a", 3)
+
+        reloaded = DocumentCache(cache_path=document_cache.cache_path)
+        assert reloaded.lookup_url("http://example.com/a.pdf")['document_id'] == "batch_a"
+
+        reloaded.remove_document("batch_a")
+        assert reloaded.lookup_url("http://example.com/a.pdf") is None
+        assert reloaded.lookup_hash("hash_a") is None
@@ -0,0 +1,34 @@
+import pytest
+import time
+import numpy as np
+from src.embedding_cache import EmbeddingCache
+
+class TestEmbeddingCache:
+
+    @pytest.fixture
+    def embedding_cache(self, tmp_path):
+        cache = EmbeddingCache(cache_path=str(tmp_path / "embeddings.sqlite"), max_entries=3)
+        yield cache
+        cache.close()
+
+    def test_round_trip_with_normalized_text(self, embedding_cache):
+        """Test that whitespace variants of a text share an entry."""
+        embedding_cache.put_many("model-a", ["Grace  period\nof thirty days"], [[0.1, 0.2, 0.3]])
+
+        hit, miss = embedding_cache.get_many("model-a", ["Grace period of thirty days", "Other text"])
+        assert np.allclose(hit, [0.1, 0.2, 0.3])
+        assert miss is None
+        assert embedding_cache.get_many("model-b", ["Grace period of thirty days"]) == [None]
+
+    def test_lru_eviction(self, embedding_cache):
+        """Test that the least recently used entries are evicted above the bound."""
+        for text, vector in [("a", [1.0]), ("b", [2.0]), ("c", [3.0])]:
+            embedding_cache.put_many("m", [text], [vector])
+            time.sleep(0.01)
+        embedding_cache.get_many("m", ["a"])  # Touch "a" so "b" is the oldest
+        embedding_cache.put_many("m", ["d"], [[4.0]])
+
+        results = embedding_cache.get_many("m", ["a", "b", "c", "d"])
+        assert results[1] is None
+        assert all(r is not None for i, r in enumerate(results) if i != 1)
+        assert embedding_cache.get_stats()["entries"] == 3
@@ -0,0 +1,30 @@
+import pytest
+from src.lexical_index import BM25Index, tokenize
+
+class TestBM25Index:
+
+    @pytest.fixture
+    def index(self):
+        index = BM25Index()
+        index.add([
+            "AYUSH treatment is covered up to the sum insured.",
+            "The grace period for premium payment is thirty days.",
+            "Room rent is capped for plan code NCD-2 at one percent."
+        ])
+        return index
+
+    def test_tokenize(self):
+        """Test that tokens are lowercased words."""
+        assert tokenize("Plan NCD-2, AYUSH!") == ["plan", "ncd", "2", "ayush"]
+
+    def test_exact_terms_rank_first(self, index):
+        """Test that rare exact terms find their document."""
+        assert index.search("Is AYUSH covered?", k=1)[0][0] == 0
+        assert index.search("ncd-2 room rent", k=1)[0][0] == 2
+        assert index.search("unrelated words") == []
+
+    def test_incremental_add(self, index):
+        """Test that documents added later get the next positions."""
+        index.add(["Maternity benefits after 24 months."])
+        assert len(index) == 4
+        assert index.search("maternity", k=5)[0][0] == 3
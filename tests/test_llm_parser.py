@@ -0,0 +1,211 @@
+import pytest
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock, patch
+from src.llm_parser import LLMParser, JSONStringFieldStreamer
+from src.response_cache import ResponseCache
+from src.config import settings
+
+class TestLLMParser:
+
+    @pytest.fixture
+    def llm_parser(self):
+        return LLMParser()
+
+    def test_group_batch_questions_respects_limits(self, llm_parser):
+        """Test that batched questions are split by count and prompt budget."""
+        blocks = [f"Question {i}: short question" for i in range(1, 11)]
+        with patch.object(settings, 'llm_batch_max_questions', 4):
+            groups = llm_parser._group_batch_questions(blocks)
+        assert [len(g) for g in groups] == [4, 4, 2]
+        assert sum(groups, []) == list(range(10))
+
+        with patch.object(settings, 'llm_batch_max_prompt_tokens', llm_parser._count_tokens("x") + 1):
+            groups = llm_parser._group_batch_questions(blocks[:3])
+        assert groups == [[0], [1], [2]]  # Oversized questions still get a call each
+
+    @pytest.mark.asyncio
+    async def test_answer_questions_batch_with_fallback(self, llm_parser):
+        """Test that batched answers map by id and missing ones fall back per question."""
+        batched_response = json.dumps([
+            {"id": 1, "answer": "Thirty days", "conditions": [], "confidence": 0.9},
+            {"id": 3, "answer": "Two years", "conditions": ["continuous cover"], "confidence": 0.8}
+        ])
+        fallback = AsyncMock(return_value={"answer": "Fallback answer", "conditions": [], "confidence": 0.5})
+
+        with patch.object(llm_parser, '_call_llm', AsyncMock(return_value=batched_response)) as mock_call, \
+             patch.object(llm_parser, '_answer_single_question', fallback):
+            results = await llm_parser.answer_questions_batch(
+                ["Grace period?", "Maternity cover?", "PED waiting period?"],
+                [["clause a"], ["clause b"], ["clause c"]]
+            )
+
+        assert mock_call.call_count == 1
+        assert [r["answer"] for r in results] == ["Thirty days", "Fallback answer", "Two years"]
+        fallback.assert_awaited_once_with("Maternity cover?", ["clause b"])
+    
+    @pytest.mark.asyncio
+    async def test_call_llm_caches_responses_but_not_fallbacks(self, llm_parser):
+        """Test that identical calls hit the response cache and fallback answers are not stored."""
+        llm_parser.provider = "groq"
+        llm_parser.client = Mock()
+        llm_parser.response_cache = ResponseCache(persist=False)
+        completion = Mock(choices=[Mock(message=Mock(content="Thirty days"))])
+        llm_parser.client.chat.completions.create = AsyncMock(return_value=completion)
+        
+        assert await llm_parser._call_llm("system", "grace period?") == "Thirty days"
+        assert await llm_parser._call_llm("system", "grace period?") == "Thirty days"
+        assert llm_parser.client.chat.completions.create.await_count == 1
+        
+        llm_parser.client.chat.completions.create = AsyncMock(side_effect=RuntimeError("down"))
+        fallback = await llm_parser._call_llm("system", "maternity?")
+        assert fallback == llm_parser._fallback_response("maternity?")
+        await llm_parser._call_llm("system", "maternity?")
+        assert llm_parser.client.chat.completions.create.await_count == 2
+    
+    def test_json_string_field_streamer_decodes_split_escapes(self):
+        """Test that the answer field is extracted incrementally across arbitrary split points."""
+        raw = '{"answer": "Thirty \\"grace\\" days\\n\\u00e9t\u00e9", "confidence": 0.9, "answer2": "x"}'
+        streamer = JSONStringFieldStreamer("answer")
+        assert "".join(streamer.feed(char) for char in raw) == json.loads(raw)["answer"]
+    
+    @pytest.mark.asyncio
+    async def test_call_llm_streams_tokens(self, llm_parser):
+        """Test that on_token receives streamed deltas and the joined text is returned and cached."""
+        llm_parser.provider = "groq"
+        llm_parser.client = Mock()
+        llm_parser.response_cache = ResponseCache(persist=False)
+        
+        async def fake_stream():
+            for delta in ["Thirty", " days", None]:
+                yield Mock(choices=[Mock(delta=Mock(content=delta))])
+        
+        llm_parser.client.chat.completions.create = AsyncMock(return_value=fake_stream())
+        tokens = []
+        assert await llm_parser._call_llm("system", "grace period?", on_token=tokens.append) == "Thirty days"
+        assert tokens == ["Thirty", " days"]
+        assert llm_parser.client.chat.completions.create.await_args.kwargs["stream"] is True
+        
+        cached_tokens = []
+        assert await llm_parser._call_llm("system", "grace period?", on_token=cached_tokens.append) == "Thirty days"
+        assert cached_tokens == ["Thirty days"]
+    
+    @pytest.mark.asyncio
+    async def test_call_llm_retries_then_fails_over(self, llm_parser):
+        """Test that 429s are retried with backoff and a persistent failure moves to the next provider."""
+        rate_limited = Exception("rate limited")
+        rate_limited.status_code = 429
+        llm_parser.provider = "groq"
+        llm_parser.client = Mock()
+        llm_parser.client.chat.completions.create = AsyncMock(side_effect=rate_limited)
+        backup = Mock()
+        backup.chat.completions.create = AsyncMock(
+            return_value=Mock(choices=[Mock(message=Mock(content="Thirty days"))])
+        )
+        llm_parser.failover_clients = {"openai": (backup, "gpt-4o-mini")}
+        llm_parser.response_cache = None
+        
+        with patch.object(settings, 'llm_max_retries', 2), patch.object(settings, 'llm_retry_base_delay', 0.001):
+            assert await llm_parser._call_llm("system", "grace period?") == "Thirty days"
+        
+        assert llm_parser.client.chat.completions.create.await_count == 3
+        assert backup.chat.completions.create.await_args.kwargs["model"] == "gpt-4o-mini"
+        assert llm_parser.get_routing_stats()["latency"]["groq"]["retries"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_call_llm_hedges_slow_provider(self, llm_parser):
+        """Test that a call slower than the provider's latency percentile is raced against the next provider."""
+        async def slow_create(**kwargs):
+            await asyncio.sleep(1)
+            return Mock(choices=[Mock(message=Mock(content="slow answer"))])
+        
+        llm_parser.provider = "groq"
+        llm_parser.client = Mock()
+        llm_parser.client.chat.completions.create = slow_create
+        backup = Mock()
+        backup.chat.completions.create = AsyncMock(
+            return_value=Mock(choices=[Mock(message=Mock(content="fast answer"))])
+        )
+        llm_parser.failover_clients = {"openai": (backup, "gpt-4o-mini")}
+        llm_parser.response_cache = None
+        for _ in range(20):
+            llm_parser._get_latency_tracker("groq").record(0.01)
+        
+        with patch.object(settings, 'llm_hedge_enabled', True):
+            assert await llm_parser._call_llm("system", "grace period?") == "fast answer"
+        
+        assert llm_parser.hedged_calls == 1
+        assert llm_parser.hedge_wins == 1
+    
+    @pytest.mark.asyncio
+    async def test_hedge_delay_excludes_local_queueing(self, llm_parser):
+        """Test that a call waiting for a local provider slot is not hedged."""
+        llm_parser.provider = "groq"
+        llm_parser.client = Mock()
+        llm_parser.client.chat.completions.create = AsyncMock(
+            return_value=Mock(choices=[Mock(message=Mock(content="primary answer"))])
+        )
+        backup = Mock()
+        backup.chat.completions.create = AsyncMock()
+        llm_parser.failover_clients = {"openai": (backup, "gpt-4o-mini")}
+        llm_parser.response_cache = None
+        for _ in range(20):
+            llm_parser._get_latency_tracker("groq").record(0.01)
+        
+        semaphore = llm_parser._get_semaphore("groq")
+        await semaphore.acquire()
+        with patch.object(settings, 'llm_hedge_enabled', True):
+            call = asyncio.create_task(llm_parser._call_llm("system", "grace period?"))
+            await asyncio.sleep(0.1)  # Queued well past the 0.01s hedge threshold
+            semaphore.release()
+            assert await call == "primary answer"
+        
+        assert llm_parser.hedged_calls == 0
+        backup.chat.completions.create.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_token_estimate_only_with_tpm_limit(self, llm_parser):
+        """Test that prompts are tokenized for rate limiting only when a TPM limit is configured."""
+        llm_parser.provider = "groq"
+        llm_parser.client = Mock()
+        llm_parser.client.chat.completions.create = AsyncMock(
+            return_value=Mock(choices=[Mock(message=Mock(content="Thirty days"))])
+        )
+        llm_parser.response_cache = None
+        
+        with patch.object(llm_parser, '_count_tokens', wraps=llm_parser._count_tokens) as count_tokens:
+            await llm_parser._call_llm("system", "grace period?")
+            assert count_tokens.call_count == 0
+            
+            with patch.object(settings, 'groq_tpm', 100000):
+                llm_parser._rate_limiters.clear()
+                await llm_parser._call_llm("system", "maternity?")
+            assert count_tokens.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_fast_response_flags_failures(self, llm_parser):
+        """Test that answers built from a provider outage or a failed analysis are flagged as failed."""
+        good = json.dumps({"answer": "Thirty days", "conditions": [], "confidence": 0.9})
+        analysis = {"answer": "Thirty days", "applicable_conditions": [], "failed": False}
+        
+        with patch.object(llm_parser, '_call_llm', AsyncMock(return_value=good)):
+            assert (await llm_parser.generate_fast_response("grace?", analysis, "clause"))["failed"] is False
+            degraded = await llm_parser.generate_fast_response("grace?", {**analysis, "failed": True}, "clause")
+            assert degraded["failed"] is True
+        
+        with patch.object(llm_parser, '_call_llm', AsyncMock(return_value=llm_parser._fallback_response("x"))):
+            assert (await llm_parser.generate_fast_response("grace?", analysis, "clause"))["failed"] is True
+            assert (await llm_parser.parse_and_evaluate_combined("grace?", ["clause"]))["failed"] is True
+    
+    @pytest.mark.asyncio
+    async def test_answer_questions_batch_outage_skips_per_question_fallback(self, llm_parser):
+        """Test that a batched call that got the fallback response is not retried question by question."""
+        fallback = AsyncMock()
+        with patch.object(llm_parser, '_call_llm', AsyncMock(return_value=llm_parser._fallback_response("x"))) as mock_call, \
+             patch.object(llm_parser, '_answer_single_question', fallback):
+            results = await llm_parser.answer_questions_batch(["Grace period?", "Maternity cover?"], [["a"], ["b"]])
+        
+        assert mock_call.await_count == 1
+        fallback.assert_not_awaited()
+        assert all(result["failed"] for result in results)
+        assert results[0]["answer"] == json.loads(llm_parser._fallback_response("x"))["answer"]
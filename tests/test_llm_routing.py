@@ -0,0 +1,42 @@
+import pytest
+import asyncio
+from unittest.mock import Mock
+from src.llm_routing import ProviderError, LatencyTracker, backoff_delay
+
+class TestLLMRouting:
+
+    def test_provider_error_classification(self):
+        """Test that rate limits, server errors and connection failures are retryable, others are not."""
+        assert ProviderError("groq", "rate limited", status_code=429).retryable
+        assert ProviderError("groq", "bad gateway", status_code=502).retryable
+        assert not ProviderError("groq", "bad request", status_code=400).retryable
+
+        sdk_error = Exception("unauthorized")
+        sdk_error.status_code = 401
+        assert not ProviderError.from_exception("openai", sdk_error).retryable
+
+        http_error = Exception("overloaded")
+        http_error.response = Mock(status_code=503)
+        assert ProviderError.from_exception("gemini", http_error).status_code == 503
+
+        class APIConnectionError(Exception):
+            pass
+
+        assert ProviderError.from_exception("groq", APIConnectionError("reset")).retryable
+        assert ProviderError.from_exception("groq", asyncio.TimeoutError()).retryable
+        assert not ProviderError.from_exception("groq", ValueError("bad json")).retryable
+
+    def test_backoff_delay_is_jittered_and_capped(self):
+        """Test that backoff grows exponentially up to the cap."""
+        delays = [backoff_delay(attempt, 0.5, 4.0) for attempt in range(6) for _ in range(50)]
+        assert all(0 <= delay <= 4.0 for delay in delays)
+        assert max(backoff_delay(0, 0.5, 4.0) for _ in range(50)) <= 0.5
+
+    def test_latency_percentile_needs_samples(self):
+        """Test that percentiles are withheld until enough latencies are recorded."""
+        tracker = LatencyTracker(window=100)
+        for i in range(1, 101):
+            tracker.record(i / 100)
+        assert tracker.percentile(95, min_samples=200) is None
+        assert tracker.percentile(95, min_samples=20) == pytest.approx(0.95, abs=0.01)
+        assert tracker.get_stats()["p50_seconds"] == pytest.approx(0.5, abs=0.02)
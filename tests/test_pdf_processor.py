@@ -1,26 +1,44 @@
 import pytest
-import asyncio
-from unittest.mock import Mock, patch
-from src.pdf_processor import PDFProcessor
+import os
+import httpx
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+from src.pdf_processor import PDFProcessor, get_extraction_pool, shutdown_extraction_pool
+from src.extraction_cache import ExtractionCache
+from src.config import settings
 
 class TestPDFProcessor:
     
     @pytest.fixture
-    def pdf_processor(self):
-        return PDFProcessor()
+    def pdf_processor(self, tmp_path):
+        processor = PDFProcessor()
+        processor.extraction_cache = ExtractionCache(cache_dir=str(tmp_path / "extraction_cache"))
+        return processor
     
     @pytest.mark.asyncio
     async def test_download_pdf_success(self, pdf_processor):
         """Test successful PDF download."""
-        mock_response = Mock()
-        mock_response.content = b"fake_pdf_content"
-        mock_response.headers = {"content-type": "application/pdf"}
-        mock_response.raise_for_status = Mock()
+        def handler(request):
+            return httpx.Response(200, content=b"fake_pdf_content",
+                                  headers={"content-type": "application/pdf"})
         
-        with patch('requests.get', return_value=mock_response):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch('src.pdf_processor.get_async_client', return_value=client):
             result = await pdf_processor.download_pdf_from_blob("http://example.com/test.pdf")
             assert result == b"fake_pdf_content"
     
+    @pytest.mark.asyncio
+    async def test_download_pdf_size_limit(self, pdf_processor):
+        """Test that downloads over the size limit are rejected."""
+        def handler(request):
+            return httpx.Response(200, content=b"x" * 2048, headers={"content-type": "application/pdf"})
+        
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch('src.pdf_processor.get_async_client', return_value=client), \
+             patch.object(settings, 'pdf_max_download_bytes', 1024):
+            with pytest.raises(Exception, match="limit"):
+                await pdf_processor.download_pdf_from_blob("http://example.com/big.pdf")
+    
     def test_clean_text(self, pdf_processor):
         """Test text cleaning functionality."""
         dirty_text = "This  is\xa0\xa0\xa0  some\n\n\n  dirty   text\u2019s"
@@ -42,3 +60,162 @@ class TestPDFProcessor:
         sentences = pdf_processor._split_into_sentences(text)
         assert len(sentences) == 3
         assert "First sentence" in sentences[0]
+    
+    def test_chunk_text_sizes_and_overlap(self, pdf_processor):
+        """Test that chunks stay within the token budget, overlap, and keep page numbers."""
+        sentences = [f"Clause {i} states that the waiting period is {i} months." for i in range(40)]
+        pages = [
+            {'page_number': 1, 'text': " ".join(sentences[:25])},
+            {'page_number': 2, 'text': " ".join(sentences[25:])}
+        ]
+        with patch.object(settings, 'chunk_size', 200), patch.object(settings, 'chunk_overlap', 30):
+            chunks = pdf_processor.chunk_text(pages, "doc")
+        
+        assert len(chunks) > 2
+        assert [c.chunk_index for c in chunks] == list(range(len(chunks)))
+        assert chunks[0].metadata['token_count'] <= 200
+        for chunk in chunks:
+            # Overlap is carried in front of whole sentences, as before
+            assert chunk.metadata['token_count'] <= 200 + 30
+            # Span counts may include whitespace trimmed from either edge of the content
+            assert abs(chunk.metadata['token_count'] - pdf_processor.count_tokens(chunk.content)) <= 2
+        
+        page_one = [c for c in chunks if c.page_number == 1]
+        assert "Clause 0 " in page_one[0].content
+        assert "Clause 24 " in page_one[-1].content
+        # Consecutive chunks on a page share the overlap tokens
+        assert page_one[0].content[-20:] in page_one[1].content
+        assert all("Clause 25 " not in c.content for c in page_one)
+    
+    def test_chunk_across_pages_records_span(self, pdf_processor):
+        """Test that cross-page chunks keep straddling clauses whole and record their page span."""
+        pages = [
+            {'page_number': 1, 'text': "Intro text. The grace period for premium payment is"},
+            {'page_number': 2, 'text': "thirty days from the due date. Other terms apply."},
+            {'page_number': 3, 'text': "Short tail."}
+        ]
+        with patch.object(settings, 'chunk_across_pages', True):
+            chunks = pdf_processor.chunk_text(pages, "doc")
+        
+        assert len(chunks) == 1
+        assert "premium payment is\n\nthirty days" in chunks[0].content
+        assert (chunks[0].page_start, chunks[0].page_end) == (1, 3)
+        assert chunks[0].pages == [1, 2, 3]
+        
+        per_page = pdf_processor.chunk_text(pages, "doc")
+        assert len(per_page) == 3
+        assert [c.pages for c in per_page] == [[1], [2], [3]]
+    
+    @pytest.mark.asyncio
+    async def test_structure_chunking_aligns_to_clauses(self, pdf_processor):
+        """Test that structure chunking emits one chunk per numbered clause labelled with its heading."""
+        import fitz
+        doc = fitz.open()
+        page = doc.new_page()
+        for y, text, size, font in [
+            (72, "Introduction to the policy wording.", 11, "helv"),
+            (110, "SECTION 4: BENEFITS", 16, "hebo"),
+            (150, "4.1 A grace period of thirty days is allowed for premium payment.", 11, "helv"),
+            (190, "4.2 Maternity expenses are covered after 24 months.", 11, "helv")
+        ]:
+            page.insert_text((72, y), text, fontsize=size, fontname=font)
+        doc.new_page().insert_text((72, 72), "Continued: twin deliveries count once.", fontsize=11)
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        
+        with patch.object(settings, 'chunking_strategy', 'structure'), \
+             patch.object(settings, 'pdf_extraction_workers', 1):
+            pages = await pdf_processor.extract_pages(pdf_bytes)
+            chunks = pdf_processor.chunk_text(pages, "doc")
+        
+        assert [c.metadata.get('section') for c in chunks] == [
+            None, "SECTION 4: BENEFITS > 4.1", "SECTION 4: BENEFITS > 4.2"
+        ]
+        assert chunks[1].content.startswith("SECTION 4: BENEFITS 4.1 A grace period")
+        assert "4.2" not in chunks[1].content
+        assert chunks[2].pages == [1, 2]
+        assert chunks[2].content.endswith("twin deliveries count once.")
+    
+    @pytest.mark.asyncio
+    async def test_sharded_extraction_matches_serial(self, pdf_processor):
+        """Test that pages extracted across worker processes come back complete and in order."""
+        import fitz
+        doc = fitz.open()
+        for i in range(5):
+            doc.new_page().insert_text((72, 72), f"Page {i + 1} says the grace period is thirty days.")
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        
+        serial = pdf_processor.extract_text_pymupdf(pdf_bytes)
+        with patch.object(settings, 'pdf_extraction_workers', 2), \
+             patch.object(settings, 'pdf_pages_per_shard', 2):
+            try:
+                sharded = await pdf_processor.extract_pages(pdf_bytes)
+            finally:
+                shutdown_extraction_pool()
+        
+        assert [p['page_number'] for p in sharded] == [1, 2, 3, 4, 5]
+        assert sharded == serial
+    
+    @pytest.mark.asyncio
+    async def test_extraction_recovers_from_dead_worker(self, pdf_processor):
+        """Test that a worker crash breaks only the in-flight extraction's pool, not later extractions."""
+        import fitz
+        doc = fitz.open()
+        for i in range(4):
+            doc.new_page().insert_text((72, 72), f"Page {i + 1} says the grace period is thirty days.")
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        
+        with patch.object(settings, 'pdf_extraction_workers', 2), \
+             patch.object(settings, 'pdf_pages_per_shard', 2):
+            try:
+                broken_pool = get_extraction_pool()
+                with pytest.raises(BrokenProcessPool):
+                    broken_pool.submit(os._exit, 1).result()
+                
+                pdf_processor.extraction_cache = None
+                first = await pdf_processor.extract_pages(pdf_bytes)
+                assert get_extraction_pool() is not broken_pool
+                second = await pdf_processor.extract_pages(pdf_bytes)
+            finally:
+                shutdown_extraction_pool()
+        
+        assert [p['page_number'] for p in first] == [1, 2, 3, 4]
+        assert second == first
+    
+    @pytest.mark.asyncio
+    async def test_extraction_cache_skips_parsing(self, pdf_processor):
+        """Test that re-extracting the same PDF bytes is served from the extraction cache."""
+        import fitz
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), "The grace period is thirty days.")
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        
+        with patch.object(settings, 'pdf_extraction_workers', 1):
+            first = await pdf_processor.extract_pages(pdf_bytes)
+            with patch('src.pdf_processor.extract_pages_pymupdf', side_effect=AssertionError("re-parsed")):
+                second = await pdf_processor.extract_pages(pdf_bytes)
+        
+        assert second == first
+        stats = pdf_processor.extraction_cache.get_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+    
+    def test_extraction_cache_evicts_least_recently_used(self, tmp_path):
+        """Test that the extraction cache stays under its byte limit, dropping the least recently used entry."""
+        cache = ExtractionCache(cache_dir=str(tmp_path / "extraction_cache"), max_bytes=10 ** 9)
+        pages = [{'page_number': 1, 'text': "x" * 2000, 'char_count': 2000}]
+        for name in ("aa", "bb"):
+            cache.put(name * 32, "text", pages)
+        
+        os.utime(cache._path("aa" * 32, "text"), (1, 1))
+        os.utime(cache._path("bb" * 32, "text"), (2, 2))
+        assert cache.get("aa" * 32, "text") == pages  # Now the most recently used
+        
+        cache.max_bytes = cache.total_bytes + 1
+        cache.put("cc" * 32, "text", pages)
+        assert cache.get("bb" * 32, "text") is None
+        assert cache.get("aa" * 32, "text") == pages
+        assert cache.get("cc" * 32, "text") == pages
+        assert cache.total_bytes <= cache.max_bytes
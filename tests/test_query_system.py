@@ -2,7 +2,10 @@ import pytest
 import asyncio
 from unittest.mock import Mock, AsyncMock, patch
 from src.query_retrieval_system import QueryRetrievalSystem
+from src.semantic_cache import SemanticCache
+from src.document_cache import DocumentCache
 from src.models import QueryRequest, QueryIntent
+from src.config import settings
 
 class TestQueryRetrievalSystem:
     
@@ -91,3 +94,214 @@ class TestQueryRetrievalSystem:
         
         assert doc_id in query_system.document_store
         assert query_system.document_store[doc_id]['status'] == 'processed'
+    
+    @pytest.mark.asyncio
+    async def test_batch_queries_keep_order_and_isolate_failures(self, query_system):
+        """Test that concurrent batch answers stay in order and failures stay per-question."""
+        
+        async def fake_search_many(queries, k=5, document_id=None, **kwargs):
+            return [
+                [Mock(chunk=Mock(content=f"clause for {query}", page_number=1,
+                                 chunk_id="c1", chunk_index=0, metadata={}), score=0.9)]
+                for query in queries
+            ]
+        
+        async def fake_combined(question, clauses):
+            if question == "broken":
+                raise RuntimeError("llm exploded")
+            await asyncio.sleep(0.05 if question == "slow" else 0)
+            return {"answer": f"answer to {question}", "applicable_conditions": []}
+        
+        async def fake_fast(question, analysis, clause, on_answer_token=None):
+            return {"answer": analysis["answer"]}
+        
+        with patch.object(query_system, '_get_or_process_document', AsyncMock(return_value="doc_1")), \
+             patch.object(query_system.vector_search, 'search_many', side_effect=fake_search_many), \
+             patch.object(query_system.llm_parser, 'parse_and_evaluate_combined', side_effect=fake_combined), \
+             patch.object(query_system.llm_parser, 'generate_fast_response', side_effect=fake_fast):
+            
+            answers = await query_system.process_batch_queries(
+                "http://example.com/policy.pdf", ["slow", "broken", "fast"]
+            )
+        
+        assert answers[0] == "answer to slow"
+        assert answers[1].startswith("Unable to process this question")
+        assert answers[2] == "answer to fast"
+    
+    @pytest.mark.asyncio
+    async def test_lazy_document_embeds_candidate_pages_then_backfills(self, query_system):
+        """Test that lazy ingestion embeds question-matched pages first and the backfill the rest."""
+        pages = [
+            {'page_number': i + 1, 'text': f"Page {i + 1} covers general terms and definitions."}
+            for i in range(20)
+        ]
+        pages[13]['text'] = "Maternity expenses are covered after a waiting period of 24 months."
+        added = []
+        
+        async def fake_add(chunks):
+            added.extend(chunks)
+        
+        with patch.object(settings, 'lazy_backfill', False), \
+             patch.object(settings, 'lazy_candidate_pages', 1), \
+             patch.object(query_system.vector_search, 'add_document_chunks', side_effect=fake_add):
+            query_system._start_lazy_document("doc_lazy", "http://example.com/huge.pdf", pages)
+            await query_system._ensure_candidate_pages("doc_lazy", ["What is the maternity waiting period?"])
+            
+            assert [chunk.page_number for chunk in added] == [14]
+            assert query_system._find_lazy_document(url="http://example.com/huge.pdf?sig=x") == "doc_lazy"
+            
+            await query_system._backfill_lazy_document("doc_lazy")
+        
+        assert sorted(chunk.page_number for chunk in added) == list(range(1, 21))
+        assert len({chunk.chunk_id for chunk in added}) == len(added)
+        assert "doc_lazy" not in query_system.lazy_documents
+        assert query_system.document_store["doc_lazy"]['status'] == 'processed'
+    
+    @pytest.mark.asyncio
+    async def test_interrupted_lazy_ingestion_resumes_after_restart(self, query_system, tmp_path):
+        """Test that a lazy document is cached as incomplete and its backfill resumes after a restart."""
+        pages = [{'page_number': i + 1, 'text': f"Page {i + 1} covers general terms."} for i in range(10)]
+        url = "http://example.com/huge.pdf"
+        added = []
+        
+        async def fake_add(chunks):
+            added.extend(chunks)
+        
+        def restarted_system():
+            system = QueryRetrievalSystem()
+            system.document_cache = DocumentCache(cache_path=str(tmp_path / "document_cache.json"))
+            system.pdf_processor.download_pdf_from_blob = AsyncMock(return_value=b"%PDF-huge")
+            system.pdf_processor.extract_pages = AsyncMock(return_value=pages)
+            system.vector_search.add_document_chunks = AsyncMock(side_effect=fake_add)
+            system.vector_search.get_document_chunks = Mock(side_effect=lambda document_id: list(added))
+            system.vector_search.has_document = Mock(return_value=True)
+            return system
+        
+        with patch.object(settings, 'document_cache_enabled', True), \
+             patch.object(settings, 'lazy_ingestion_min_pages', 5), \
+             patch.object(settings, 'lazy_backfill', False):
+            first = restarted_system()
+            document_id = await first._get_or_process_document(url)
+            assert first._ingest_locks == {}
+            await first._embed_lazy_pages(document_id, [0, 1])
+            assert first.document_cache.lookup_url(url)['complete'] is False
+            
+            # Restart: the partial partition is on disk but the lazy state is gone
+            second = restarted_system()
+            assert await second._get_or_process_document(url) == document_id
+            assert second.lazy_documents[document_id]['pending'] == set(range(2, 10))
+            
+            await second._backfill_lazy_document(document_id)
+        
+        assert sorted(chunk.page_number for chunk in added) == list(range(1, 11))
+        entry = second.document_cache.lookup_url(url)
+        assert entry['complete'] is True
+        assert entry['chunks'] == len(added)
+    
+    @pytest.mark.asyncio
+    async def test_failed_backfill_retries_then_restarts(self, query_system):
+        """Test that a failing backfill step is retried, and a backfill that gave up restarts on the next request."""
+        pages = [{'page_number': i + 1, 'text': f"Page {i + 1} covers general terms."} for i in range(4)]
+        failures = [RuntimeError("embedding backend down")] * 3
+        
+        async def flaky_add(chunks):
+            if failures:
+                raise failures.pop()
+        
+        with patch.object(settings, 'lazy_backfill', True), \
+             patch.object(settings, 'lazy_backfill_retries', 1), \
+             patch.object(query_system.vector_search, 'add_document_chunks', side_effect=flaky_add), \
+             patch('src.query_retrieval_system.asyncio.sleep', AsyncMock()) as sleep:
+            query_system._start_lazy_document("doc_lazy", "http://example.com/huge.pdf", pages)
+            await query_system.lazy_documents["doc_lazy"]['task']
+            
+            assert sleep.await_count == 1
+            assert query_system.document_store["doc_lazy"]['status'] == 'partial'
+            assert query_system._find_lazy_document(url="http://example.com/huge.pdf") == "doc_lazy"
+            
+            query_system._restart_backfill("doc_lazy")
+            await query_system.lazy_documents["doc_lazy"]['task']
+        
+        assert "doc_lazy" not in query_system.lazy_documents
+        assert query_system.document_store["doc_lazy"]['status'] == 'processed'
+    
+    @pytest.mark.asyncio
+    async def test_reprocess_resets_document_cache_entry(self, query_system, tmp_path):
+        """Test that reprocessing replaces the cache entry, so a lazy re-ingestion is recorded as incomplete."""
+        url = "http://example.com/policy.pdf"
+        query_system.document_cache = DocumentCache(cache_path=str(tmp_path / "document_cache.json"))
+        query_system.document_cache.add(url, "old_hash", "doc_1", 40)
+        query_system.document_store["doc_1"] = {'url': url, 'chunks': 40, 'status': 'processed',
+                                                'content_hash': "old_hash"}
+        
+        async def lazy_process(blob_url, document_id, pdf_bytes=None):
+            query_system.lazy_documents[document_id] = {'url': blob_url, 'pending': {0}, 'task': None}
+            query_system.document_store[document_id] = {'url': blob_url, 'chunks': 0, 'status': 'indexing'}
+            return document_id
+        
+        with patch.object(settings, 'document_cache_enabled', True), \
+             patch.object(query_system.pdf_processor, 'download_pdf_from_blob', AsyncMock(return_value=b"%PDF-v2")), \
+             patch.object(query_system, 'process_document', side_effect=lazy_process):
+            assert await query_system.reprocess_document("doc_1")
+        
+        assert query_system.document_cache.lookup_hash("old_hash") is None
+        assert query_system.document_cache.lookup_url(url)['complete'] is False
+    
+    @pytest.mark.asyncio
+    async def test_semantic_cache_skips_answered_questions(self, query_system):
+        """Test that near-duplicate questions are answered from the cache and failures are not cached."""
+        query_system.semantic_cache = SemanticCache(threshold=0.9)
+        vectors = {"grace period?": [1.0, 0.0], "premium grace period?": [0.99, 0.05], "maternity?": [0.0, 1.0]}
+        
+        async def fake_embeddings(texts):
+            return [vectors[text] for text in texts]
+        
+        answer_questions = AsyncMock(side_effect=[
+            [("Thirty days", True), ("Unable to determine from the clauses", False)],
+            [("Nine months", True)]
+        ])
+        with patch.object(query_system, '_get_or_process_document', AsyncMock(return_value="doc_1")), \
+             patch.object(query_system.vector_search.embedding_generator, 'generate_query_embeddings', side_effect=fake_embeddings), \
+             patch.object(query_system, '_answer_questions', answer_questions):
+            first = await query_system.process_batch_queries("http://example.com/p.pdf", ["grace period?", "maternity?"])
+            second = await query_system.process_batch_queries(
+                "http://example.com/p.pdf", ["premium grace period?", "maternity?"]
+            )
+        
+        assert first == ["Thirty days", "Unable to determine from the clauses"]
+        assert second == ["Thirty days", "Nine months"]
+        assert answer_questions.await_args_list[1].args[1] == ["maternity?"]
+    
+    @pytest.mark.asyncio
+    async def test_stream_batch_queries_yields_answers_as_they_complete(self, query_system):
+        """Test that streamed answers arrive in completion order with tokens, then all answers in order."""
+        
+        async def fake_search_many(queries, k=5, document_id=None, **kwargs):
+            return [
+                [Mock(chunk=Mock(content=f"clause for {query}", page_number=1,
+                                 chunk_id="c1", chunk_index=0, metadata={}), score=0.9)]
+                for query in queries
+            ]
+        
+        async def fake_combined(question, clauses):
+            return {"answer": f"answer to {question}", "applicable_conditions": []}
+        
+        async def fake_fast(question, analysis, clause, on_answer_token=None):
+            await asyncio.sleep(0.05 if question == "slow" else 0)
+            for word in analysis["answer"].split(" "):
+                on_answer_token(word + " ")
+            return {"answer": analysis["answer"]}
+        
+        with patch.object(query_system, '_get_or_process_document', AsyncMock(return_value="doc_1")), \
+             patch.object(query_system.vector_search, 'search_many', side_effect=fake_search_many), \
+             patch.object(query_system.llm_parser, 'parse_and_evaluate_combined', side_effect=fake_combined), \
+             patch.object(query_system.llm_parser, 'generate_fast_response', side_effect=fake_fast):
+            events = [event async for event in query_system.stream_batch_queries(
+                "http://example.com/policy.pdf", ["slow", "fast"], stream_tokens=True
+            )]
+        
+        answers = [(event["index"], event["answer"]) for event in events if event["type"] == "answer"]
+        assert answers == [(1, "answer to fast"), (0, "answer to slow")]
+        assert "".join(event["text"] for event in events
+                       if event["type"] == "token" and event["index"] == 0) == "answer to slow "
+        assert events[-1] == {"type": "done", "answers": ["answer to slow", "answer to fast"]}
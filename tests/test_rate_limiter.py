@@ -0,0 +1,48 @@
+import pytest
+import asyncio
+from src.rate_limiter import RateLimiter, PRIORITY_HIGH, PRIORITY_NORMAL
+
+class TestRateLimiter:
+
+    @pytest.mark.asyncio
+    async def test_disabled_limiter_never_waits(self):
+        """Test that a limiter without limits grants immediately."""
+        limiter = RateLimiter()
+        await asyncio.wait_for(limiter.acquire(10 ** 6), timeout=0.1)
+        assert limiter.get_stats()["queue_depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_queued_requests_are_served_by_priority(self):
+        """Test that an exhausted bucket queues callers and releases high priority first."""
+        limiter = RateLimiter(rpm=1200)  # 20 requests per second
+        limiter.requests.level = 0
+        order = []
+
+        async def call(name, priority):
+            await limiter.acquire(priority=priority)
+            order.append(name)
+
+        tasks = [asyncio.create_task(call(name, priority)) for name, priority in
+                 [("normal-1", PRIORITY_NORMAL), ("normal-2", PRIORITY_NORMAL), ("high", PRIORITY_HIGH)]]
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 3
+
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=2)
+        assert order == ["high", "normal-1", "normal-2"]
+        assert limiter.get_stats()["delayed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_token_budget_limits_throughput(self):
+        """Test that tokens-per-minute holds back requests whose estimate exceeds what is left."""
+        limiter = RateLimiter(tpm=60000)  # 1000 tokens per second
+        await limiter.acquire(59000)
+        granted = asyncio.create_task(limiter.acquire(500))
+        waiting = asyncio.create_task(limiter.acquire(2000))
+        await asyncio.sleep(0.05)
+        assert granted.done()
+        assert not waiting.done()
+        assert limiter.queue_depth == 1
+
+        waiting.cancel()
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 0
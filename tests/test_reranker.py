@@ -0,0 +1,65 @@
+import pytest
+import asyncio
+import time
+from unittest.mock import patch
+from src.reranker import Reranker
+from src.models import DocumentChunk, SearchResult
+from src.config import settings
+
+def make_results(texts):
+    return [
+        SearchResult(
+            chunk=DocumentChunk(chunk_id=f"c{i}", content=text, page_number=1, chunk_index=i, document_id="doc"),
+            score=1.0 - i * 0.1,
+            embedding_similarity=1.0 - i * 0.1
+        )
+        for i, text in enumerate(texts)
+    ]
+
+class TestReranker:
+
+    @pytest.fixture
+    def reranker(self):
+        reranker = Reranker()
+        # Score by word overlap so the expected order is obvious
+        reranker.model.predict = lambda pairs, **kwargs: [
+            len(set(q.lower().split()) & set(d.lower().split())) / 10 for q, d in pairs
+        ]
+        return reranker
+
+    @pytest.mark.asyncio
+    async def test_rerank_many_reorders_trims_and_caches(self, reranker):
+        """Test that candidates are rescored in one batch, cut to top_k and cached."""
+        results = make_results([
+            "room rent limits apply",
+            "the grace period is thirty days",
+            "premium grace period of thirty days after due date"
+        ])
+        with patch.object(settings, 'reranker_top_k', 2):
+            reranked = await reranker.rerank_many(
+                ["grace period thirty days", "room rent"], [results, results]
+            )
+            again = await reranker.rerank("grace period thirty days", results)
+
+        assert [r.chunk.chunk_id for r in reranked[0]] == ["c1", "c2"]
+        assert reranked[1][0].chunk.chunk_id == "c0"
+        assert [r.chunk.chunk_id for r in again] == ["c1", "c2"]
+        assert reranker.get_stats()["misses"] == 6
+        assert reranker.get_stats()["hits"] == 3
+
+    @pytest.mark.asyncio
+    async def test_budget_overrun_keeps_retrieval_order(self, reranker):
+        """Test that a slow model falls back to the retrieval order."""
+        def slow_predict(pairs, **kwargs):
+            time.sleep(0.2)
+            return [0.0] * len(pairs)
+
+        reranker.model.predict = slow_predict
+        results = make_results(["a", "b", "c", "d"])
+        with patch.object(settings, 'reranker_budget_ms', 50):
+            reranked = await reranker.rerank("query", results)
+
+        assert reranked == results
+        assert reranker.get_stats()["budget_exceeded"] == 1
+        await asyncio.sleep(0.25)  # Late scores still warm the cache
+        assert reranker.get_stats()["cached_scores"] == 4
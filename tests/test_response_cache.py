@@ -0,0 +1,74 @@
+import pytest
+import time
+from unittest.mock import patch
+from src.response_cache import ResponseCache
+import src.response_cache as response_cache_module
+from src.config import settings
+
+class TestResponseCache:
+
+    @pytest.fixture
+    def response_cache(self, tmp_path):
+        return ResponseCache(cache_path=str(tmp_path / "response_cache.sqlite"), persist=True)
+
+    def test_key_covers_request_parameters(self):
+        """Test that any change in the request gives a different key."""
+        key = ResponseCache.make_key("groq", "llama", 0.1, 800, "system", "user")
+        assert key == ResponseCache.make_key("groq", "llama", 0.1, 800, "system", "user")
+        assert key != ResponseCache.make_key("openai", "llama", 0.1, 800, "system", "user")
+        assert key != ResponseCache.make_key("groq", "llama", 0.1, 400, "system", "user")
+        assert key != ResponseCache.make_key("groq", "llama", 0.1, 800, "system", "user 2")
+
+    @pytest.mark.asyncio
+    async def test_memory_and_disk_tiers(self, response_cache):
+        """Test that responses are served from memory, then from disk after a restart."""
+        response_cache.put("k1", "answer one")
+        assert await response_cache.get("k1") == "answer one"
+        assert await response_cache.get("k2") is None
+
+        response_cache.flush()  # Disk writes are queued on the writer thread
+        reopened = ResponseCache(cache_path=response_cache.cache_path, persist=True)
+        assert await reopened.get("k1") == "answer one"
+        assert await reopened.get("k1") == "answer one"
+        assert reopened.get_stats()["disk_hits"] == 1
+        assert reopened.get_stats()["memory_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_and_size_caps(self, tmp_path):
+        """Test that expired entries miss and the memory tier stays bounded."""
+        with patch.object(settings, 'response_cache_ttl', 0.05), \
+             patch.object(settings, 'response_cache_max_entries', 2):
+            cache = ResponseCache(persist=False)
+            for i in range(3):
+                cache.put(f"k{i}", f"answer {i}")
+            assert await cache.get("k0") is None
+            assert await cache.get("k2") == "answer 2"
+            time.sleep(0.1)
+            assert await cache.get("k2") is None
+        assert cache.get_stats()["memory_entries"] <= 2
+
+    def test_disk_tier_pruned_periodically(self, response_cache):
+        """Test that the disk tier is trimmed to its limit on the periodic sweep, not every put."""
+        with patch.object(response_cache_module, 'PRUNE_EVERY_PUTS', 5):
+            response_cache.disk_max_entries = 3
+            for i in range(4):
+                response_cache.put(f"k{i}", f"answer {i}")
+            response_cache.flush()
+            assert response_cache.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 4
+
+            response_cache.put("k4", "answer 4")
+            response_cache.flush()
+        keys = {row[0] for row in response_cache.conn.execute("SELECT key FROM responses")}
+        assert keys == {"k2", "k3", "k4"}
+        response_cache.close()
+
+    @pytest.mark.asyncio
+    async def test_disk_read_not_blocked_by_writer(self, response_cache):
+        """Test that a disk lookup does not wait on the writer connection's lock."""
+        response_cache.put("k1", "answer one")
+        response_cache.flush()
+        response_cache.memory.clear()
+
+        with response_cache._db_lock:  # Writer busy (e.g. mid-prune)
+            assert await response_cache.get("k1") == "answer one"
+        response_cache.close()
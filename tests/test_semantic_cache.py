@@ -0,0 +1,32 @@
+import pytest
+from src.semantic_cache import SemanticCache
+
+class TestSemanticCache:
+
+    @pytest.fixture
+    def semantic_cache(self):
+        return SemanticCache(threshold=0.9, max_entries=3)
+
+    def test_similar_questions_hit_per_document(self, semantic_cache):
+        """Test that only close questions about the same document reuse answers."""
+        semantic_cache.add_many("doc", ["grace period?"], [[1.0, 0.0, 0.0]], ["Thirty days"])
+
+        matches = semantic_cache.lookup_many("doc", [[0.98, 0.1, 0.0], [0.0, 1.0, 0.0]])
+        assert matches[0][0] == "Thirty days"
+        assert matches[0][1] == "grace period?"
+        assert matches[1] is None
+        assert semantic_cache.lookup_many("other", [[1.0, 0.0, 0.0]]) == [None]
+        assert semantic_cache.get_stats()["hits"] == 1
+
+    def test_oldest_entries_evicted_and_document_removed(self, semantic_cache):
+        """Test the per-document size bound and invalidation."""
+        vectors = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0], [0.7, 0.7, 0.0]]
+        for i, vector in enumerate(vectors):
+            semantic_cache.add_many("doc", [f"q{i}"], [vector], [f"a{i}"])
+
+        assert semantic_cache.lookup_many("doc", [vectors[0]]) == [None]
+        assert semantic_cache.lookup_many("doc", [vectors[3]])[0][0] == "a3"
+        assert semantic_cache.get_stats()["questions"] == 3
+
+        semantic_cache.remove_document("doc")
+        assert semantic_cache.lookup_many("doc", [vectors[3]]) == [None]
@@ -0,0 +1,249 @@
+import pytest
+import numpy as np
+from unittest.mock import patch, AsyncMock
+from src.vector_search import FAISSVectorStore, VectorSearchEngine
+from src.embedding_cache import EmbeddingCache
+from src.models import DocumentChunk
+from src.config import settings
+
+def make_chunks(document_id, count):
+    return [
+        DocumentChunk(
+            chunk_id=f"{document_id}_chunk_{i}",
+            content=f"{document_id} content {i}",
+            page_number=1,
+            chunk_index=i,
+            document_id=document_id
+        )
+        for i in range(count)
+    ]
+
+class TestFAISSVectorStore:
+
+    @pytest.fixture
+    def vector_store(self, tmp_path):
+        store = FAISSVectorStore(dimension=8)
+        store.index_path = str(tmp_path / "faiss_index")
+        return store
+
+    @pytest.fixture
+    def embeddings(self):
+        rng = np.random.default_rng(0)
+        return rng.normal(size=(6, 8)).astype('float32')
+
+    def test_search_scoped_to_document(self, vector_store, embeddings):
+        """Test that a scoped search only returns the document's chunks."""
+        vector_store.add_embeddings(embeddings[:3].tolist(), make_chunks("doc_a", 3))
+        vector_store.add_embeddings(embeddings[3:].tolist(), make_chunks("doc_b", 3))
+
+        results = vector_store.search(embeddings[4].tolist(), k=5, document_id="doc_a")
+        assert len(results) == 3
+        assert all(r.chunk.document_id == "doc_a" for r in results)
+
+        results = vector_store.search(embeddings[4].tolist(), k=1)
+        assert results[0].chunk.chunk_id == "doc_b_chunk_1"
+        assert vector_store.search(embeddings[0].tolist(), document_id="missing") == []
+
+    def test_remove_document(self, vector_store, embeddings):
+        """Test that removing a document drops its partition."""
+        vector_store.add_embeddings(embeddings[:3].tolist(), make_chunks("doc_a", 3))
+        assert vector_store.has_document("doc_a")
+        assert vector_store.remove_document("doc_a")
+        assert not vector_store.has_document("doc_a")
+        assert vector_store.get_stats()["total_chunks"] == 0
+
+    def test_save_and_load(self, vector_store, embeddings):
+        """Test that partitions round-trip through disk."""
+        vector_store.add_embeddings(embeddings[:3].tolist(), make_chunks("doc_a", 3))
+        vector_store.add_embeddings(embeddings[3:].tolist(), make_chunks("doc_b", 3))
+        vector_store.save_index()
+
+        reloaded = FAISSVectorStore(dimension=8)
+        reloaded.index_path = vector_store.index_path
+        assert reloaded.load_index()
+        assert reloaded.get_stats() == vector_store.get_stats()
+        results = reloaded.search(embeddings[1].tolist(), k=1, document_id="doc_a")
+        assert results[0].chunk.chunk_id == "doc_a_chunk_1"
+
+    def test_search_many_matches_single_searches(self, vector_store, embeddings):
+        """Test that a multi-row search returns the same hits as per-query searches."""
+        vector_store.add_embeddings(embeddings[:3].tolist(), make_chunks("doc_a", 3))
+        vector_store.add_embeddings(embeddings[3:].tolist(), make_chunks("doc_b", 3))
+
+        queries = embeddings[[0, 4, 5]].tolist()
+        batched = vector_store.search_many(queries, k=2, document_id="doc_b")
+        assert len(batched) == 3
+        for query, results in zip(queries, batched):
+            single = vector_store.search(query, k=2, document_id="doc_b")
+            assert [r.chunk.chunk_id for r in results] == [r.chunk.chunk_id for r in single]
+
+    def test_append_only_persistence(self, vector_store, embeddings):
+        """Test that each add becomes a segment and the manifest reloads them."""
+        vector_store.add_embeddings(embeddings[:2].tolist(), make_chunks("doc_a", 2))
+        vector_store.add_embeddings(embeddings[2:4].tolist(), make_chunks("doc_b", 2))
+        vector_store.remove_document("doc_a")
+        vector_store.flush()
+
+        segments = vector_store._manifest["segments"]
+        assert [seg["document_id"] for seg in segments] == ["doc_b"]
+
+        reloaded = FAISSVectorStore(dimension=8)
+        reloaded.index_path = vector_store.index_path
+        assert reloaded.load_index()
+        assert not reloaded.has_document("doc_a")
+        assert reloaded.get_stats()["total_chunks"] == 2
+
+    def test_segments_compacted_per_document(self, vector_store, embeddings):
+        """Test that many appends to one document are merged into one segment."""
+        chunks = make_chunks("doc_a", 6)
+        with patch.object(settings, 'faiss_compact_segments', 3):
+            for i in range(6):
+                vector_store.add_embeddings([embeddings[i].tolist()], [chunks[i]])
+            vector_store.flush()
+
+        assert len(vector_store._manifest["segments"]) <= 3
+        reloaded = FAISSVectorStore(dimension=8)
+        reloaded.index_path = vector_store.index_path
+        assert reloaded.load_index()
+        results = reloaded.search(embeddings[5].tolist(), k=1, document_id="doc_a")
+        assert results[0].chunk.chunk_id == "doc_a_chunk_5"
+
+    def test_unreadable_segment_skips_only_its_document(self, vector_store, embeddings):
+        """Test that a segment failing to load drops its document, not the whole index."""
+        vector_store.add_embeddings(embeddings[:3].tolist(), make_chunks("doc_a", 3))
+        vector_store.add_embeddings(embeddings[3:].tolist(), make_chunks("doc_b", 3))
+        vector_store.flush()
+        
+        broken = next(seg for seg in vector_store._manifest["segments"] if seg["document_id"] == "doc_a")
+        with open(f"{vector_store._segment_path(broken['id'])}.offsets.npy", 'wb') as f:
+            f.write(b"corrupt")
+        
+        reloaded = FAISSVectorStore(dimension=8)
+        reloaded.index_path = vector_store.index_path
+        assert reloaded.load_index()
+        assert not reloaded.has_document("doc_a")
+        assert reloaded.has_document("doc_b")
+        assert any(seg["id"] == broken["id"] for seg in reloaded._manifest["segments"])
+
+    def test_mmap_load_is_lazy(self, vector_store, embeddings):
+        """Test that loaded segments are memory-mapped and indexed on first search."""
+        vector_store.add_embeddings(embeddings[:3].tolist(), make_chunks("doc_a", 3))
+        vector_store.flush()
+
+        reloaded = FAISSVectorStore(dimension=8)
+        reloaded.index_path = vector_store.index_path
+        with patch.object(settings, 'faiss_mmap_vectors', True):
+            assert reloaded.load_index()
+
+        partition = reloaded.partitions["doc_a"]
+        assert isinstance(partition._vector_blocks[0], np.memmap)
+        assert partition._index is None
+
+        results = reloaded.search(embeddings[2].tolist(), k=1, document_id="doc_a")
+        assert results[0].chunk.chunk_id == "doc_a_chunk_2"
+        assert results[0].chunk.content == "doc_a content 2"
+        assert partition._index is not None
+
+    @pytest.mark.parametrize("index_type", ["hnsw", "ivf_flat", "ivf_pq"])
+    def test_ann_index_types(self, vector_store, index_type):
+        """Test that ANN index types are used above the size threshold and flat below it."""
+        rng = np.random.default_rng(1)
+        vectors = rng.normal(size=(400, 8)).astype('float32')
+
+        with patch.object(settings, 'faiss_index_type', index_type), \
+             patch.object(settings, 'faiss_ann_min_vectors', 300), \
+             patch.object(settings, 'faiss_pq_m', 4), \
+             patch.object(settings, 'faiss_pq_nbits', 4):
+            vector_store.add_embeddings(vectors[:100].tolist(), make_chunks("doc_a", 100), persist=False)
+            vector_store.search(vectors[0].tolist(), k=1, document_id="doc_a")
+            assert type(vector_store.partitions["doc_a"]._index).__name__ == "IndexFlatIP"
+
+            chunks = make_chunks("doc_a", 400)[100:]
+            vector_store.add_embeddings(vectors[100:].tolist(), chunks, persist=False)
+            vector_store.flush()
+            results = vector_store.search(vectors[350].tolist(), k=1, document_id="doc_a")
+
+        assert type(vector_store.partitions["doc_a"]._index).__name__ != "IndexFlatIP"
+        assert vector_store.partitions["doc_a"]._index.ntotal == 400
+        assert len(results) == 1
+
+    def test_ann_index_built_off_the_search_path(self, vector_store):
+        """Test that searches are served by the flat index while the ANN index is built in the background."""
+        rng = np.random.default_rng(2)
+        vectors = rng.normal(size=(400, 8)).astype('float32')
+
+        with patch.object(settings, 'faiss_index_type', 'hnsw'), \
+             patch.object(settings, 'faiss_ann_min_vectors', 300), \
+             patch.object(vector_store, '_index_builder') as builder:
+            vector_store.add_embeddings(vectors.tolist(), make_chunks("doc_a", 400), persist=False)
+            results = vector_store.search(vectors[7].tolist(), k=1, document_id="doc_a")
+
+            partition = vector_store.partitions["doc_a"]
+            assert results[0].chunk.chunk_id == "doc_a_chunk_7"
+            assert type(partition._index).__name__ == "IndexFlatIP"
+            builder.submit.assert_called_once()
+
+            partition.build_ann_index()
+            results = vector_store.search(vectors[7].tolist(), k=1, document_id="doc_a")
+
+        assert type(partition._index).__name__ == "IndexHNSWFlat"
+        assert results[0].chunk.chunk_id == "doc_a_chunk_7"
+
+class TestVectorSearchEngine:
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = VectorSearchEngine()
+        engine.vector_store = FAISSVectorStore(dimension=4)
+        engine.vector_store.index_path = str(tmp_path / "faiss_index")
+        vectors = {
+            "AYUSH treatment is covered in full.": [0.0, 0.0, 1.0, 0.0],
+            "Room rent is limited to one percent.": [1.0, 0.0, 0.0, 0.0],
+            "Hospital room charges are reimbursed.": [0.9, 0.1, 0.0, 0.0],
+        }
+
+        async def fake_embeddings(texts):
+            return [vectors.get(text, [1.0, 0.0, 0.0, 0.0]) for text in texts]
+
+        engine.embedding_generator.generate_embeddings = fake_embeddings
+        engine.embedding_generator.generate_query_embeddings = fake_embeddings
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_hybrid_search_surfaces_exact_terms(self, engine):
+        """Test that BM25 fusion lifts a chunk matching a rare exact term the dense ranking misses."""
+        chunks = [
+            DocumentChunk(chunk_id=f"doc_chunk_{i}", content=text, page_number=1, chunk_index=i, document_id="doc")
+            for i, text in enumerate([
+                "AYUSH treatment is covered in full.",
+                "Room rent is limited to one percent.",
+                "Hospital room charges are reimbursed."
+            ])
+        ]
+        with patch.object(settings, 'hybrid_search', True):
+            await engine.add_document_chunks(chunks)
+            hybrid = await engine.search_similar_chunks("What about AYUSH?", k=1, document_id="doc")
+        dense = await engine.search_similar_chunks("What about AYUSH?", k=1, document_id="doc")
+
+        assert dense[0].chunk.chunk_id == "doc_chunk_1"
+        assert hybrid[0].chunk.chunk_id == "doc_chunk_0"
+        assert 0 < hybrid[0].score <= 1
+        assert len(engine.lexical_indexes["doc"]) == 3
+
+        engine.remove_document("doc")
+        assert "doc" not in engine.lexical_indexes
+
+    @pytest.mark.asyncio
+    async def test_query_embeddings_bypass_chunk_cache(self, engine, tmp_path):
+        """Test that query embeddings use the in-memory LRU and never reach the on-disk chunk cache."""
+        generator = VectorSearchEngine().embedding_generator
+        generator.cache = EmbeddingCache(cache_path=str(tmp_path / "embedding_cache.sqlite"))
+        generator._encode = AsyncMock(side_effect=lambda texts: [[float(len(text)), 0.0] for text in texts])
+
+        with patch.object(settings, 'query_embedding_cache_size', 2):
+            assert await generator.generate_query_embeddings(["a", "bb", "a"]) == [[1.0, 0.0], [2.0, 0.0], [1.0, 0.0]]
+            await generator.generate_query_embeddings(["bb", "ccc"])
+
+        assert generator._encode.await_args_list[1].args[0] == ["ccc"]
+        assert list(generator.query_cache) == ["bb", "ccc"]
+        assert generator.cache.get_stats()["entries"] == 0